@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+医疗OCR吞吐与延迟基准测试
+
+用 generators/generate_ocr_corpus.py 按固定随机种子生成带真值的合成医疗文档语料
+（与 evaluate_ocr.py 评测的语料同源），分别以 single（逐页）、batch（批量predict）、
+pooled（多进程工作池）三种模式运行 MedicalOCRProcessor，输出每种模式的每秒页数、峰值内存、
+分阶段耗时和 CER/WER，结果保存为JSON，并可与上一次的结果对比找出性能回退。
+
+- 每种模式在独立的子进程中运行，峰值内存（ru_maxrss）互不影响
+- 分阶段耗时来自处理器的追踪 span：decode / preprocess（含 preprocess.* 子阶段）/
+  orientation_probe / inference / parse；PaddleOCR 流水线在一次 predict 中完成
+  文字检测和识别，两者合计为 inference
+- single / pooled 模式统计每页的 p50/p95/p99 延迟；batch 模式一次推理整批页面，
+  单页延迟无从测量，只报告吞吐
+- pooled 模式的识别在工作进程中进行，只统计延迟、吞吐和内存
+- 每种模式同时用 evaluate_ocr.py 计算 CER/WER，--max-cer 为所有模式的精度门限
+  （提速不能以超出门限的精度损失为代价）；--manifest 可直接使用已生成的大规模语料
+
+用法示例:
+    python benchmark_ocr.py --modes single,batch,pooled --workers 4
+    python benchmark_ocr.py --quick --baseline benchmark_results/benchmark-20250826-120000.json
+    python benchmark_ocr.py --manifest eval_corpus/corpus.jsonl --max-pages 2000 --modes batch,pooled
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import traceback
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+MEDICAL_OCR_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'medical-ocr'))
+GENERATORS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generators'))
+
+MODES = ('single', 'batch', 'pooled')
+
+def generate_corpus(corpus_dir, pages, seed=42, resolutions=(100, 150, 300), layouts=None):
+    """用 generate_ocr_corpus.py 生成（或续用已生成的）带真值的基准语料，返回清单路径"""
+    sys.path.insert(0, GENERATORS_DIR)
+    import generate_ocr_corpus
+
+    layouts = list(layouts or generate_ocr_corpus.LAYOUTS)
+    unknown = [value for value in list(resolutions) + layouts
+               if value not in generate_ocr_corpus.RESOLUTIONS and value not in generate_ocr_corpus.LAYOUTS]
+    if unknown:
+        raise ValueError(f"未知的分辨率或版式: {', '.join(map(str, unknown))}")
+    generate_ocr_corpus.generate_corpus(corpus_dir, pages, seed=seed, resolutions=list(resolutions), layouts=layouts)
+    return os.path.join(corpus_dir, 'corpus.jsonl')
+
+
+def load_manifest(manifest_path, max_pages=None):
+    """读取 generators/generate_ocr_corpus.py 生成的语料清单，按 分辨率/版式 分组统计"""
+    corpus_dir = os.path.dirname(os.path.abspath(manifest_path))
+    pages = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if max_pages is not None and len(pages) >= max_pages:
+                break
+            entry = json.loads(line)
+            pages.append({'path': os.path.join(corpus_dir, entry['image']), 'resolution': entry['resolution'],
+                          'layout': entry['layout'], 'lines': entry['lines'],
+                          'truth': os.path.join(corpus_dir, entry['truth'])})
+    print(f"📄 语料清单: {manifest_path} ({len(pages)} 页)")
+    return pages
+
+
+def latency_summary(latencies_ms):
+    """延迟分位数（毫秒）"""
+    if not latencies_ms:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, (50, 95, 99)).tolist()
+    return {'p50': round(p50, 2), 'p95': round(p95, 2), 'p99': round(p99, 2),
+            'mean': round(float(values.mean()), 2), 'max': round(float(values.max()), 2)}
+
+
+def _peak_rss_mb(children=False):
+    """当前进程（或已退出子进程中最大者）的峰值常驻内存(MB)，不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _stage_means(totals, pages):
+    return {name: round(seconds * 1000 / pages, 2) for name, seconds in sorted(totals.items())} if pages else {}
+
+
+def _run_single(processor, tracing, pages, repeat):
+    latencies, groups, totals, predictions = [], {}, {}, []
+    for _ in range(repeat):
+        for page in pages:
+            # 只记录阶段耗时，不收集调试消息
+            with tracing.capture_trace("benchmark", level=logging.CRITICAL + 1) as request_trace:
+                start_time = time.perf_counter()
+                rows = processor.process_single_image(page['path'])
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+            latencies.append(elapsed_ms)
+            if len(predictions) < len(pages):
+                predictions.append([row['extracted_text'] for row in rows])
+            groups.setdefault(f"{page['resolution']}/{page['layout']}", []).append(elapsed_ms)
+            for name, seconds in request_trace.stage_durations().items():
+                totals[name] = totals.get(name, 0.0) + seconds
+    return latencies, totals, {name: latency_summary(values) for name, values in groups.items()}, predictions
+
+
+def _run_batch(processor, tracing, pages, repeat, batch_size):
+    from ocr_result_sink import ResultSink
+
+    class TextSink(ResultSink):
+        """只收集识别文本，不写文件（批次内各页同时推理，没有单页延迟）"""
+
+        def __init__(self):
+            self.texts = []
+
+        def write_page(self, file_name, page_number, items, elapsed_ms=None):
+            self.texts.append([item['text'] for item in items])
+
+    sink = TextSink()
+    with tracing.capture_trace("benchmark", level=logging.CRITICAL + 1) as request_trace:
+        for _ in range(repeat):
+            processor.process_batch_to_sink([page['path'] for page in pages], sink, batch_size=batch_size)
+    return None, request_trace.stage_durations(), None, sink.texts[:len(pages)]
+
+
+def _run_pooled(pool, pages, repeat):
+    latencies = []
+    in_flight = {}
+    predictions = [None] * len(pages)
+
+    def reap():
+        # 按完成顺序收集，延迟为提交到完成的时间
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future in done:
+            index, submitted = in_flight.pop(future)
+            predictions[index] = [row['extracted_text'] for row in future.result()]
+            latencies.append((now - submitted) * 1000)
+
+    for _ in range(repeat):
+        for index, page in enumerate(pages):
+            in_flight[pool.submit(page['path'])] = (index, time.perf_counter())
+            if len(in_flight) >= pool.max_pending:
+                reap()
+    while in_flight:
+        reap()
+    return latencies, {}, None, predictions
+
+
+def _run_mode(mode, pages, options):
+    """在子进程中运行一种模式，返回结果字典"""
+    sys.path.insert(0, MEDICAL_OCR_DIR)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    import ocr_tracing as tracing
+
+    processor_kwargs = dict(options['processor'], warmup=True)
+    repeat = options['repeat']
+    if mode == 'pooled':
+        from ocr_worker_pool import OCRWorkerPool
+        pool = OCRWorkerPool(num_workers=options['workers'], threads_per_worker=options['threads_per_worker'],
+                             **processor_kwargs).start()
+        start_time = time.perf_counter()
+        try:
+            latencies, totals, groups, predictions = _run_pooled(pool, pages, repeat)
+            seconds = time.perf_counter() - start_time
+        finally:
+            pool.close()
+    else:
+        from gradio_demo import MedicalOCRProcessor
+        processor = MedicalOCRProcessor(**processor_kwargs)
+        start_time = time.perf_counter()
+        if mode == 'single':
+            latencies, totals, groups, predictions = _run_single(processor, tracing, pages, repeat)
+        else:
+            latencies, totals, groups, predictions = _run_batch(processor, tracing, pages, repeat,
+                                                                options['batch_size'])
+        seconds = time.perf_counter() - start_time
+
+    page_count = len(pages) * repeat
+    result = {
+        'pages': page_count,
+        'seconds': round(seconds, 3),
+        'pages_per_second': round(page_count / seconds, 3) if seconds else None,
+        'peak_rss_mb': _peak_rss_mb(),
+        'stages_ms_per_page': _stage_means(totals, page_count),
+        'paddleocr_version': getattr(sys.modules.get('paddleocr'), '__version__', None),
+    }
+    if latencies is not None:
+        result['latency_ms'] = latency_summary(latencies)
+    if mode == 'pooled':
+        result['peak_worker_rss_mb'] = _peak_rss_mb(children=True)
+    if groups:
+        result['groups'] = groups
+    if all(page.get('truth') for page in pages):
+        from evaluate_ocr import score_corpus, summarize
+        result['accuracy'] = summarize(score_corpus(
+            [(page['truth'], texts) for page, texts in zip(pages, predictions)], workers=options['workers']))
+    return result
+
+
+def _mode_entry(conn, mode, pages, options):
+    try:
+        conn.send(_run_mode(mode, pages, options))
+    except BaseException:
+        conn.send({'error': traceback.format_exc()})
+    finally:
+        conn.close()
+
+
+def run_mode_isolated(mode, pages, options):
+    """在新的spawn子进程中运行一种模式（子进程可再创建工作池）"""
+    context = mp.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_mode_entry, args=(sender, mode, pages, options), name=f"benchmark-{mode}")
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'error': f"子进程异常退出 (exit code {process.exitcode})"}
+    process.join()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=MEDICAL_OCR_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_with_baseline(report, baseline, tolerance=0.10, cer_tolerance=0.005):
+    """与上一次的结果对比，返回回退项列表（CER按绝对值上升 cer_tolerance 判定）"""
+    regressions = []
+    print(f"\n📉 与基准结果对比 (commit {baseline['meta'].get('commit')}, 容差 {tolerance:.0%})")
+    for mode, current in report['modes'].items():
+        previous = baseline.get('modes', {}).get(mode)
+        if not previous or 'error' in current or 'error' in previous:
+            continue
+        checks = [
+            ('pages_per_second', current['pages_per_second'], previous['pages_per_second'], True),
+            ('latency_p95_ms', current.get('latency_ms', {}).get('p95'), previous.get('latency_ms', {}).get('p95'),
+             False),
+            ('peak_rss_mb', current['peak_rss_mb'], previous['peak_rss_mb'], False),
+        ]
+        for metric, now, before, higher_is_better in checks:
+            if not now or not before:
+                continue
+            change = (now - before) / before
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            marker = "⚠️" if regressed else "✅"
+            print(f"  {marker} {mode:7s} {metric:17s} {before:10.2f} -> {now:10.2f} ({change:+.1%})")
+            if regressed:
+                regressions.append({'mode': mode, 'metric': metric, 'before': before, 'after': now,
+                                    'change': round(change, 4)})
+        now = current.get('accuracy', {}).get('overall', {}).get('cer')
+        before = previous.get('accuracy', {}).get('overall', {}).get('cer')
+        if now is not None and before is not None:
+            regressed = now - before > cer_tolerance
+            print(f"  {'⚠️' if regressed else '✅'} {mode:7s} {'cer':17s} {before:10.2%} -> {now:10.2%}")
+            if regressed:
+                regressions.append({'mode': mode, 'metric': 'cer', 'before': before, 'after': now,
+                                    'change': round(now - before, 5)})
+    return regressions
+
+
+def print_report(report):
+    print("\n🎯 基准测试结果")
+    print("=" * 60)
+    for mode, result in report['modes'].items():
+        if 'error' in result:
+            print(f"❌ {mode}: 运行失败\n{result['error']}")
+            continue
+        latency = result.get('latency_ms')
+        latency_text = (f"p50/p95/p99 = {latency['p50']:.0f}/{latency['p95']:.0f}/{latency['p99']:.0f}ms, "
+                        if latency and latency['p50'] is not None else "")
+        print(f"📊 {mode}: {result['pages']} 页, {result['pages_per_second']:.2f} 页/秒, "
+              f"{latency_text}峰值内存 {result['peak_rss_mb']}MB")
+        if result.get('peak_worker_rss_mb'):
+            print(f"   工作进程峰值内存: {result['peak_worker_rss_mb']}MB")
+        if result.get('accuracy'):
+            overall = result['accuracy']['overall']
+            print(f"   精度: CER {overall['cer']:.2%}, WER {overall['wer']:.2%}")
+        for name, ms in result['stages_ms_per_page'].items():
+            print(f"   {name:28s} {ms:9.2f} ms/页")
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="医疗OCR吞吐与延迟基准测试")
+    parser.add_argument('--modes', default=','.join(MODES), help="运行模式（逗号分隔）: single,batch,pooled")
+    parser.add_argument('--seed', type=int, default=42, help="语料随机种子")
+    parser.add_argument('--resolutions', default="100,150,300", help="生成语料的扫描分辨率DPI（逗号分隔）")
+    parser.add_argument('--layouts', default=None, help="生成语料的版式（逗号分隔，默认全部）")
+    parser.add_argument('--pages', type=int, default=36, help="生成语料的页数")
+    parser.add_argument('--quick', action='store_true', help="快速模式：只用100dpi、共4页")
+    parser.add_argument('--repeat', type=int, default=1, help="语料重复处理次数")
+    parser.add_argument('--corpus-dir', default=None,
+                        help="生成语料的目录（默认 benchmark_corpus/seed<种子>-<分辨率>，已生成的页面直接复用）")
+    parser.add_argument('--manifest', default=None,
+                        help="直接使用已生成的语料清单 corpus.jsonl（不再生成语料）")
+    parser.add_argument('--max-pages', type=int, default=None, help="最多使用清单中的页数")
+    parser.add_argument('--batch-size', type=int, default=8, help="batch 模式的批大小")
+    parser.add_argument('--workers', type=int, default=2, help="pooled 模式的工作进程数")
+    parser.add_argument('--threads-per-worker', type=int, default=None, help="pooled 模式每个进程的推理线程数")
+    parser.add_argument('--profile', default='accurate', help="模型配置档（accurate / fast）")
+    parser.add_argument('--preprocess', default="none",
+                        help="自适应预处理阶段（逗号分隔，如 reject_blank,contrast,deskew,rescale；默认不启用）")
+    parser.add_argument('--output', default=None,
+                        help="结果JSON路径（默认 benchmark_results/benchmark-<时间>.json）")
+    parser.add_argument('--baseline', default=None, help="用于对比的上一次结果JSON")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="判定性能回退的相对变化容差")
+    parser.add_argument('--max-cer', type=float, default=None,
+                        help="各模式的CER门限（超出时退出码为1）")
+    parser.add_argument('--cer-tolerance', type=float, default=0.005, help="相对基准允许的CER绝对上升值")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数：返回进程退出码（相对基准出现回退或运行失败时为1）"""
+    args = parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        print(f"❌ 未知的运行模式: {unknown}（可选: {', '.join(MODES)}）")
+        return 1
+
+    resolutions = [int(dpi) for dpi in args.resolutions.split(',') if dpi.strip()]
+    layouts = [layout.strip() for layout in args.layouts.split(',') if layout.strip()] if args.layouts else None
+    page_count = args.pages
+    if args.quick:
+        resolutions, page_count = [100], 4
+
+    print("🏁 医疗OCR基准测试")
+    print("=" * 60)
+    manifest = args.manifest
+    if not manifest:
+        # 生成参数不同的语料不能共用目录，默认目录按种子和分辨率区分
+        corpus_dir = args.corpus_dir or os.path.join(
+            'benchmark_corpus', f"seed{args.seed}-{'_'.join(map(str, resolutions))}")
+        try:
+            manifest = generate_corpus(corpus_dir, page_count, args.seed, resolutions, layouts)
+        except ValueError as e:
+            print(f"❌ 语料生成失败: {e}")
+            return 1
+    pages = load_manifest(manifest, args.max_pages)
+
+    options = {
+        'processor': {
+            'profile': args.profile,
+            'preprocessing': None if args.preprocess.lower() == 'none' else args.preprocess,
+        },
+        'repeat': args.repeat,
+        'batch_size': args.batch_size,
+        'workers': args.workers,
+        'threads_per_worker': args.threads_per_worker,
+    }
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'manifest': manifest,
+            'corpus_pages': len(pages),
+            'options': options,
+        },
+        'modes': {},
+    }
+    for mode in modes:
+        print(f"\n🚀 运行模式: {mode}")
+        report['modes'][mode] = run_mode_isolated(mode, pages, options)
+
+    print_report(report)
+
+    failed = any('error' in result for result in report['modes'].values())
+    if args.max_cer is not None:
+        for mode, result in report['modes'].items():
+            cer = result.get('accuracy', {}).get('overall', {}).get('cer')
+            if cer is None:
+                print(f"⚠️ {mode}: 没有精度结果，无法检查CER门限")
+            elif cer > args.max_cer:
+                print(f"❌ {mode}: CER {cer:.2%} 超出门限 {args.max_cer:.2%}")
+                failed = True
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['regressions'] = compare_with_baseline(report, baseline, args.tolerance, args.cer_tolerance)
+        failed = failed or bool(report['regressions'])
+
+    output = args.output or os.path.join('benchmark_results', f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存到: {output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+医疗OCR精度评测
+把识别结果与 generators/generate_ocr_corpus.py 输出的真值逐行对齐，计算字符错误率（CER）和
+词错误率（WER），并按文字类别、字体、分辨率、版式和字段分组汇总。
+
+- 编辑距离：安装了 rapidfuzz 时使用其C实现（成本矩阵一次向量化计算），否则使用按位并行的
+  Myers 算法（Python大整数作位向量，每个字符只需常数次位运算）
+- 行对齐：按归一化编辑距离全局贪心一一匹配，与识别结果的阅读顺序无关；未匹配的真值行按整行
+  删除计，多余的识别行按插入计入整体及页面级分组（字体/分辨率/版式）
+- 词的切分：中文逐字作为一个词，其余按空白切分；比较前做 NFKC 归一化并合并连续空白
+- 识别：--workers 0 时在本进程中批量识别，>0 时使用多进程工作池；也可用 --predictions 直接评测
+  batch_ocr.py 的输出目录。评分在多个进程中并行进行
+- 精度门限：--max-cer / --max-wer 超出，或与 --baseline 相比 CER/WER 上升超过容差时返回退出码1
+
+用法示例:
+    python evaluate_ocr.py eval_corpus --profile fast --workers 4 --max-cer 0.05
+    python evaluate_ocr.py eval_corpus --predictions ocr_out --baseline accuracy_results/accuracy-accurate.json
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import glob
+import time
+import argparse
+import unicodedata
+import multiprocessing as mp
+
+import numpy as np
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+    from rapidfuzz.process import cdist as _rapidfuzz_cdist
+except ImportError:
+    _rapidfuzz_levenshtein = None
+    _rapidfuzz_cdist = None
+
+MEDICAL_OCR_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'medical-ocr'))
+
+# 识别行与真值行的归一化编辑距离超过该值时不视为同一行
+DEFAULT_MAX_ALIGN_COST = 0.6
+
+# 按行分组的维度和按页分组的维度
+LINE_GROUPS = ('script', 'field')
+PAGE_GROUPS = ('font', 'resolution', 'layout')
+GROUP_TITLES = {'script': "文字类别", 'field': "字段", 'font': "字体", 'resolution': "分辨率", 'layout': "版式"}
+
+_WORD = re.compile(r'[\u3400-\u9fff]|[^\s\u3400-\u9fff]+')
+_SPACES = re.compile(r'\s+')
+
+
+# ---------------------------------------------------------------- 编辑距离
+
+def _myers_distance(a, b):
+    """按位并行的 Levenshtein 距离（Myers 1999 / Hyyrö 2001），a、b 为字符串或可哈希元素序列"""
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+
+    # 较短的序列作为模式：每种元素在模式中出现位置的位掩码
+    peq = {}
+    for i, symbol in enumerate(b):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for symbol in a:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def levenshtein(a, b):
+    """编辑距离（插入、删除、替换代价均为1）"""
+    if _rapidfuzz_levenshtein is not None:
+        return _rapidfuzz_levenshtein.distance(a, b)
+    return _myers_distance(a, b)
+
+
+def _cost_matrix(reference, hypothesis, max_cost):
+    """归一化编辑距离矩阵（真值行 x 识别行），超过 max_cost 的位置为 inf"""
+    if _rapidfuzz_cdist is not None:
+        costs = _rapidfuzz_cdist(reference, hypothesis, scorer=_rapidfuzz_levenshtein.normalized_distance,
+                                 score_cutoff=max_cost, dtype=np.float64)
+    else:
+        costs = np.full((len(reference), len(hypothesis)), np.inf)
+        hypothesis_lengths = [len(text) for text in hypothesis]
+        for i, ref in enumerate(reference):
+            for j, (hyp, hyp_length) in enumerate(zip(hypothesis, hypothesis_lengths)):
+                longest = max(len(ref), hyp_length) or 1
+                # 长度差是编辑距离的下界，差距过大的组合不必计算
+                if abs(len(ref) - hyp_length) > max_cost * longest:
+                    continue
+                costs[i, j] = _myers_distance(ref, hyp) / longest
+    costs[costs > max_cost] = np.inf
+    return costs
+
+
+# ---------------------------------------------------------------- 对齐与评分
+
+def normalize_text(text):
+    """NFKC归一化（全角标点转半角）并合并连续空白"""
+    return _SPACES.sub(' ', unicodedata.normalize('NFKC', text or '')).strip()
+
+
+def tokenize_words(text):
+    """中文逐字、其余按空白切分的词序列"""
+    return _WORD.findall(text)
+
+
+def align_lines(reference, hypothesis, max_cost=DEFAULT_MAX_ALIGN_COST):
+    """按归一化编辑距离从小到大贪心一一匹配
+
+    Returns:
+        (matches, unmatched): matches[i] 为真值行 i 匹配的识别行下标（未匹配为None），
+        unmatched 为未匹配的识别行下标列表
+    """
+    matches = [None] * len(reference)
+    if not reference or not hypothesis:
+        return matches, list(range(len(hypothesis)))
+
+    costs = _cost_matrix(reference, hypothesis, max_cost)
+    candidates = np.argwhere(np.isfinite(costs))
+    order = np.argsort(costs[candidates[:, 0], candidates[:, 1]], kind='stable')
+    used = set()
+    for i, j in candidates[order].tolist():
+        if matches[i] is None and j not in used:
+            matches[i] = j
+            used.add(j)
+    return matches, [j for j in range(len(hypothesis)) if j not in used]
+
+
+def score_page(truth, predicted_texts, max_cost=DEFAULT_MAX_ALIGN_COST):
+    """对一页的识别文本评分，返回可汇总的紧凑结果"""
+    reference = [normalize_text(line['text']) for line in truth['lines']]
+    hypothesis = [text for text in (normalize_text(text) for text in predicted_texts) if text]
+    matches, unmatched = align_lines(reference, hypothesis, max_cost)
+
+    lines = []
+    for line, ref, j in zip(truth['lines'], reference, matches):
+        hyp = hypothesis[j] if j is not None else ''
+        ref_words, hyp_words = tokenize_words(ref), tokenize_words(hyp)
+        lines.append((line.get('script', 'unknown'), line.get('field', 'unknown'),
+                      len(ref), levenshtein(ref, hyp), len(ref_words), levenshtein(ref_words, hyp_words),
+                      ref == hyp))
+    return {
+        'id': truth['id'],
+        **{name: str(truth.get(name, 'unknown')) for name in PAGE_GROUPS},
+        'lines': lines,
+        'inserted_chars': sum(len(hypothesis[j]) for j in unmatched),
+        'inserted_words': sum(len(tokenize_words(hypothesis[j])) for j in unmatched),
+    }
+
+
+class ErrorTally:
+    """一组行的字符/词错误累计"""
+
+    __slots__ = ('lines', 'exact_lines', 'chars', 'char_errors', 'words', 'word_errors')
+
+    def __init__(self):
+        self.lines = self.exact_lines = 0
+        self.chars = self.char_errors = self.words = self.word_errors = 0
+
+    def add_line(self, chars, char_errors, words, word_errors, exact):
+        self.lines += 1
+        self.exact_lines += exact
+        self.chars += chars
+        self.char_errors += char_errors
+        self.words += words
+        self.word_errors += word_errors
+
+    def add_insertion(self, chars, words):
+        self.char_errors += chars
+        self.word_errors += words
+
+    def to_dict(self):
+        return {
+            'lines': self.lines,
+            'chars': self.chars,
+            'words': self.words,
+            'cer': round(self.char_errors / self.chars, 5) if self.chars else None,
+            'wer': round(self.word_errors / self.words, 5) if self.words else None,
+            'line_accuracy': round(self.exact_lines / self.lines, 4) if self.lines else None,
+        }
+
+
+def summarize(page_scores, worst=10):
+    """汇总各页评分：整体及按文字类别、字段、字体、分辨率、版式分组的 CER/WER"""
+    overall = ErrorTally()
+    groups = {name: {} for name in LINE_GROUPS + PAGE_GROUPS}
+    page_cer = []
+    for page in page_scores:
+        page_tallies = [overall] + [groups[name].setdefault(page[name], ErrorTally()) for name in PAGE_GROUPS]
+        page_tally = ErrorTally()
+        for script, field, *counts in page['lines']:
+            for tally in page_tallies + [groups['script'].setdefault(script, ErrorTally()),
+                                         groups['field'].setdefault(field, ErrorTally()), page_tally]:
+                tally.add_line(*counts)
+        for tally in page_tallies + [page_tally]:
+            tally.add_insertion(page['inserted_chars'], page['inserted_words'])
+        page_cer.append((page_tally.to_dict()['cer'] or 0.0, page['id']))
+
+    page_cer.sort(reverse=True)
+    return {
+        'pages': len(page_scores),
+        'overall': overall.to_dict(),
+        **{f"by_{name}": {key: tally.to_dict() for key, tally in sorted(tallies.items())}
+           for name, tallies in groups.items()},
+        'worst_pages': [{'id': page_id, 'cer': round(cer, 5)} for cer, page_id in page_cer[:worst]],
+    }
+
+
+def _score_task(task):
+    truth_path, predicted_texts, max_cost = task
+    with open(truth_path, 'r', encoding='utf-8') as f:
+        truth = json.load(f)
+    return score_page(truth, predicted_texts, max_cost)
+
+
+def score_corpus(pairs, workers=None, max_cost=DEFAULT_MAX_ALIGN_COST, chunksize=32):
+    """并行评分 [(真值JSON路径, 识别文本列表)]，返回各页评分列表"""
+    tasks = [(truth_path, list(texts), max_cost) for truth_path, texts in pairs]
+    workers = min(workers or os.cpu_count() or 1, max(1, len(tasks) // chunksize))
+    if workers <= 1:
+        return [_score_task(task) for task in tasks]
+    with mp.get_context('spawn').Pool(workers) as pool:
+        return pool.map(_score_task, tasks, chunksize=chunksize)
+
+
+# ---------------------------------------------------------------- 语料与识别结果
+
+def load_corpus(path, max_pages=None):
+    """读取语料清单（目录或 corpus.jsonl），返回 [{'id', 'path', 'truth', ...}]"""
+    manifest_path = os.path.join(path, 'corpus.jsonl') if os.path.isdir(path) else path
+    corpus_dir = os.path.dirname(os.path.abspath(manifest_path))
+    pages = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if max_pages is not None and len(pages) >= max_pages:
+                break
+            entry = json.loads(line)
+            entry['path'] = os.path.join(corpus_dir, entry['image'])
+            entry['truth'] = os.path.join(corpus_dir, entry['truth'])
+            pages.append(entry)
+    return pages
+
+
+def _page_key(file_name):
+    # batch_ocr.py 的文件名为相对输入目录的路径，页面ID（文件名主干）在语料中唯一
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def read_predictions(output_dir):
+    """读取 batch_ocr.py 输出目录中的结果分片，返回 {页面ID: [识别文本, ...]}（按行号排序）"""
+    rows = []
+    for path in sorted(glob.glob(os.path.join(output_dir, 'results-*'))):
+        if path.endswith('.csv'):
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                rows.extend((row['file_name'], int(row['line_number']), row['extracted_text'])
+                            for row in csv.DictReader(f))
+        elif path.endswith(('.parquet', '.arrow')):
+            try:
+                import pyarrow.parquet as pq
+                import pyarrow.ipc as ipc
+            except ImportError as e:
+                raise RuntimeError("读取Parquet/Arrow结果需要安装pyarrow: pip install pyarrow") from e
+            if path.endswith('.parquet'):
+                table = pq.read_table(path, columns=['file_name', 'line_number', 'extracted_text'])
+            else:
+                with open(path, 'rb') as f:
+                    table = ipc.open_stream(f).read_all()
+            columns = table.to_pydict()
+            rows.extend(zip(columns['file_name'], columns['line_number'], columns['extracted_text']))
+
+    predictions = {}
+    for file_name, line_number, text in sorted(rows, key=lambda row: (row[0], row[1])):
+        predictions.setdefault(_page_key(file_name), []).append(text)
+    return predictions
+
+
+def run_ocr(pages, workers=0, batch_size=8, processor_kwargs=None):
+    """识别语料中的全部页面，返回 {页面ID: [识别文本, ...]}"""
+    sys.path.insert(0, MEDICAL_OCR_DIR)
+    processor_kwargs = dict(processor_kwargs or {}, warmup=True)
+    paths = [page['path'] for page in pages]
+    predictions = {}
+    if workers > 0:
+        from ocr_worker_pool import OCRWorkerPool
+        with OCRWorkerPool(num_workers=workers, **processor_kwargs) as pool:
+            # imap 按输入顺序返回，在途任务数有上限
+            for done, (page, rows) in enumerate(zip(pages, pool.imap(paths)), 1):
+                predictions[page['id']] = [row['extracted_text'] for row in rows]
+                if done % 500 == 0:
+                    print(f"⏳ 已识别 {done}/{len(pages)} 页")
+    else:
+        from gradio_demo import MedicalOCRProcessor
+        from ocr_result_sink import ResultSink
+
+        class CollectingSink(ResultSink):
+            """只收集识别文本，不写文件"""
+
+            def __init__(self):
+                self.rows_written = 0
+
+            def write_page(self, file_name, page_number, items, elapsed_ms=None):
+                predictions[_page_key(file_name)] = [item['text'] for item in items]
+
+        processor = MedicalOCRProcessor(**processor_kwargs)
+        processor.process_batch_to_sink(paths, CollectingSink(), batch_size=batch_size)
+    return predictions
+
+
+# ---------------------------------------------------------------- 门限与报告
+
+def check_thresholds(report, max_cer=None, max_wer=None):
+    """检查整体 CER/WER 是否超出门限，返回超限项列表"""
+    violations = []
+    for metric, limit in (('cer', max_cer), ('wer', max_wer)):
+        value = report['overall'][metric]
+        if limit is not None and value is not None and value > limit:
+            violations.append({'group': 'overall', 'metric': metric, 'value': value, 'limit': limit})
+    return violations
+
+
+def compare_with_baseline(report, baseline, tolerance=0.01, min_chars=500):
+    """与上一次的评测结果对比，整体及各分组 CER/WER 绝对值上升超过容差视为回退
+
+    字符数少于 min_chars 的分组统计波动大，不参与对比。
+    """
+    regressions = []
+    print(f"\n📉 与基准评测对比 (容差 +{tolerance:.2%})")
+    sections = [('overall', {'overall': report['overall']}, {'overall': baseline['overall']})]
+    sections += [(name, report[name], baseline.get(name, {})) for name in report if name.startswith('by_')]
+    for section, current_groups, previous_groups in sections:
+        for group, current in current_groups.items():
+            previous = previous_groups.get(group)
+            if not previous or min(current['chars'], previous['chars']) < min_chars:
+                continue
+            for metric in ('cer', 'wer'):
+                now, before = current[metric], previous[metric]
+                if now is None or before is None:
+                    continue
+                regressed = now - before > tolerance
+                if regressed or section == 'overall':
+                    marker = "⚠️" if regressed else "✅"
+                    print(f"  {marker} {section}/{group} {metric.upper()} {before:.2%} -> {now:.2%}")
+                if regressed:
+                    regressions.append({'group': f"{section}/{group}", 'metric': metric,
+                                        'before': before, 'after': now, 'change': round(now - before, 5)})
+    return regressions
+
+
+def _format_rate(value):
+    return "   -   " if value is None else f"{value:7.2%}"
+
+
+def print_report(report):
+    overall = report['overall']
+    print("\n🎯 精度评测结果")
+    print("=" * 60)
+    print(f"📊 {report['pages']} 页, {overall['lines']} 行: CER {_format_rate(overall['cer'])}, "
+          f"WER {_format_rate(overall['wer'])}, 整行正确率 {_format_rate(overall['line_accuracy'])}")
+    for name in LINE_GROUPS + PAGE_GROUPS:
+        print(f"\n📋 按{GROUP_TITLES[name]}:")
+        for group, tally in report[f"by_{name}"].items():
+            print(f"   {group:20s} CER {_format_rate(tally['cer'])}  WER {_format_rate(tally['wer'])}  "
+                  f"({tally['lines']} 行)")
+    if report['worst_pages']:
+        print("\n🔍 CER最高的页面: " + ", ".join(f"{page['id']} ({page['cer']:.1%})" for page in report['worst_pages'][:5]))
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="医疗OCR精度评测（CER/WER）")
+    parser.add_argument('corpus', help="generate_ocr_corpus.py 生成的语料目录或 corpus.jsonl")
+    parser.add_argument('--predictions', default=None, help="batch_ocr.py 的输出目录（不设置则现场识别）")
+    parser.add_argument('--max-pages', type=int, default=None, help="最多评测的页数")
+    parser.add_argument('--workers', type=int, default=0, help="识别工作进程数（0表示在本进程中批量识别）")
+    parser.add_argument('--batch-size', type=int, default=8, help="本进程批量识别的批大小")
+    parser.add_argument('--score-workers', type=int, default=None, help="评分进程数（默认为CPU核数）")
+    parser.add_argument('--profile', default='accurate', help="模型配置档（accurate / fast）")
+    parser.add_argument('--preprocess', default="none",
+                        help="自适应预处理阶段（逗号分隔，如 reject_blank,contrast,deskew,rescale；默认不启用）")
+    parser.add_argument('--max-align-cost', type=float, default=DEFAULT_MAX_ALIGN_COST,
+                        help="识别行与真值行对齐的最大归一化编辑距离")
+    parser.add_argument('--max-cer', type=float, default=None, help="整体CER门限（超出时退出码为1）")
+    parser.add_argument('--max-wer', type=float, default=None, help="整体WER门限（超出时退出码为1）")
+    parser.add_argument('--baseline', default=None, help="用于对比的上一次评测结果JSON")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="CER/WER允许上升的绝对值")
+    parser.add_argument('--output', default=None,
+                        help="结果JSON路径（默认 accuracy_results/accuracy-<时间>.json）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数：返回进程退出码（超出精度门限、相对基准回退时为1）"""
+    args = parse_args(argv)
+
+    print("🏁 医疗OCR精度评测")
+    print("=" * 60)
+    print(f"📏 编辑距离实现: {'rapidfuzz' if _rapidfuzz_levenshtein is not None else 'Myers位并行（pip install rapidfuzz 可加速）'}")
+    pages = load_corpus(args.corpus, args.max_pages)
+    print(f"📄 语料: {args.corpus} ({len(pages)} 页)")
+
+    start_time = time.perf_counter()
+    if args.predictions:
+        predictions = read_predictions(args.predictions)
+        source = {'predictions': os.path.abspath(args.predictions)}
+    else:
+        processor_kwargs = {
+            'profile': args.profile,
+            'preprocessing': None if args.preprocess.lower() == 'none' else args.preprocess,
+        }
+        predictions = run_ocr(pages, args.workers, args.batch_size, processor_kwargs)
+        source = {'processor': processor_kwargs, 'workers': args.workers, 'batch_size': args.batch_size}
+    ocr_seconds = time.perf_counter() - start_time
+
+    missing = [page['id'] for page in pages if page['id'] not in predictions]
+    if missing:
+        # 没有识别结果的页面按全部删除计
+        print(f"⚠️ {len(missing)} 页没有识别结果（如 {missing[0]}），按全部删除计")
+
+    start_time = time.perf_counter()
+    page_scores = score_corpus([(page['truth'], predictions.get(page['id'], [])) for page in pages],
+                               workers=args.score_workers, max_cost=args.max_align_cost)
+    score_seconds = time.perf_counter() - start_time
+
+    report = summarize(page_scores)
+    report['meta'] = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'corpus': os.path.abspath(args.corpus),
+        'missing_pages': len(missing),
+        'ocr_seconds': round(ocr_seconds, 2),
+        'score_seconds': round(score_seconds, 2),
+        'edit_distance': 'rapidfuzz' if _rapidfuzz_levenshtein is not None else 'myers',
+        **source,
+    }
+    print_report(report)
+
+    failures = check_thresholds(report, args.max_cer, args.max_wer)
+    for failure in failures:
+        print(f"❌ 整体{failure['metric'].upper()} {failure['value']:.2%} 超出门限 {failure['limit']:.2%}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['regressions'] = compare_with_baseline(report, baseline, args.tolerance)
+        failures += report['regressions']
+
+    output = args.output or os.path.join('accuracy_results', f"accuracy-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存到: {output}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
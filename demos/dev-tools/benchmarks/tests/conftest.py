@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入 benchmarks 目录下的评测脚本
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,69 @@
+"""evaluate_ocr 的行为测试：Myers 位并行编辑距离与逐行评分"""
+
+import random
+
+import numpy as np
+import pytest
+
+from evaluate_ocr import _cost_matrix, _myers_distance, levenshtein, score_page, tokenize_words
+
+
+def _reference_distance(a, b):
+    """O(mn) 动态规划参考实现"""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("", "", 0),
+    ("", "abc", 3),
+    ("kitten", "sitting", 3),
+    ("阿莫西林胶囊", "阿莫西林胶囊", 0),
+    ("阿莫西林 0.5g", "阿莫西林 O.5g", 1),
+    ("flaw", "lawn", 2),
+])
+def test_myers_known_distances(a, b, expected):
+    assert _myers_distance(a, b) == expected
+    assert _myers_distance(b, a) == expected
+
+
+def test_myers_matches_dynamic_programming():
+    rng = random.Random(20250817)
+    alphabet = "ab中文 0.5mg"
+    for _ in range(300):
+        # 覆盖超过64个元素的模式（多个机器字长度的位向量）
+        a = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 150)))
+        b = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 150)))
+        assert _myers_distance(a, b) == _reference_distance(a, b), (a, b)
+
+
+def test_myers_on_token_sequences():
+    reference = tokenize_words("每日 2次 饭后服用 Amlodipine 5mg")
+    hypothesis = tokenize_words("每曰 2次 饭后服用 Amlodipine 5 mg")
+    assert _myers_distance(reference, hypothesis) == _reference_distance(reference, hypothesis) == 3
+    assert levenshtein(reference, hypothesis) == 3
+
+
+def test_cost_matrix_filters_by_normalized_distance():
+    costs = _cost_matrix(["Dose: 10mg", "ID: 110101"], ["Dose: 1Omg", "完全不同的文字"], max_cost=0.3)
+    assert costs[0, 0] == pytest.approx(0.1)
+    assert np.isinf(costs[0, 1]) and np.isinf(costs[1]).all()
+
+
+def test_score_page_counts_errors_and_insertions():
+    truth = {'id': 'p1', 'font': 'dejavu', 'lines': [
+        {'text': "阿莫西林 0.5g", 'script': 'mixed', 'field': 'drug'},
+        {'text': "ID: 110101", 'script': 'latin', 'field': 'id'},
+    ]}
+    page = score_page(truth, ["ID:  110101", "阿莫西林 O.5g", "噪声"])
+
+    (_, _, chars, char_errors, _, _, exact), (_, field, _, id_errors, _, _, id_exact) = page['lines']
+    assert (chars, char_errors, exact) == (9, 1, False)
+    assert (field, id_errors, id_exact) == ('id', 0, True)
+    assert page['inserted_chars'] == 2 and page['inserted_words'] == 2
+    assert page['font'] == 'dejavu' and page['layout'] == 'unknown'
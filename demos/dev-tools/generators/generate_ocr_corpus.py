@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大规模合成医疗文档语料生成器
+在多个进程中并行生成带标注的随机医疗文档页面，用于精度评测和速度基准测试：
+- 版式随机：诊断报告（单栏）、双栏病历、字段表单、检验结果表格
+- 内容随机：姓名、医院、科室、日期、证件号、诊断、药品剂量等字段按种子随机组合
+- 退化随机：倾斜、高斯模糊、噪声、JPEG压缩伪影
+- 每页同时输出真值JSON：逐行文字、外接矩形 box、旋转后的四点坐标 points、
+  文字类别（zh / en / mixed）、字段名、字体和字号
+
+每页的内容只由 (种子, 页序号) 决定，与进程数无关；字体在每个工作进程中只查找和加载一次。
+已生成的页面（真值JSON已存在）在重新运行时跳过，中断后可直接续跑。
+
+用法示例:
+    python generate_ocr_corpus.py eval_corpus --pages 20000 --workers 8
+    python generate_ocr_corpus.py eval_corpus --pages 500 --resolutions 150,300 --no-degrade
+"""
+
+import os
+import io
+import re
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# A4纸在不同扫描分辨率下的像素尺寸
+RESOLUTIONS = {
+    100: (827, 1169),
+    150: (1240, 1754),
+    200: (1654, 2339),
+    300: (2480, 3508),
+}
+
+LAYOUTS = ('report', 'two_column', 'form', 'table')
+
+DEFAULT_OPTIONS = {
+    'seed': 42,
+    'resolutions': [100, 150, 200, 300],
+    'layouts': list(LAYOUTS),
+    'scripts': ['zh', 'en', 'mixed'],
+    'degrade': True,
+    'skew_prob': 0.5,
+    'max_skew': 3.0,
+    'blur_prob': 0.3,
+    'max_blur': 1.2,
+    'noise_prob': 0.4,
+    'max_noise': 12.0,
+    'jpeg_prob': 0.3,
+    'compress_level': 1,
+}
+
+# 候选字体: (名称, 路径, 是否包含中文字形)
+FONT_CANDIDATES = [
+    ('noto_sans_cjk', '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc', True),
+    ('noto_sans_cjk', '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc', True),
+    ('noto_serif_cjk', '/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc', True),
+    ('wqy_microhei', '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc', True),
+    ('wqy_zenhei', '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc', True),
+    ('pingfang', '/System/Library/Fonts/PingFang.ttc', True),  # macOS
+    ('simsun', 'C:/Windows/Fonts/simsun.ttc', True),  # Windows
+    ('msyh', 'C:/Windows/Fonts/msyh.ttc', True),  # Windows
+    ('dejavu_sans', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', False),
+    ('dejavu_serif', '/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf', False),
+    ('dejavu_sans_mono', '/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf', False),
+    ('liberation_sans', '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf', False),
+    ('liberation_serif', '/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf', False),
+]
+
+# 与 create_*_doc.py 相同风格的字段素材
+SURNAMES = "张王李赵刘陈杨黄周吴徐孙马朱胡郭何林高罗"
+GIVEN_CHARS = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀英华平刚桂兰"
+ENGLISH_FIRST = ["John", "Mary", "David", "Linda", "James", "Susan", "Robert", "Emily", "Michael", "Anna"]
+ENGLISH_LAST = ["Smith", "Johnson", "Brown", "Wang", "Li", "Chen", "Miller", "Davis", "Wilson", "Zhang"]
+HOSPITALS = [
+    ("北京协和医院", "Peking Union Medical College Hospital"),
+    ("北京国际医疗中心", "Beijing International Medical Center"),
+    ("上海瑞金医院", "Shanghai Ruijin Hospital"),
+    ("华西医院", "West China Hospital"),
+    ("中山大学附属第一医院", "First Affiliated Hospital of Sun Yat-sen University"),
+]
+DEPARTMENTS = [
+    ("心血管内科", "Cardiology"), ("内分泌科", "Endocrinology"), ("呼吸内科", "Respiratory Medicine"),
+    ("神经内科", "Neurology"), ("消化内科", "Gastroenterology"), ("肾内科", "Nephrology"),
+]
+DIAGNOSES = [
+    ("高血压病（2级）", "Hypertension (Stage 2)"), ("糖尿病（2型）", "Type 2 Diabetes"),
+    ("冠心病", "Coronary Heart Disease"), ("高血脂症", "Hyperlipidemia"),
+    ("慢性支气管炎", "Chronic Bronchitis"), ("慢性胃炎", "Chronic Gastritis"),
+    ("脑梗死后遗症", "Sequelae of Cerebral Infarction"), ("慢性肾病（3期）", "Chronic Kidney Disease (Stage 3)"),
+]
+DRUGS = [
+    ("厄贝沙坦片", "Irbesartan"), ("二甲双胍片", "Metformin"), ("阿司匹林肠溶片", "Aspirin"),
+    ("氨氯地平片", "Amlodipine"), ("阿托伐他汀钙片", "Atorvastatin"), ("奥美拉唑肠溶胶囊", "Omeprazole"),
+]
+DOSES = ["5mg", "10mg", "20mg", "100mg", "150mg", "500mg", "0.5g"]
+FREQUENCIES = [
+    ("每日一次", "once daily"), ("每日两次", "twice daily"), ("每日三次", "three times daily"),
+    ("睡前服用", "at bedtime"),
+]
+LAB_TESTS = [
+    ("空腹血糖", "Fasting Glucose", "mmol/L", (3.9, 11.0)),
+    ("总胆固醇", "Total Cholesterol", "mmol/L", (3.0, 7.5)),
+    ("甘油三酯", "Triglycerides", "mmol/L", (0.5, 4.0)),
+    ("血肌酐", "Creatinine", "umol/L", (45, 180)),
+    ("血红蛋白", "Hemoglobin", "g/L", (90, 170)),
+    ("白细胞计数", "WBC", "10^9/L", (3.5, 12.0)),
+]
+
+_CJK = re.compile(r'[\u3400-\u9fff\uff00-\uffef\u3000-\u303f]')
+_LATIN = re.compile(r'[A-Za-z]')
+
+
+def classify_script(text):
+    """文字类别：zh（中文）、en（英文/数字）或 mixed（中英混合）"""
+    has_cjk = bool(_CJK.search(text))
+    has_latin = bool(_LATIN.search(text))
+    if has_cjk and has_latin:
+        return 'mixed'
+    return 'zh' if has_cjk else 'en'
+
+
+# ---------------------------------------------------------------- 字体（每个进程缓存）
+
+_available_fonts = None
+_font_cache = {}
+
+
+def available_fonts():
+    """本机可用的候选字体 [(名称, 路径, 含中文字形)]，每个进程只查找一次"""
+    global _available_fonts
+    if _available_fonts is None:
+        fonts, seen = [], set()
+        for name, path, cjk in FONT_CANDIDATES:
+            if name in seen or not os.path.exists(path):
+                continue
+            try:
+                ImageFont.truetype(path, 12)
+            except OSError:
+                continue
+            fonts.append((name, path, cjk))
+            seen.add(name)
+        _available_fonts = fonts
+    return _available_fonts
+
+
+def load_font(path, size):
+    """按 (路径, 字号) 缓存字体对象；path为None时使用PIL默认字体"""
+    key = (path, size)
+    font = _font_cache.get(key)
+    if font is None:
+        if path is None:
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:
+                # Pillow < 10.1 的默认字体不支持字号
+                font = ImageFont.load_default()
+        else:
+            font = ImageFont.truetype(path, size)
+        _font_cache[key] = font
+    return font
+
+
+# ---------------------------------------------------------------- 随机内容
+
+def _chinese_name(rng):
+    return rng.choice(SURNAMES) + "".join(rng.choice(GIVEN_CHARS) for _ in range(rng.randint(1, 2)))
+
+
+def _english_name(rng):
+    return f"{rng.choice(ENGLISH_FIRST)} {rng.choice(ENGLISH_LAST)}"
+
+
+def _date(rng):
+    return f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def _id_number(rng):
+    digits = "".join(str(rng.randint(0, 9)) for _ in range(17))
+    return digits + rng.choice("0123456789X")
+
+
+def _fields(rng, script):
+    """生成一份病历的 (字段名, 中文标签, 英文标签, 中文值, 英文值) 列表"""
+    hospital = rng.choice(HOSPITALS)
+    department = rng.choice(DEPARTMENTS)
+    zh_name, en_name = _chinese_name(rng), _english_name(rng)
+    if script == 'mixed':
+        en_name = f"{en_name} ({zh_name})"
+    age = rng.randint(18, 90)
+    gender = rng.choice([("男", "Male"), ("女", "Female")])
+    date = _date(rng)
+    doctor = rng.choice(SURNAMES)
+    return [
+        ('hospital', "医院名称", "Hospital", hospital[0], hospital[1]),
+        ('department', "科室", "Department", department[0], department[1]),
+        ('patient_name', "患者姓名", "Patient Name", zh_name, en_name),
+        ('gender', "性别", "Gender", gender[0], gender[1]),
+        ('age', "年龄", "Age", f"{age}岁", f"{age} years old"),
+        ('id_number', "身份证号", "ID Number", _id_number(rng), _id_number(rng)),
+        ('visit_date', "就诊日期", "Visit Date", date, date),
+        ('doctor', "主治医师", "Doctor", f"{doctor}医生", f"Dr. {rng.choice(ENGLISH_LAST)}"),
+    ]
+
+
+def _label_value(rng, script, zh_label, en_label, zh_value, en_value):
+    if script == 'zh':
+        return f"{zh_label}：{zh_value}"
+    if script == 'en':
+        return f"{en_label}: {en_value}"
+    # 中英混合：双语标签，值随机取中文或英文
+    return f"{en_label} / {zh_label}: {rng.choice([zh_value, en_value])}"
+
+
+def _diagnosis_lines(rng, script, count):
+    lines = []
+    for i, (zh, en) in enumerate(rng.sample(DIAGNOSES, count), 1):
+        text = {'zh': zh, 'en': en, 'mixed': f"{en} / {zh}"}[script]
+        lines.append(f"{i}. {text}")
+    return lines
+
+
+def _prescription_lines(rng, script, count):
+    lines = []
+    for i, (zh, en) in enumerate(rng.sample(DRUGS, count), 1):
+        dose = rng.choice(DOSES)
+        zh_freq, en_freq = rng.choice(FREQUENCIES)
+        text = {
+            'zh': f"{zh} {dose} {zh_freq}",
+            'en': f"{en} {dose} {en_freq}",
+            'mixed': f"{en} {zh} {dose} {zh_freq}",
+        }[script]
+        lines.append(f"{i}. {text}")
+    return lines
+
+
+def _title(script):
+    return {'zh': "医疗诊断报告", 'en': "Medical Report", 'mixed': "Medical Report / 医疗报告"}[script]
+
+
+# ---------------------------------------------------------------- 版式
+
+class _PageBuilder:
+    """在页面上逐行排版，同时记录每行的真值"""
+
+    def __init__(self, width, height, font_path, font_size, rng):
+        self.width = width
+        self.height = height
+        self.rng = rng
+        self.font_path = font_path
+        self.font_size = font_size
+        self.font = load_font(font_path, font_size)
+        # 灰度页面：与扫描件一致，旋转、模糊和加噪的计算量只有RGB的三分之一
+        self.image = Image.new('L', (width, height), color=255)
+        self.draw = ImageDraw.Draw(self.image)
+        self.lines = []
+
+    def text(self, x, y, text, field, font_size=None):
+        """绘制一行文字，超出页面时返回False"""
+        font = load_font(self.font_path, font_size) if font_size else self.font
+        box = self.draw.textbbox((x, y), text, font=font)
+        if box[2] > self.width - 8 or box[3] > self.height - 8:
+            return False
+        self.draw.text((x, y), text, fill=self.rng.randint(0, 60), font=font)
+        x0, y0, x1, y1 = [int(v) for v in box]
+        self.lines.append({
+            'text': text,
+            'box': [x0, y0, x1, y1],
+            'points': [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+            'script': classify_script(text),
+            'field': field,
+            'font_size': font_size or self.font_size,
+        })
+        return True
+
+
+def _layout_report(page, rng, script, margin, line_height):
+    """单栏诊断报告：居中标题 + 字段 + 诊断 + 处方"""
+    title = _title(script)
+    title_size = int(page.font_size * 1.3)
+    title_width = page.draw.textlength(title, font=load_font(page.font_path, title_size))
+    y = margin
+    page.text(int((page.width - title_width) / 2), y, title, 'title', font_size=title_size)
+    y += int(line_height * 1.6)
+    for field, *parts in _fields(rng, script):
+        page.text(margin + rng.randint(0, margin // 4), y, _label_value(rng, script, *parts), field)
+        y += line_height
+    sections = [
+        ('diagnosis', {'zh': "临床诊断：", 'en': "Diagnosis:", 'mixed': "Diagnosis / 诊断结果:"}[script],
+         _diagnosis_lines(rng, script, rng.randint(1, 4))),
+        ('prescription', {'zh': "治疗方案：", 'en': "Prescription:", 'mixed': "Prescription / 处方:"}[script],
+         _prescription_lines(rng, script, rng.randint(1, 4))),
+    ]
+    for field, heading, lines in sections:
+        y += line_height // 2
+        page.text(margin, y, heading, 'heading')
+        y += line_height
+        for text in lines:
+            if not page.text(margin + line_height, y, text, field):
+                return
+            y += line_height
+
+
+def _layout_two_column(page, rng, script, margin, line_height):
+    """双栏病历：左栏患者信息，右栏诊断和处方"""
+    page.text(margin, margin, _title(script), 'title')
+    column_x = (margin, page.width // 2 + margin // 2)
+    y_left = y_right = margin + int(line_height * 1.6)
+    for field, zh_label, en_label, zh_value, en_value in _fields(rng, script):
+        # 每栏宽度有限，标签和值分两行
+        label = {'zh': zh_label + "：", 'en': en_label + ":", 'mixed': f"{en_label} / {zh_label}:"}[script]
+        value = zh_value if script == 'zh' else en_value
+        page.text(column_x[0], y_left, label, 'label')
+        page.text(column_x[0] + line_height, y_left + line_height, value, field)
+        y_left += 2 * line_height
+    for field, lines in (('diagnosis', _diagnosis_lines(rng, script, rng.randint(2, 4))),
+                         ('prescription', _prescription_lines(rng, script, rng.randint(2, 5)))):
+        for text in lines:
+            if page.text(column_x[1], y_right, text, field):
+                y_right += line_height
+        y_right += line_height // 2
+
+
+def _layout_form(page, rng, script, margin, line_height):
+    """字段表单：带边框的标签/值网格"""
+    page.text(margin, margin, _title(script), 'title')
+    y = margin + 2 * line_height
+    cell_height = int(line_height * 1.5)
+    label_width = (page.width - 2 * margin) // 3
+    for field, *parts in _fields(rng, script):
+        if y + cell_height > page.height - margin:
+            break
+        page.draw.rectangle([(margin, y), (page.width - margin, y + cell_height)], outline=0, width=1)
+        page.draw.line([(margin + label_width, y), (margin + label_width, y + cell_height)], fill=0, width=1)
+        zh_label, en_label, zh_value, en_value = parts
+        label = {'zh': zh_label, 'en': en_label, 'mixed': f"{en_label} {zh_label}"}[script]
+        value = zh_value if script == 'zh' else en_value
+        offset = (cell_height - line_height) // 2 + line_height // 8
+        page.text(margin + 8, y + offset, label, 'label')
+        page.text(margin + label_width + 8, y + offset, value, field)
+        y += cell_height
+    y += line_height
+    for text in _diagnosis_lines(rng, script, rng.randint(1, 3)):
+        if not page.text(margin, y, text, 'diagnosis'):
+            break
+        y += line_height
+
+
+def _layout_table(page, rng, script, margin, line_height):
+    """检验结果表格：项目 / 结果 / 单位 / 参考范围"""
+    title = {'zh': "检验报告单", 'en': "Laboratory Report", 'mixed': "Laboratory Report / 检验报告单"}[script]
+    page.text(margin, margin, title, 'title')
+    y = margin + int(line_height * 1.6)
+    for field, *parts in _fields(rng, script)[2:5]:
+        page.text(margin, y, _label_value(rng, script, *parts), field)
+        y += line_height
+    y += line_height // 2
+    headers = {'zh': ("项目", "结果", "单位", "参考范围"), 'en': ("Test", "Result", "Unit", "Range"),
+               'mixed': ("Test 项目", "Result", "Unit", "Range")}[script]
+    columns = [margin + int(fraction * (page.width - 2 * margin)) for fraction in (0, 0.45, 0.62, 0.8)]
+    for x, header in zip(columns, headers):
+        page.text(x, y, header, 'table_header')
+    y += line_height
+    page.draw.line([(margin, y - line_height // 6), (page.width - margin, y - line_height // 6)], fill=0, width=1)
+    for zh, en, unit, (low, high) in rng.sample(LAB_TESTS, rng.randint(3, len(LAB_TESTS))):
+        value = round(rng.uniform(low * 0.8, high * 1.2), 1)
+        name = {'zh': zh, 'en': en, 'mixed': f"{en} {zh}"}[script]
+        cells = (name, str(value), unit, f"{low}-{high}")
+        for x, cell, field in zip(columns, cells, ('lab_item', 'lab_value', 'lab_unit', 'lab_range')):
+            page.text(x, y, cell, field)
+        y += line_height
+
+
+LAYOUT_FUNCTIONS = {
+    'report': _layout_report,
+    'two_column': _layout_two_column,
+    'form': _layout_form,
+    'table': _layout_table,
+}
+
+
+# ---------------------------------------------------------------- 退化
+
+def _rotate_point(x, y, center, angle):
+    """与 Image.rotate(angle) 相同的坐标变换（逆时针，图像坐标y轴向下）"""
+    radians = math.radians(angle)
+    dx, dy = x - center[0], y - center[1]
+    return (center[0] + dx * math.cos(radians) + dy * math.sin(radians),
+            center[1] - dx * math.sin(radians) + dy * math.cos(radians))
+
+
+def degrade(image, lines, rng, options):
+    """按概率施加倾斜、模糊、噪声和JPEG压缩，同步更新真值坐标，返回 (图像, 退化参数)"""
+    applied = {}
+    width, height = image.size
+    if rng.random() < options['skew_prob']:
+        angle = round(rng.uniform(-options['max_skew'], options['max_skew']), 2)
+        center = (width / 2, height / 2)
+        image = image.rotate(angle, resample=Image.BILINEAR, fillcolor=255, center=center)
+        for line in lines:
+            points = [_rotate_point(x, y, center, angle) for x, y in line['points']]
+            line['points'] = [[round(x, 1), round(y, 1)] for x, y in points]
+            xs, ys = [x for x, _ in points], [y for _, y in points]
+            line['box'] = [max(0, int(min(xs))), max(0, int(min(ys))),
+                           min(width, int(math.ceil(max(xs)))), min(height, int(math.ceil(max(ys))))]
+        applied['skew'] = angle
+
+    if rng.random() < options['blur_prob']:
+        # 模糊半径随分辨率缩放，不同DPI下的视觉模糊程度一致
+        radius = round(rng.uniform(0.3, options['max_blur']) * width / RESOLUTIONS[150][0], 2)
+        image = image.filter(ImageFilter.GaussianBlur(radius))
+        applied['blur'] = radius
+
+    if rng.random() < options['noise_prob']:
+        sigma = round(rng.uniform(2, options['max_noise']), 1)
+        noise_rng = np.random.default_rng(rng.getrandbits(32))
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels += noise_rng.standard_normal(pixels.shape, dtype=np.float32) * sigma
+        # 少量椒盐噪点模拟扫描灰尘
+        speckles = noise_rng.random(pixels.shape[:2]) < 0.0005
+        pixels[speckles] = 0
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        applied['noise'] = sigma
+
+    if rng.random() < options['jpeg_prob']:
+        quality = rng.randint(30, 85)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        buffer.seek(0)
+        image = Image.open(buffer)
+        image.load()
+        applied['jpeg_quality'] = quality
+
+    return image, applied
+
+
+# ---------------------------------------------------------------- 生成
+
+def page_paths(output_dir, index):
+    """页面图像和真值JSON的路径（每1000页一个子目录，避免单目录文件过多）"""
+    directory = os.path.join(output_dir, 'pages', f"{index // 1000:03d}")
+    stem = os.path.join(directory, f"page_{index:06d}")
+    return stem + '.png', stem + '.json'
+
+
+def render_page(index, options):
+    """生成第 index 页，返回 (图像, 真值字典)；只由种子和页序号决定"""
+    rng = random.Random(f"{options['seed']}-{index}")
+    dpi = rng.choice(options['resolutions'])
+    width, height = RESOLUTIONS[dpi]
+    layout = rng.choice(options['layouts'])
+
+    fonts = available_fonts()
+    cjk_fonts = [font for font in fonts if font[2]]
+    # 没有中文字体时只生成英文页面，避免真值中出现无法显示的字符
+    scripts = options['scripts'] if cjk_fonts else [script for script in options['scripts'] if script == 'en'] or ['en']
+    script = rng.choice(scripts)
+    candidates = cjk_fonts if script != 'en' else fonts
+    font_name, font_path, _ = rng.choice(candidates) if candidates else ('pil_default', None, False)
+
+    # 字号约为 9-14pt，随分辨率缩放
+    font_size = int(rng.uniform(9, 14) * dpi / 72)
+    line_height = int(font_size * rng.uniform(1.45, 1.9))
+    margin = int(width * rng.uniform(0.05, 0.09))
+
+    page = _PageBuilder(width, height, font_path, font_size, rng)
+    LAYOUT_FUNCTIONS[layout](page, rng, script, margin, line_height)
+    image, applied = degrade(page.image, page.lines, rng, options) if options['degrade'] else (page.image, {})
+
+    truth = {
+        'id': f"page_{index:06d}",
+        'index': index,
+        'width': width,
+        'height': height,
+        'dpi': dpi,
+        'resolution': f"a4_{dpi}dpi",
+        'layout': layout,
+        'script': script,
+        'font': font_name,
+        'font_size': font_size,
+        'degradations': applied,
+        'lines': page.lines,
+    }
+    return image, truth
+
+
+def _generate_one(task):
+    """工作进程入口：生成并保存一页，返回清单条目"""
+    index, output_dir, options = task
+    image_path, truth_path = page_paths(output_dir, index)
+    if os.path.exists(truth_path):
+        with open(truth_path, 'r', encoding='utf-8') as f:
+            truth = json.load(f)
+        skipped = True
+    else:
+        image, truth = render_page(index, options)
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+        image.save(image_path, compress_level=options['compress_level'])
+        truth['image'] = os.path.relpath(image_path, output_dir)
+        # 真值最后写入并原子替换：真值存在即表示页面完整
+        temp_path = truth_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(truth, f, ensure_ascii=False)
+        os.replace(temp_path, truth_path)
+        skipped = False
+    entry = {key: truth[key] for key in ('id', 'image', 'dpi', 'resolution', 'layout', 'script', 'font')}
+    entry['truth'] = os.path.relpath(truth_path, output_dir)
+    entry['lines'] = len(truth['lines'])
+    return entry, skipped
+
+
+def generate_corpus(output_dir, pages, workers=None, chunksize=16, **options):
+    """并行生成语料并写出清单 corpus.jsonl，返回清单条目列表"""
+    options = {**DEFAULT_OPTIONS, **options}
+    config_path = os.path.join(output_dir, 'config.json')
+    os.makedirs(output_dir, exist_ok=True)
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous != json.loads(json.dumps(options)):
+            raise ValueError(f"输出目录 {output_dir} 中已有以不同参数生成的语料，请更换目录")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(options, f, ensure_ascii=False, indent=2)
+
+    workers = workers or os.cpu_count() or 1
+    tasks = ((index, output_dir, options) for index in range(pages))
+    entries, generated, start_time = [], 0, time.perf_counter()
+    if workers > 1:
+        with mp.get_context('spawn').Pool(workers) as pool:
+            results = pool.imap_unordered(_generate_one, tasks, chunksize=chunksize)
+            for done, (entry, skipped) in enumerate(results, 1):
+                entries.append(entry)
+                generated += not skipped
+                if done % 1000 == 0:
+                    print(f"⏳ 已完成 {done}/{pages} 页")
+    else:
+        for entry, skipped in map(_generate_one, tasks):
+            entries.append(entry)
+            generated += not skipped
+
+    entries.sort(key=lambda entry: entry['id'])
+    with open(os.path.join(output_dir, 'corpus.jsonl'), 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"📄 语料: {output_dir} (共 {len(entries)} 页，本次生成 {generated} 页，"
+          f"耗时 {elapsed:.1f}s，{generated / elapsed if elapsed else 0:.1f} 页/秒)")
+    return entries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="并行生成带真值标注的合成医疗文档语料")
+    parser.add_argument('output_dir', help="输出目录（页面图像、真值JSON和清单 corpus.jsonl）")
+    parser.add_argument('--pages', type=int, default=1000, help="页数")
+    parser.add_argument('--workers', type=int, default=None, help="生成进程数（默认为CPU核数）")
+    parser.add_argument('--seed', type=int, default=DEFAULT_OPTIONS['seed'], help="随机种子")
+    parser.add_argument('--resolutions', default="100,150,200,300",
+                        help=f"扫描分辨率DPI（逗号分隔，可选: {', '.join(map(str, RESOLUTIONS))}）")
+    parser.add_argument('--layouts', default=",".join(LAYOUTS), help="版式（逗号分隔）")
+    parser.add_argument('--scripts', default="zh,en,mixed", help="文字类别（逗号分隔: zh, en, mixed）")
+    parser.add_argument('--no-degrade', action='store_true', help="不施加倾斜、模糊、噪声和压缩退化")
+    parser.add_argument('--max-skew', type=float, default=DEFAULT_OPTIONS['max_skew'], help="最大倾斜角度（度）")
+    args = parser.parse_args(argv)
+
+    def split(value):
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    args.resolutions = [int(dpi) for dpi in split(args.resolutions)]
+    args.layouts = split(args.layouts)
+    args.scripts = split(args.scripts)
+    for name, values, allowed in (('分辨率', args.resolutions, RESOLUTIONS), ('版式', args.layouts, LAYOUTS),
+                                  ('文字类别', args.scripts, ('zh', 'en', 'mixed'))):
+        unknown = [value for value in values if value not in allowed]
+        if unknown or not values:
+            parser.error(f"未知的{name}: {', '.join(map(str, unknown)) or '(空)'}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fonts = available_fonts()
+    print(f"🔤 可用字体: {', '.join(name for name, _, _ in fonts) or 'PIL默认字体'}")
+    if not any(cjk for _, _, cjk in fonts) and args.scripts != ['en']:
+        print("⚠️ 未找到中文字体，只生成英文页面（可安装 fonts-noto-cjk 或 fonts-wqy-microhei）")
+
+    try:
+        generate_corpus(args.output_dir, args.pages, workers=args.workers, seed=args.seed,
+                        resolutions=args.resolutions, layouts=args.layouts, scripts=args.scripts,
+                        degrade=not args.no_degrade, max_skew=args.max_skew)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
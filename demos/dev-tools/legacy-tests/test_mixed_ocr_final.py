@@ -8,9 +8,18 @@ import warnings
 warnings.filterwarnings('ignore')
 
 import os
+import sys
+import time
+import difflib
 import pandas as pd
 from paddleocr import PaddleOCR
 
+TEST_FILES = [
+    'mixed_language_medical_doc.png',
+    'chinese_medical_document.png',
+    'sample_medical_document.png'
+]
+
 def test_mixed_language_ocr():
     """测试中英文混合OCR识别能力"""
     
@@ -21,11 +30,7 @@ def test_mixed_language_ocr():
     print("🔧 初始化PaddleOCR引擎...")
     ocr = PaddleOCR(use_angle_cls=True, lang='ch')
     
-    test_files = [
-        'mixed_language_medical_doc.png',
-        'chinese_medical_document.png', 
-        'sample_medical_document.png'
-    ]
+    test_files = TEST_FILES
     
     results_summary = []
     
@@ -187,5 +192,87 @@ def test_mixed_language_ocr():
     else:
         print("❌ 没有成功的测试结果")
 
+def run_profile(profile, test_files=TEST_FILES):
+    """用指定模型配置档识别测试文件，返回 {文件: {texts, avg_confidence, seconds}}"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'medical-ocr'))
+    from gradio_demo import MedicalOCRProcessor
+
+    # 固定子模型和预处理，只比较模型配置档本身的差异
+    processor = MedicalOCRProcessor(profile=profile, warmup=True, use_textline_orientation=True)
+    results = {}
+    for test_file in test_files:
+        if not os.path.exists(test_file):
+            print(f"⚠️ 文件不存在: {test_file}")
+            continue
+        start_time = time.perf_counter()
+        rows = processor.process_single_image(test_file)
+        seconds = time.perf_counter() - start_time
+        results[test_file] = {
+            'texts': [row['extracted_text'] for row in rows],
+            'avg_confidence': sum(row['confidence'] for row in rows) / len(rows) if rows else 0.0,
+            'seconds': seconds,
+        }
+        print(f"  {test_file}: {len(rows)} 行, {seconds:.2f}s")
+    return results
+
+def compare_profiles(profiles):
+    """以第一个配置档为基准，比较其他配置档的识别一致率、置信度差异和速度"""
+    print("🏥 模型配置档对比测试")
+    print("=" * 50)
+
+    runs = {}
+    for profile in profiles:
+        print(f"\n🔧 配置档: {profile}")
+        runs[profile] = run_profile(profile)
+
+    baseline_name = profiles[0]
+    baseline = runs[baseline_name]
+    rows = []
+    for profile in profiles[1:]:
+        for test_file, result in runs[profile].items():
+            if test_file not in baseline:
+                continue
+            reference = baseline[test_file]
+            # 以基准配置档的识别文本为参照，按字符计算一致率
+            agreement = difflib.SequenceMatcher(
+                None, "\n".join(reference['texts']), "\n".join(result['texts']), autojunk=False
+            ).ratio()
+            rows.append({
+                'file': test_file,
+                'profile': profile,
+                'lines': len(result['texts']),
+                'baseline_lines': len(reference['texts']),
+                'text_agreement': agreement,
+                'confidence_delta': result['avg_confidence'] - reference['avg_confidence'],
+                'seconds': result['seconds'],
+                'speedup': reference['seconds'] / result['seconds'] if result['seconds'] else 0.0,
+            })
+
+    print(f"\n🎯 对比结果（基准: {baseline_name}）")
+    print("=" * 50)
+    if not rows:
+        print("❌ 没有可对比的结果")
+        return
+
+    df = pd.DataFrame(rows)
+    print(df.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    df.to_csv('ocr_profile_comparison_results.csv', index=False, encoding='utf-8-sig')
+    print("\n💾 详细结果已保存到: ocr_profile_comparison_results.csv")
+
+    for profile, group in df.groupby('profile'):
+        print(f"✅ {profile}: 文本一致率 {group['text_agreement'].mean():.1%}, "
+              f"置信度变化 {group['confidence_delta'].mean():+.3f}, "
+              f"速度 x{group['speedup'].mean():.2f}")
+
 if __name__ == "__main__":
-    test_mixed_language_ocr()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="中英文混合文档识别测试")
+    parser.add_argument('--profiles', default=None,
+                        help="对比模型配置档（逗号分隔，第一项为基准），如 accurate,fast")
+    args = parser.parse_args()
+
+    if args.profiles:
+        compare_profiles([name.strip() for name in args.profiles.split(',') if name.strip()])
+    else:
+        test_mixed_language_ocr()
\ No newline at end of file
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+医疗OCR批量识别命令行工具
+遍历目录树或清单文件，按页并行识别（进程池或进程内线程），结果分片流式写入输出目录：
+- 每累计 --checkpoint-pages 页关闭当前结果分片，并在进度日志 progress.jsonl 中记录
+  该分片包含的页面和已全部完成的文件
+- 中断或崩溃后用同一命令重新运行即可续跑：已完成的文件和页面不再识别，
+  未记入进度日志的残留分片会被删除，结果中不会出现重复行
+- 运行中定期输出已完成页数和每秒页数，结束时输出置信度统计
+
+用法示例:
+    python batch_ocr.py /data/scans --output-dir ocr_out --format parquet --workers 4
+    python batch_ocr.py --manifest files.txt --output-dir ocr_out --profile fast
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ocr_documents import is_multipage_document, iter_document_pages
+from ocr_result_sink import SINK_FORMATS, open_result_sink
+from ocr_statistics import MEDIUM_CONFIDENCE, summarize_scores
+from ocr_profiles import MODEL_PROFILES
+
+# 目录遍历时识别的文件类型
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tif', '.tiff', '.pdf')
+
+JOURNAL_NAME = 'progress.jsonl'
+
+_FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def discover_inputs(paths, manifest=None, extensions=SUPPORTED_EXTENSIONS):
+    """返回 [(输入路径, 结果中的文件名)]
+
+    目录按路径排序递归遍历，文件名为相对该目录的路径（避免不同子目录的同名文件混淆）；
+    清单文件每行一个路径（相对清单所在目录，# 开头为注释）。
+    """
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(extensions):
+                        full_path = os.path.join(root, name)
+                        inputs.append((full_path, os.path.relpath(full_path, path)))
+        else:
+            inputs.append((path, os.path.basename(path)))
+
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    inputs.append((os.path.join(base_dir, line), line))
+    return inputs
+
+
+class ProgressJournal:
+    """进度日志：每行记录一个已关闭的结果分片、其中的页面和已全部完成的文件
+
+    只有写入结果分片并关闭之后才追加日志行，日志中的页面一定已经落盘。
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self.parts = []
+        self.done_pages = set()
+        self.completed_files = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的最后一行
+                    break
+                valid_bytes += len(line)
+                self._apply(entry)
+        if valid_bytes < os.path.getsize(self.path):
+            print(f"⚠️ 进度日志末尾不完整，已截断到最后一个完整检查点: {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+    def _apply(self, entry):
+        if entry.get('part'):
+            self.parts.append(entry['part'])
+        self.done_pages.update((file_key, page) for file_key, page in entry['pages'])
+        self.completed_files.update(entry['completed'])
+
+    def commit(self, part, rows, pages, completed):
+        """追加一个检查点并同步到磁盘"""
+        entry = {'part': part, 'rows': rows, 'pages': pages, 'completed': completed,
+                 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(entry)
+
+
+class CheckpointWriter:
+    """按检查点分片写出结果：results-00000.csv, results-00001.csv, ..."""
+
+    def __init__(self, output_dir, journal, format='csv', checkpoint_pages=200):
+        self.output_dir = output_dir
+        self.journal = journal
+        self.format = format
+        self.checkpoint_pages = int(checkpoint_pages)
+
+        # 删除上次运行中未记入进度日志的残留分片（可能不完整，其中的页面会重新识别）
+        extension = _FORMAT_EXTENSIONS[format]
+        pattern = re.compile(r'^results-(\d{5})' + re.escape(extension) + '$')
+        committed = set(journal.parts)
+        indices = [-1]
+        for name in sorted(os.listdir(output_dir)):
+            match = pattern.match(name)
+            if not match:
+                continue
+            if name in committed:
+                indices.append(int(match.group(1)))
+            else:
+                print(f"🗑️ 删除未完成的结果分片: {name}")
+                os.remove(os.path.join(output_dir, name))
+        self._next_index = max(indices) + 1
+
+        self._sink = None
+        self._part = None
+        self._pages = []
+        self._completed = []
+
+    def write_page(self, file_key, file_name, page_number, items, elapsed_ms):
+        if self._sink is None:
+            self._part = f"results-{self._next_index:05d}{_FORMAT_EXTENSIONS[self.format]}"
+            self._next_index += 1
+            self._sink = open_result_sink(os.path.join(self.output_dir, self._part), self.format)
+        self._sink.write_page(file_name, page_number, items, elapsed_ms)
+        self._pages.append([file_key, page_number])
+        if len(self._pages) >= self.checkpoint_pages:
+            self.checkpoint()
+
+    def complete_file(self, file_key):
+        self._completed.append(file_key)
+
+    def checkpoint(self):
+        """关闭当前分片并记录检查点"""
+        if not self._pages and not self._completed:
+            return
+        part, rows = None, 0
+        if self._sink is not None:
+            self._sink.close()
+            part, rows = self._part, self._sink.rows_written
+        self.journal.commit(part, rows, self._pages, self._completed)
+        self._sink = None
+        self._pages = []
+        self._completed = []
+
+
+class BatchProgress:
+    """吞吐统计：已完成页数、每秒页数，以及整体和按文件分组的置信度"""
+
+    def __init__(self, report_interval=10.0):
+        self.report_interval = report_interval
+        self.pages = 0
+        self.lines = 0
+        self.files_done = 0
+        self.files_skipped = 0
+        self.failed = []
+        self._scores = []
+        self._page_files = []
+        self._start = time.perf_counter()
+        self._last_report = self._start
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+    def page_done(self, items, file_name=None):
+        self.pages += 1
+        self.lines += len(items)
+        self._scores.append(np.fromiter((item['confidence'] for item in items), dtype=np.float64, count=len(items)))
+        self._page_files.append(file_name)
+        now = time.perf_counter()
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            print(f"📊 已完成 {self.pages} 页 / {self.files_done} 个文件, "
+                  f"{self.pages_per_second:.2f} 页/秒, 已用时 {self.elapsed:.0f}s")
+
+    def confidence_stats(self):
+        """返回 (整体置信度统计, {文件名: 每文件统计字典})"""
+        if not self._scores:
+            return summarize_scores([], [])
+        line_counts = [len(scores) for scores in self._scores]
+        file_names = np.repeat(np.array(self._page_files, dtype=object), line_counts)
+        return summarize_scores(np.concatenate(self._scores), file_names)
+
+    def to_dict(self, confidence_stats=None):
+        """可序列化的汇总；confidence_stats 为已算出的 confidence_stats() 结果，避免重复计算"""
+        overall, per_file = confidence_stats or self.confidence_stats()
+        return {
+            'pages': self.pages,
+            'lines': self.lines,
+            'files_done': self.files_done,
+            'files_skipped': self.files_skipped,
+            'failed': self.failed,
+            'elapsed_seconds': round(self.elapsed, 2),
+            'pages_per_second': round(self.pages_per_second, 3),
+            'confidence': overall.to_dict(),
+            'files': per_file,
+        }
+
+
+def _extract_timed(processor, item):
+    """进程内识别单张图像（路径或RGB数组），返回 (识别行字典列表, 耗时ms)；识别失败时抛出异常"""
+    start_time = time.perf_counter()
+    if isinstance(item, np.ndarray):
+        items = processor.extract_text_from_array(item, raise_errors=True)
+    else:
+        items = processor.extract_text_from_image(item, raise_errors=True)
+    return items, (time.perf_counter() - start_time) * 1000
+
+
+def run_batch(inputs, submit, writer, journal, progress, max_pending=8, dpi=200):
+    """按输入顺序提交页面识别任务，按提交顺序写出结果，在途任务数不超过 max_pending
+
+    submit(图像路径或RGB数组) -> Future[(识别行字典列表, 耗时ms)]；识别失败时 Future 抛出异常，
+    该页计入失败列表且不记入检查点，所在文件不标记为完成，下次运行时重试。
+    """
+    pending = deque()
+    failed_files = set()
+
+    def consume(entry):
+        kind, file_key, file_name, page_number, future = entry
+        if kind == 'done':
+            if file_key not in failed_files:
+                writer.complete_file(file_key)
+                progress.files_done += 1
+            return
+        try:
+            items, elapsed_ms = future.result()
+        except Exception as e:
+            # 识别失败的页面不记入进度，下次运行时重试
+            failed_files.add(file_key)
+            progress.failed.append({'file': file_name, 'page': page_number, 'error': str(e)})
+            print(f"❌ 识别失败: {file_name} 第 {page_number or 1} 页 ({e})")
+            return
+        writer.write_page(file_key, file_name, page_number, items, elapsed_ms)
+        progress.page_done(items, file_name)
+
+    def drain(limit):
+        while len(pending) > limit:
+            consume(pending.popleft())
+
+    try:
+        for path, file_name in inputs:
+            file_key = os.path.abspath(path)
+            if file_key in journal.completed_files:
+                progress.files_skipped += 1
+                continue
+            try:
+                if is_multipage_document(path):
+                    for page_number, image in iter_document_pages(path, dpi=dpi):
+                        if (file_key, page_number) not in journal.done_pages:
+                            pending.append(('page', file_key, file_name, page_number, submit(image)))
+                            drain(max_pending)
+                elif (file_key, None) not in journal.done_pages:
+                    pending.append(('page', file_key, file_name, None, submit(path)))
+            except Exception as e:
+                failed_files.add(file_key)
+                progress.failed.append({'file': file_name, 'page': None, 'error': str(e)})
+                print(f"❌ 文档读取失败: {file_name} ({e})")
+            pending.append(('done', file_key, file_name, None, None))
+            drain(max_pending)
+        drain(0)
+    finally:
+        # 中断时未完成的任务直接丢弃，已写出的页面记入检查点
+        for entry in pending:
+            if entry[4] is not None:
+                entry[4].cancel()
+        writer.checkpoint()
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="医疗OCR批量识别（可断点续跑）")
+    parser.add_argument('inputs', nargs='*', help="输入目录或文件")
+    parser.add_argument('--manifest', default=None, help="清单文件（每行一个路径）")
+    parser.add_argument('--output-dir', required=True, help="输出目录（结果分片、进度日志和统计）")
+    parser.add_argument('--format', choices=list(SINK_FORMATS), default='csv', help="结果格式")
+    parser.add_argument('--restart', action='store_true', help="忽略已有进度，从头开始")
+    parser.add_argument('--checkpoint-pages', type=int, default=200, help="每个检查点（结果分片）的页数")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="OCR工作进程数（0表示在本进程中识别）")
+    parser.add_argument('--threads-per-worker', type=int, default=None, help="每个工作进程的推理线程数")
+    parser.add_argument('--threads', type=int, default=2,
+                        help="本进程识别时的并行线程数（预处理并行，推理串行）")
+    parser.add_argument('--dpi', type=int, default=200, help="PDF页面栅格化分辨率")
+    parser.add_argument('--lang', default='ch', help="识别语言")
+    parser.add_argument('--profile', choices=list(MODEL_PROFILES), default='accurate', help="模型配置档")
+    parser.add_argument('--model-dir', default=None, help="本地模型缓存目录")
+    parser.add_argument('--preprocess', default="none",
+                        help="自适应预处理阶段（逗号分隔，如 reject_blank,contrast,deskew,rescale；默认不启用）")
+    parser.add_argument('--tile-size', type=int, default=None, help="大图分块识别的分块边长")
+    parser.add_argument('--tile-workers', type=int, default=0,
+                        help="本进程识别时分块并行识别的工作进程数（需配合 --tile-size）")
+    parser.add_argument('--report-interval', type=float, default=10.0, help="进度输出间隔(秒)")
+    parser.add_argument('--verbose', action='store_true', help="输出逐页处理日志")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数：返回进程退出码（有失败的页面时为1）"""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    inputs = discover_inputs(args.inputs, args.manifest)
+    if not inputs:
+        print("❌ 没有找到待识别的文件")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    journal_path = os.path.join(args.output_dir, JOURNAL_NAME)
+    if args.restart and os.path.exists(journal_path):
+        os.remove(journal_path)
+    journal = ProgressJournal(args.output_dir)
+    writer = CheckpointWriter(args.output_dir, journal, format=args.format, checkpoint_pages=args.checkpoint_pages)
+    if journal.completed_files or journal.done_pages:
+        print(f"♻️ 续跑: 已完成 {len(journal.completed_files)} 个文件 / {len(journal.done_pages)} 页")
+    remaining = sum(os.path.abspath(path) not in journal.completed_files for path, _ in inputs)
+    if not remaining:
+        print("✅ 全部文件均已完成，无需识别（使用 --restart 重新开始）")
+        return 0
+    print(f"📂 待处理文件: {remaining} / {len(inputs)} 个")
+
+    processor_kwargs = {
+        'lang': args.lang,
+        'profile': args.profile,
+        'model_dir': args.model_dir,
+        'warmup': True,
+        'preprocessing': None if args.preprocess.lower() == 'none' else args.preprocess,
+        'tile_size': args.tile_size,
+    }
+
+    pool = executor = tile_pool = None
+    if args.tile_workers > 0 and (args.workers > 0 or not args.tile_size):
+        print("⚠️ --tile-workers 只在本进程识别（--workers 0）且设置了 --tile-size 时生效，忽略该选项")
+    if args.workers > 0:
+        from ocr_worker_pool import OCRWorkerPool
+        pool = OCRWorkerPool(num_workers=args.workers, threads_per_worker=args.threads_per_worker,
+                             **processor_kwargs).start()
+        submit, max_pending = pool.submit_extract, pool.max_pending
+    else:
+        from gradio_demo import MedicalOCRProcessor
+        if args.tile_workers > 0 and args.tile_size:
+            # 大幅面页面的各分块分发到工作进程并行识别，单页延迟随核数下降
+            from ocr_worker_pool import OCRWorkerPool
+            tile_pool = OCRWorkerPool(num_workers=args.tile_workers, threads_per_worker=args.threads_per_worker,
+                                      **processor_kwargs).start()
+            processor_kwargs['tile_runner'] = tile_pool.run_tiles
+        processor = MedicalOCRProcessor(**processor_kwargs)
+        executor = ThreadPoolExecutor(max_workers=args.threads, thread_name_prefix="batch-ocr")
+
+        def submit(item):
+            return executor.submit(_extract_timed, processor, item)
+        max_pending = 2 * args.threads
+
+    progress = BatchProgress(report_interval=args.report_interval)
+    try:
+        run_batch(inputs, submit, writer, journal, progress, max_pending=max_pending, dpi=args.dpi)
+    except KeyboardInterrupt:
+        print("🛑 已中断，已完成的页面已记入检查点，重新运行同一命令即可续跑")
+    finally:
+        for worker_pool in (pool, tile_pool):
+            if worker_pool is not None:
+                worker_pool.close()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    overall, per_file = stats = progress.confidence_stats()
+    summary = progress.to_dict(stats)
+    with open(os.path.join(args.output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print("\n🎯 批量识别完成")
+    print(f"• 本次识别: {progress.pages} 页, {progress.files_done} 个文件, {progress.lines} 行")
+    print(f"• 跳过已完成文件: {progress.files_skipped} 个")
+    print(f"• 耗时: {progress.elapsed:.1f}s, 吞吐: {progress.pages_per_second:.2f} 页/秒")
+    if progress.failed:
+        print(f"• ❌ 失败: {len(progress.failed)} 项（重新运行时重试）")
+    print(overall.render())
+    low_quality = sorted(name for name, stats in per_file.items() if stats['mean'] <= MEDIUM_CONFIDENCE)
+    if low_quality:
+        print(f"• ⚠️ 平均置信度偏低的文件: {len(low_quality)} 个（见 summary.json 的 files）")
+    print(f"💾 结果目录: {args.output_dir}")
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,456 +10,929 @@ warnings.filterwarnings("ignore")
 
 import os
 import sys
+import time
+import json
+import uuid
+import logging
+import threading
+from itertools import islice
 import numpy as np
 from PIL import Image as PILImage
-import pandas as pd
-import gradio as gr
 
 # 添加项目路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import ocr_tracing as tracing  # noqa: E402
+import ocr_metrics as metrics  # noqa: E402
+from ocr_result_cache import OCRResultCache  # noqa: E402
+from ocr_documents import is_multipage_document, iter_document_pages, prefetch  # noqa: E402
+from ocr_result_sink import CSVResultSink  # noqa: E402
+from ocr_statistics import ConfidenceStats, log_batch_summary, render_result_lines  # noqa: E402
+from ocr_preprocessing import PreprocessingPipeline  # noqa: E402
+from ocr_orientation import SUBMODEL_OPTIONS, PageOrientationProbe  # noqa: E402
+from ocr_templates import get_template  # noqa: E402
+from ocr_model_registry import ModelRegistry  # noqa: E402
+from ocr_profiles import MODEL_PROFILES, profile_kwargs  # noqa: E402
+from ocr_tiling import merge_tile_pages, split_tiles  # noqa: E402
+from ocr_serving import AsyncOCRService, OCRServiceOverloaded, OCRServiceTimeout  # noqa: E402
+from ocr_result_adapters import (  # noqa: E402
+    RESULT_ADAPTERS,
+    OCRResultFormatError,
+    detect_adapter,
+    detect_adapter_from_page,
+)
+
+# 上传结果目录：每个请求独立的CSV文件，过期后自动清理
+UPLOAD_RESULTS_DIR = os.path.join('assets', 'results', 'uploads')
+UPLOAD_RESULTS_MAX_AGE = 3600  # 秒
+
+# 子模型开关 -> (引擎初始化参数, 提示名称, 降级原因)；初始化参数为 False 时该子模型未加载
+_SUBMODEL_ENGINE_KEYS = {
+    'use_textline_orientation': ('use_angle_cls', "逐行方向分类器", 'textline_unavailable'),
+    'use_doc_orientation_classify': ('use_doc_orientation_classify', "文档方向分类模型", 'doc_orientation_unavailable'),
+    'use_doc_unwarping': ('use_doc_unwarping', "文档弯曲矫正模型", 'doc_unwarping_unavailable'),
+}
 
 
 class MedicalOCRProcessor:
     """医疗OCR处理器"""
     
-    def __init__(self):
-        """初始化医疗OCR处理器"""
+    def __init__(self, lang='ch', cpu_threads=None, model_dir=None, warmup=False,
+                 result_cache=None, tile_size=None, tile_overlap=160, tile_runner=None,
+                 document_dpi=200, preprocessing=None, use_textline_orientation='auto',
+                 use_doc_orientation_classify=None, use_doc_unwarping=None, template=None,
+                 profile='accurate', **engine_kwargs):
+        """初始化医疗OCR处理器
+
+        Args:
+            lang: PaddleOCR识别语言
+            cpu_threads: CPU推理线程数（多进程部署时用于限制每个进程的线程数）
+            model_dir: 本地模型缓存目录，设置后从该目录加载模型并跳过模型源联网检查
+            warmup: 初始化完成后执行一次合成图像推理，提前完成模型首次编译
+            result_cache: OCRResultCache实例，按图像内容复用识别结果
+            tile_size: 启用分块识别的分块边长；超过该尺寸的页面不再缩小到2048px，
+                而是切成带重叠的分块识别后合并（None表示禁用）
+            tile_overlap: 相邻分块的重叠像素，应大于最长被截断文字的宽度
+            tile_runner: 分块推理函数 (BGR分块列表, 推理参数) -> OCRPage列表，
+                例如 OCRWorkerPool.run_tiles 可把分块分发到多个进程；默认在本进程批量推理
+            document_dpi: PDF页面栅格化分辨率
+            preprocessing: 自适应预处理阶段，PreprocessingPipeline 实例、阶段名列表或
+                逗号分隔字符串（如 "reject_blank,contrast,deskew,rescale"）；None表示不启用
+            use_textline_orientation: 逐行文字方向分类，True/False 或 'auto'（先做一次页面级
+                方向探测，页面方向可信时旋转为正向并跳过逐行分类）
+            use_doc_orientation_classify: 文档方向分类，None表示使用引擎默认值
+            use_doc_unwarping: 文档弯曲矫正，None表示使用引擎默认值
+                以上三项可在每次请求中通过 submodels 参数覆盖（仅能开启初始化时已加载的子模型）
+            template: 默认表单模板（名称、JSON路径或 FormTemplate），供 process_form 使用
+            profile: 模型配置档，'accurate'（默认模型）或 'fast'（mobile模型 + 较低检测分辨率，
+                适合纯CPU部署），显式传入的 engine_kwargs 优先
+            **engine_kwargs: 其他透传给PaddleOCR的初始化参数
+        """
         print("🏥 初始化医疗OCR处理器...")
+        start_time = time.perf_counter()
         
-        # 检查GPU可用性
-        try:
-            import torch
-            use_gpu = torch.cuda.is_available()
-            gpu_info = f"GPU可用: {use_gpu}"
-            if use_gpu:
-                gpu_info += f" (设备: {torch.cuda.get_device_name(0)})"
-            print(f"⚡ {gpu_info}")
-        except ImportError:
-            use_gpu = False
-            print("ℹ️ PyTorch未安装，使用CPU模式")
+        # 本地模型缓存：必须在导入paddleocr之前设置
+        model_dir = model_dir or os.environ.get('MEDICAL_OCR_MODEL_DIR')
+        if model_dir:
+            os.environ['PADDLE_PDX_CACHE_HOME'] = os.path.abspath(os.path.expanduser(model_dir))
+            os.environ.setdefault('PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK', 'True')
+            print(f"📦 使用本地模型缓存: {os.environ['PADDLE_PDX_CACHE_HOME']}")
         
         # 初始化PaddleOCR，使用兼容的配置
         try:
             from paddleocr import PaddleOCR
             
             # 使用兼容的参数初始化PaddleOCR (v3.1.1)
-            self.ocr = PaddleOCR(use_angle_cls=True, lang='ch')
-            print("✅ 使用兼容参数初始化OCR引擎")
+            # 'auto' 模式仍加载逐行方向分类器，供方向不确定的页面使用
+            ocr_kwargs = {'use_angle_cls': use_textline_orientation is not False, 'lang': lang}
+            if use_textline_orientation == 'auto' and use_doc_orientation_classify is None:
+                # 页面级方向探测已替代文档方向分类
+                use_doc_orientation_classify = False
+            if use_doc_orientation_classify is not None:
+                ocr_kwargs['use_doc_orientation_classify'] = bool(use_doc_orientation_classify)
+            if use_doc_unwarping is not None:
+                ocr_kwargs['use_doc_unwarping'] = bool(use_doc_unwarping)
+            if cpu_threads is not None:
+                ocr_kwargs['cpu_threads'] = int(cpu_threads)
+            # 配置档参数按已安装的PaddleOCR版本选择
+            paddleocr_version = getattr(sys.modules.get('paddleocr'), '__version__', None)
+            ocr_kwargs.update(profile_kwargs(profile, paddleocr_version, lang))
+            ocr_kwargs.update(engine_kwargs)
+            self.ocr = PaddleOCR(**ocr_kwargs)
+            self.engine_config = ocr_kwargs
+            self.profile = profile
+            print(f"✅ 使用兼容参数初始化OCR引擎 (配置档: {profile})")
         except Exception as e:
             print(f"❌ OCR初始化失败: {e}")
             self.ocr = None
             raise RuntimeError(f"PaddleOCR初始化失败: {e}")
         
-        print("✅ OCR引擎初始化完成")
+        # 检查GPU可用性（使用已随PaddleOCR加载的paddle，不再为探测导入torch）
+        print(f"⚡ 推理设备: {self._detect_device()}")
+        
+        # 初始化时确定推理方法：v3.x 使用 predict，v2.x 仅提供 ocr
+        self.infer_method, self._infer = self._resolve_infer_method()
+        print(f"🧠 OCR推理方法: {self.infer_method}")
+        
+        # 按已安装的PaddleOCR版本选定结果适配器，无法判断时由第一页结果决定
+        self.result_format = detect_adapter(getattr(sys.modules.get('paddleocr'), '__version__', None)) or 'ocr_result'
+        print(f"🧩 OCR结果适配器: {self.result_format}")
+        
+        # PaddleOCR推理引擎不保证线程安全，并发请求串行访问同一引擎
+        self._ocr_lock = threading.Lock()
+        
+        # 子模型开关（处理器默认值，可按请求覆盖）
+        self.submodels = {
+            'use_textline_orientation': use_textline_orientation,
+            'use_doc_orientation_classify': use_doc_orientation_classify,
+            'use_doc_unwarping': use_doc_unwarping,
+        }
+        self.orientation_probe = None
+        if use_textline_orientation == 'auto':
+            self.orientation_probe = PageOrientationProbe()
+            if not self.orientation_probe.available:
+                self.submodels['use_textline_orientation'] = True
+        print(f"🧭 文本行方向分类: {self.submodels['use_textline_orientation']}")
+        
+        # 表单模板模式：独立的文字识别模型在首次使用时加载
+        self.template = get_template(template) if template else None
+        self._text_recognizer = None
+        
+        # 分块识别配置
+        self.tile_size = int(tile_size) if tile_size else None
+        self.tile_overlap = int(tile_overlap)
+        self.tile_runner = tile_runner
+        self.document_dpi = int(document_dpi)
+        
+        # 自适应预处理：缩放阶段不超过整图尺寸上限（分块模式不限制）
+        if preprocessing and not isinstance(preprocessing, PreprocessingPipeline):
+            preprocessing = PreprocessingPipeline(preprocessing, max_side=None if self.tile_size else 2048)
+        self.preprocessing = preprocessing or None
+        if self.preprocessing:
+            print(f"🧹 自适应预处理: {', '.join(self.preprocessing.stages)}")
+        if self.tile_size:
+            print(f"🧱 大图分块识别: 分块 {self.tile_size}px, 重叠 {self.tile_overlap}px")
+        
+        # 结果缓存键包含引擎配置，配置变化后旧结果自然失效
+        self.result_cache = result_cache
+        self._config_fingerprint = json.dumps(
+            {'engine': self.engine_config, 'format': self.result_format,
+             'tiling': [self.tile_size, self.tile_overlap]},
+            sort_keys=True, default=str
+        )
+        
+        if warmup:
+            self.warmup()
+        
+        print(f"✅ OCR引擎初始化完成 (耗时 {time.perf_counter() - start_time:.1f}s)")
     
-    def _preprocess_image(self, image_path):
-        """预处理图像，确保格式和质量适合OCR"""
+    def _detect_device(self):
+        """返回当前推理设备描述"""
         try:
-            # 打开并验证图像
-            with PILImage.open(image_path) as img:
-                print(f"📊 原始图像信息: 尺寸={img.size}, 模式={img.mode}")
-                
-                # 转换为RGB格式（如果不是的话）
-                if img.mode != 'RGB':
-                    print(f"🔄 转换图像模式: {img.mode} -> RGB")
-                    img = img.convert('RGB')
-                
-                # 检查图像尺寸，如果过大则适当缩小
-                max_size = 2048
-                if max(img.size) > max_size:
-                    print(f"🔄 调整图像尺寸: {img.size}")
-                    ratio = max_size / max(img.size)
-                    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                    img = img.resize(new_size, PILImage.Resampling.LANCZOS)
-                    print(f"✅ 新尺寸: {img.size}")
-                
-                # 保存预处理后的图像
-                processed_path = image_path.replace('.png', '_processed.png').replace('.jpg', '_processed.jpg').replace('.jpeg', '_processed.jpg')
-                if processed_path == image_path:
-                    processed_path = image_path.replace('.', '_processed.')
-                
-                img.save(processed_path, quality=95, optimize=False)
-                print(f"💾 预处理图像已保存: {processed_path}")
-                
-                return processed_path
-                
-        except Exception as e:
-            print(f"⚠️ 图像预处理失败: {e}，使用原始图像")
-            return image_path
+            import paddle
+            return paddle.device.get_device()
+        except Exception:
+            return "cpu"
     
-    def _parse_ocr_result(self, result):
-        """解析OCR结果 - 兼容多种PaddleOCR返回格式 - v1.3.17"""
-        print(f"🔍 [DEBUG] _parse_ocr_result 开始解析，输入类型: {type(result)}")
+    def warmup(self):
+        """使用合成文档图像执行一次推理，触发检测和识别模型的首次编译"""
+        from PIL import ImageDraw
         
-        extracted_texts = []
+        canvas = PILImage.new('RGB', (640, 160), color='white')
+        draw = ImageDraw.Draw(canvas)
+        draw.text((20, 30), "Medical OCR warmup 2025-08-17", fill='black')
+        draw.text((20, 90), "Dose: 10mg  ID: 110101", fill='black')
+        
+        start_time = time.perf_counter()
         try:
-            # 详细的输入验证和调试
-            if not result:
-                print("❌ [DEBUG] result为None或空")
-                return []
-            
-            if not isinstance(result, list):
-                print(f"❌ [DEBUG] result不是列表类型，实际类型: {type(result)}")
-                return []
+            # 绕过结果缓存：缓存命中时不会调用推理，达不到预热目的
+            self._extract_from_array(np.asarray(canvas), use_cache=False)
+            print(f"🔥 模型预热完成 (耗时 {time.perf_counter() - start_time:.1f}s)")
+        except Exception as e:
+            # 预热失败不影响服务，首个请求仍会正常触发编译
+            print(f"⚠️ 模型预热失败: {e}")
+    
+    def _resolve_infer_method(self):
+        """返回引擎可用的推理方法 (名称, 可调用对象)，只在初始化时调用一次"""
+        predict = getattr(self.ocr, 'predict', None)
+        if callable(predict):
+            return 'predict', predict
+        return 'ocr', self.ocr.ocr
+    
+    def _load_image(self, image_path):
+        """读取图像文件为RGB（或灰度）数组视图（仅解码一次，不再写回磁盘）"""
+        with tracing.span("decode"), PILImage.open(image_path) as img:
+            tracing.debug("📊 原始图像信息: 尺寸=%s, 模式=%s", img.size, img.mode)
+            return self._normalize_array(pil_to_array(img))
+    
+    def _normalize_array(self, image):
+        """校验内存中图像数组的布局，返回RGB或灰度视图（不复制数据）
+
+        透明通道通过切片丢弃，数据类型保持不变，统一在 _to_engine_layout 中一次性转换。
+        """
+        if image.ndim == 3 and image.shape[2] == 1:
+            image = image[:, :, 0]
+        elif image.ndim == 3 and image.shape[2] == 4:
+            # RGBA格式，丢弃透明通道
+            image = image[:, :, :3]
+        
+        if image.ndim != 2 and (image.ndim != 3 or image.shape[2] != 3):
+            raise ValueError(f"不支持的图像形状: {image.shape}")
+        
+        return image
+    
+    def _pixel_scale(self, image):
+        """转换为uint8时的缩放系数；uint8图像无需转换时返回None"""
+        if image.dtype == np.uint8:
+            return None
+        if np.issubdtype(image.dtype, np.floating):
+            # 抽样判断取值范围 (0-1 或 0-255)，不扫描整幅图像
+            step = max(1, int((image.shape[0] * image.shape[1] / 65536) ** 0.5))
+            return 255.0 if image[::step, ::step].max() <= 1.0 else 1.0
+        if image.dtype == np.uint16:
+            return 1 / 257
+        return 1.0
+    
+    def _to_engine_layout(self, image):
+        """将RGB/灰度视图一次复制为连续的BGR uint8数组
+
+        通道翻转、灰度扩展和类型转换写入同一个输出数组，不产生浮点中间数组。
+        """
+        height, width = image.shape[:2]
+        source = image[:, :, None] if image.ndim == 2 else image[:, :, ::-1]
+        output = np.empty((height, width, 3), dtype=np.uint8)
+        scale = self._pixel_scale(image)
+        if scale is None:
+            np.copyto(output, source)
+        else:
+            np.multiply(source, scale, out=output, casting='unsafe')
+        return output
+    
+    def _preprocess_array(self, image):
+        """预处理内存中的RGB（或灰度）图像视图，返回适合PaddleOCR的BGR数组"""
+        with tracing.span("preprocess"):
+            # PaddleOCR按OpenCV约定接收BGR数组
+            image = self._to_engine_layout(image)
             
-            if len(result) == 0:
-                print("❌ [DEBUG] result列表为空")
-                return []
+            # 检查图像尺寸，如果过大则适当缩小（分块模式保留原始分辨率）
+            max_size = 2048
+            height, width = image.shape[:2]
+            if not self.tile_size and max(height, width) > max_size:
+                ratio = max_size / max(height, width)
+                new_size = (int(width * ratio), int(height * ratio))
+                # 缩放对各通道独立进行，可直接作用于BGR数组
+                image = np.asarray(PILImage.fromarray(image).resize(new_size, PILImage.Resampling.LANCZOS))
+                tracing.debug("🔄 调整图像尺寸: %dx%d -> %dx%d", width, height, new_size[0], new_size[1])
             
-            page_result = result[0]
-            print(f"🔍 [DEBUG] 第一页结果类型: {type(page_result)}")
-            print(f"🔍 [DEBUG] 第一页结果长度: {len(page_result) if hasattr(page_result, '__len__') else 'N/A'}")
-
-            # 新版 PaddleOCR v3.1.1+ (返回带 .json 属性的 OCRResult 对象)
-            if hasattr(page_result, 'json'):
-                print("✅ [DEBUG] 检测到PaddleOCR v3.1.1+ OCRResult对象格式")
-                json_result = page_result.json
-                print(f"🔍 [DEBUG] json_result类型: {type(json_result)}")
-                
-                if isinstance(json_result, dict):
-                    print(f"🔍 [DEBUG] json_result键: {list(json_result.keys())}")
-                    
-                    if 'res' in json_result:
-                        res_data = json_result['res']
-                        print(f"🔍 [DEBUG] res_data类型: {type(res_data)}")
-                        print(f"🔍 [DEBUG] res_data键: {list(res_data.keys()) if isinstance(res_data, dict) else 'not dict'}")
-                        
-                        if res_data and 'rec_texts' in res_data and 'rec_scores' in res_data:
-                            texts, scores = res_data['rec_texts'], res_data['rec_scores']
-                            print(f"📊 [DEBUG] 识别到文本数量: {len(texts) if texts else 0}")
-                            print(f"📊 [DEBUG] 置信度数量: {len(scores) if scores else 0}")
-                            
-                            if texts and scores:
-                                print(f"🔍 [DEBUG] 前3个文本: {texts[:3] if len(texts) >= 3 else texts}")
-                                for i, (text, score) in enumerate(zip(texts, scores)):
-                                    if text and text.strip():
-                                        extracted_texts.append({'text': text.strip(), 'confidence': float(score)})
-                                        if i < 3:  # 只打印前3个
-                                            print(f"✅ [DEBUG] 提取文本 {i+1}: {text.strip()[:30]}... (置信度: {score:.3f})")
-                                        
-                                print(f"✅ [DEBUG] OCRResult对象格式处理完成，提取了{len(extracted_texts)}个文本")
-                                return extracted_texts
-                        else:
-                            print("❌ [DEBUG] res_data中缺少rec_texts或rec_scores")
-                    else:
-                        print("❌ [DEBUG] json_result中缺少res键")
-                else:
-                    print(f"❌ [DEBUG] json_result不是字典类型: {type(json_result)}")
-                        
-            # 兼容直接返回字典列表的格式
-            elif isinstance(page_result, list) and page_result and isinstance(page_result[0], dict) and 'text' in page_result[0]:
-                print("✅ [DEBUG] 检测到字典列表格式")
-                for i, line in enumerate(page_result):
-                    text, confidence = line.get('text', ''), line.get('confidence', 0.0)
-                    if text.strip():
-                        extracted_texts.append({'text': text.strip(), 'confidence': float(confidence)})
-                        if i < 3:
-                            print(f"✅ [DEBUG] 字典格式文本 {i+1}: {text.strip()[:30]}... (置信度: {confidence:.3f})")
-                            
-                print(f"✅ [DEBUG] 字典列表格式处理完成，提取了{len(extracted_texts)}个文本")
-                return extracted_texts
-
-            # 兼容旧版 PaddleOCR (返回包含元组的列表)
-            elif isinstance(page_result, list):
-                print("✅ [DEBUG] 检测到传统列表格式")
-                print(f"🔍 [DEBUG] 列表长度: {len(page_result)}")
-                
-                for i, line_result in enumerate(page_result):
-                    print(f"🔍 [DEBUG] 第{i+1}行结果类型: {type(line_result)}, 长度: {len(line_result) if hasattr(line_result, '__len__') else 'N/A'}")
-                    
-                    if (line_result and len(line_result) >= 2 and
-                        line_result[1] and len(line_result[1]) >= 2):
-                        text, confidence = line_result[1]
-                        if text and text.strip():
-                            extracted_texts.append({'text': text.strip(), 'confidence': float(confidence)})
-                            if i < 3:
-                                print(f"✅ [DEBUG] 传统格式文本 {i+1}: {text.strip()[:30]}... (置信度: {confidence:.3f})")
-                    else:
-                        print(f"⚠️ [DEBUG] 第{i+1}行格式不符合预期")
-                        
-                print(f"✅ [DEBUG] 传统列表格式处理完成，提取了{len(extracted_texts)}个文本")
-                return extracted_texts
+            # 自适应预处理；判定为不可识别时返回None，调用方跳过推理
+            if self.preprocessing:
+                image = self.preprocessing.run(image)
+                if image is None:
+                    metrics.REJECTED_IMAGES.inc()
             
-            else:
-                print(f"❌ [DEBUG] 未知的OCR结果格式: {type(page_result)}")
-                print(f"🔍 [DEBUG] page_result详情: {str(page_result)[:200]}...")
-                self._debug_result_structure(result)
-
-        except Exception as e:
-            print(f"❌ [DEBUG] 结果解析异常: {e}")
-            import traceback
-            print(f"🔍 [DEBUG] 详细错误: {traceback.format_exc()}")
-        
-        print(f"⚠️ [DEBUG] _parse_ocr_result 结束，最终提取了{len(extracted_texts)}个文本")
-        return extracted_texts
+            return image
     
-    def extract_text_from_image(self, image_path):
-        """从图像中提取文字 - 增强版本"""
-        if self.ocr is None:
-            print("❌ OCR引擎未初始化")
+    def _parse_page(self, page):
+        """使用初始化时选定的适配器解析单页结果，返回 OCRPage"""
+        try:
+            return RESULT_ADAPTERS[self.result_format](page)
+        except OCRResultFormatError as e:
+            # 实际返回格式与版本推断不一致：按本页结果重新选定适配器（仅发生一次）
+            detected = detect_adapter_from_page(page)
+            if detected is None or detected == self.result_format:
+                raise
+            tracing.warning("⚠️ OCR结果格式与预期不符(%s)，切换适配器: %s -> %s", e, self.result_format, detected)
+            metrics.FALLBACKS.inc(reason='adapter_switch')
+            self.result_format = detected
+            return RESULT_ADAPTERS[detected](page)
+    
+    def _parse_ocr_result(self, result):
+        """解析OCR结果的第一页，返回 text/confidence/box/polygon 字典列表"""
+        if not result:
             return []
         
+        page = self._parse_page(result[0])
+        tracing.debug("📊 [%s] 识别到文本数量: %d", self.result_format, len(page))
+        return page.to_items()
+    
+    def extract_text_from_image(self, image_path, submodels=None, raise_errors=False):
+        """从图像文件中提取文字 - 增强版本（submodels 为本次请求的子模型开关）
+
+        识别失败时默认记录错误并返回空列表；raise_errors=True 时向调用方抛出异常，
+        批量任务据此区分"识别失败"和"页面没有文字"，失败页不记入检查点。
+        """
         try:
+            if self.ocr is None:
+                raise RuntimeError("OCR引擎未初始化")
+            
             # 验证图像文件
             if not os.path.exists(image_path):
-                print(f"❌ 图像文件不存在: {image_path}")
-                return []
-            
-            if os.path.getsize(image_path) == 0:
-                print(f"❌ 图像文件为空: {image_path}")
-                return []
+                raise FileNotFoundError(f"图像文件不存在: {image_path}")
             
-            print(f"📄 正在处理图像: {image_path}")
-            print(f"📊 文件大小: {os.path.getsize(image_path)} 字节")
+            file_size = os.path.getsize(image_path)
+            if file_size == 0:
+                raise ValueError(f"图像文件为空: {image_path}")
             
-            # 预处理图像：确保图像格式和质量适合OCR
-            processed_image_path = self._preprocess_image(image_path)
+            tracing.debug("📄 正在处理图像: %s (%d 字节)", image_path, file_size)
             
-            # 使用PaddleOCR进行识别
-            result = None
-            extracted_texts = []
-            
-            # 优先使用predict方法 (推荐的新版本API)
-            try:
-                print("🔄 使用推荐的predict方法...")
-                result = self.ocr.predict(processed_image_path)
-                print(f"✅ predict方法调用成功，结果类型: {type(result)}")
-                extracted_texts = self._parse_ocr_result(result)
-                
-                if extracted_texts:
-                    print(f"✅ 成功识别 {len(extracted_texts)} 行文字")
-                    # 显示前3行作为验证
-                    for i, item in enumerate(extracted_texts[:3]):
-                        print(f"  示例 {i+1}: {item['text'][:30]}... (置信度: {item['confidence']:.3f})")
-                    return extracted_texts
-                
-            except Exception as e1:
-                print(f"⚠️ predict方法失败: {e1}")
-                
-                # 备用：尝试使用传统的ocr方法（已废弃但可能仍然可用）
-                try:
-                    print("🔄 尝试使用传统ocr方法作为备用...")
-                    result = self.ocr.ocr(processed_image_path)  # type: ignore # 废弃方法但作为备用
-                    print(f"✅ 传统OCR方法调用成功，结果类型: {type(result)}")
-                    extracted_texts = self._parse_ocr_result(result)
-                    
-                    if extracted_texts:
-                        print(f"✅ 通过传统方法成功识别 {len(extracted_texts)} 行文字")
-                        return extracted_texts
-                        
-                except Exception as e2:
-                    print(f"❌ 所有可用的OCR调用方法都失败")
-                    print(f"详细错误: predict={e1}, ocr={e2}")
+            # 解码一次后走内存路径，预处理结果不再写回磁盘
+            image = self._load_image(image_path)
+            extracted_texts = self._extract_from_array(image, submodels)
+            metrics.record_page(extracted_texts)
+            return extracted_texts
+        
+        except Exception as e:
+            self._report_failure(e)
+            if raise_errors:
+                raise
+            return []
+    
+    def extract_text_from_array(self, image, submodels=None, raise_errors=False):
+        """从内存中的图像数组(numpy, RGB)提取文字，全程不经过PNG编解码（raise_errors 同上）"""
+        try:
+            if self.ocr is None:
+                raise RuntimeError("OCR引擎未初始化")
             
-            # 如果所有方法都没有识别到文字
-            if not extracted_texts:
-                print("⚠️ 未检测到任何文字内容")
-                self._debug_result_structure(result)
-                self._check_image_quality(processed_image_path)
-                
-                return []
+            if not isinstance(image, np.ndarray) or image.size == 0:
+                raise ValueError(f"无效的图像数组: {type(image)}")
             
+            tracing.debug("📄 正在处理内存图像: 形状=%s, 类型=%s", image.shape, image.dtype)
+            extracted_texts = self._extract_from_array(self._normalize_array(image), submodels)
+            metrics.record_page(extracted_texts)
             return extracted_texts
         
         except Exception as e:
-            print(f"❌ 图像处理失败: {str(e)}")
+            self._report_failure(e)
+            if raise_errors:
+                raise
+            return []
+    
+    def _report_failure(self, error):
+        """记录单张图像的识别失败"""
+        tracing.error("❌ 图像处理失败: %s", error)
+        metrics.ERRORS.inc()
+        if tracing.is_enabled(tracing.DEBUG):
             import traceback
-            print(f"详细错误信息: {traceback.format_exc()}")
+            tracing.debug("详细错误信息: %s", traceback.format_exc())
+    
+    def _extract_from_array(self, image, submodels=None, use_cache=True):
+        """对RGB uint8数组执行预处理和OCR识别（每张图像只推理一次）"""
+        # 预处理图像：确保图像格式和尺寸适合OCR
+        return self._extract_preprocessed(self._preprocess_array(image), submodels, use_cache=use_cache)
+    
+    def _extract_preprocessed(self, ocr_input, submodels=None, use_cache=True):
+        """对已预处理的BGR数组执行OCR识别（预处理判定不可识别时直接返回空结果）
+
+        use_cache=False 时既不查询也不写入结果缓存（用于预热等必须真正执行推理的场景）。
+        """
+        if ocr_input is None:
             return []
+        
+        flags = self._resolve_submodels(submodels)
+        cache_key, cached = self._cache_lookup(ocr_input, flags) if use_cache else (None, None)
+        if cached is not None:
+            return cached
+        
+        ocr_input, call_kwargs = self._orient(ocr_input, flags)
+        if self._needs_tiling(ocr_input):
+            result = None
+            extracted_texts = self._extract_tiled(ocr_input, call_kwargs)
+        else:
+            with tracing.span("inference"), self._ocr_lock:
+                result = self._infer(ocr_input, **call_kwargs)
+            with tracing.span("parse"):
+                extracted_texts = self._parse_ocr_result(result)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, extracted_texts)
+        
+        if extracted_texts:
+            tracing.debug("✅ %s识别 %d 行文字", self.infer_method, len(extracted_texts))
+            return extracted_texts
+        
+        # 空结果诊断只使用内存中已有的结果和图像数组，不再重新推理或读盘
+        tracing.warning("⚠️ 未检测到任何文字内容")
+        if tracing.is_enabled(tracing.DEBUG):
+            self._debug_result_structure(result)
+            self._check_image_quality(ocr_input)
+        
+        return []
+    
+    def _needs_tiling(self, ocr_input):
+        """判断预处理后的图像是否需要分块识别"""
+        return bool(self.tile_size) and max(ocr_input.shape[:2]) > self.tile_size
+    
+    def _resolve_submodels(self, submodels=None):
+        """合并处理器默认值与本次请求的子模型开关"""
+        flags = dict(self.submodels)
+        for name, value in (submodels or {}).items():
+            if name not in SUBMODEL_OPTIONS:
+                raise ValueError(f"未知的子模型开关: {name}（可选: {', '.join(SUBMODEL_OPTIONS)}）")
+            if value is not None:
+                flags[name] = value
+        if flags['use_textline_orientation'] == 'auto' and self.orientation_probe is None:
+            # 初始化时未启用页面方向探测
+            flags['use_textline_orientation'] = True
+        for name, (engine_key, label, reason) in _SUBMODEL_ENGINE_KEYS.items():
+            # 初始化时显式关闭的子模型没有加载，按请求开启也无法使用
+            if flags[name] and self.engine_config.get(engine_key) is False:
+                tracing.warning("⚠️ %s未在初始化时加载，本次请求不启用", label)
+                metrics.FALLBACKS.inc(reason=reason)
+                flags[name] = False
+        return flags
+    
+    def _orient(self, ocr_input, flags):
+        """按子模型开关准备推理，返回 (推理输入, 推理参数)
+
+        'auto' 模式先做页面级方向探测：方向可信时把页面旋转为正向并关闭逐行方向分类，
+        不确定时对该页保留逐行分类。
+        """
+        flags = dict(flags)
+        if flags['use_textline_orientation'] == 'auto':
+            ocr_input, _, upright = self.orientation_probe.upright(ocr_input)
+            flags['use_textline_orientation'] = not upright
+            if not upright:
+                metrics.FALLBACKS.inc(reason='orientation_uncertain')
+        
+        if self.infer_method == 'predict':
+            return ocr_input, {name: bool(value) for name, value in flags.items() if value is not None}
+        # v2.x 只支持按次开关方向分类
+        return ocr_input, {'cls': bool(flags['use_textline_orientation'])}
+    
+    def _infer_pages(self, inputs, call_kwargs=None):
+        """对多张BGR数组执行推理，返回对应的 OCRPage 列表"""
+        call_kwargs = call_kwargs or {}
+        with tracing.span("inference"), self._ocr_lock:
+            if self.infer_method == 'predict':
+                pages = self._infer(inputs, **call_kwargs)
+            else:
+                # v2.x 的 ocr 方法一次只接受一张图像
+                pages = [self._infer(ocr_input, **call_kwargs)[0] for ocr_input in inputs]
+        with tracing.span("parse"):
+            return [self._parse_page(page) for page in pages]
+    
+    def _infer_oriented(self, oriented):
+        """对 (推理输入, 推理参数) 列表按参数分组批量推理，按原顺序返回识别结果"""
+        groups = {}
+        for index, (_, call_kwargs) in enumerate(oriented):
+            groups.setdefault(tuple(sorted(call_kwargs.items())), []).append(index)
+        
+        extracted = [None] * len(oriented)
+        for key, indices in groups.items():
+            pages = self._infer_pages([oriented[i][0] for i in indices], dict(key))
+            for index, page in zip(indices, pages):
+                extracted[index] = page.to_items()
+        return extracted
+    
+    def _extract_tiled(self, ocr_input, call_kwargs=None):
+        """分块识别大幅面图像，并把各分块结果合并回整页坐标"""
+        tiles = split_tiles(ocr_input, self.tile_size, self.tile_overlap)
+        height, width = ocr_input.shape[:2]
+        tracing.debug("🧱 分块识别: %dx%d -> %d 个分块", width, height, len(tiles))
+        
+        runner = self.tile_runner or self._infer_pages
+        pages = runner([tile.image for tile in tiles], call_kwargs)
+        with tracing.span("tile_merge"):
+            page = merge_tile_pages(tiles, pages)
+        tracing.debug("📊 [%s] 合并后文本数量: %d", self.result_format, len(page))
+        return page.to_items()
+    
+    def _cache_lookup(self, ocr_input, flags=None):
+        """查询结果缓存，返回 (缓存键, 缓存结果)；未启用缓存时均为None
+
+        缓存键包含本次请求的子模型开关，不同开关的结果互不复用。
+        """
+        if self.result_cache is None:
+            return None, None
+        
+        with tracing.span("cache_lookup"):
+            fingerprint = f"{self._config_fingerprint}|{json.dumps(flags or {}, sort_keys=True)}"
+            cache_key = self.result_cache.make_key(ocr_input, fingerprint)
+            cached = self.result_cache.get(cache_key)
+        metrics.CACHE_LOOKUPS.inc(result='miss' if cached is None else 'hit')
+        if cached is not None:
+            tracing.debug("♻️ 命中结果缓存: %s", cache_key[:12])
+        return cache_key, cached
     
     def _debug_result_structure(self, result):
         """调试结果结构"""
         try:
-            print(f"🔍 调试信息: result类型={type(result)}")
-            if result:
-                print(f"🔍 result长度: {len(result) if hasattr(result, '__len__') else 'N/A'}")
-                if isinstance(result, list) and len(result) > 0:
-                    first_item = result[0]
-                    print(f"🔍 第一项类型: {type(first_item)}")
-                    if isinstance(first_item, dict):
-                        print(f"🔍 字典键: {list(first_item.keys())}")
-                    elif hasattr(first_item, '__dict__'):
-                        print(f"🔍 对象属性: {list(vars(first_item).keys())}")
-                    elif isinstance(first_item, list) and len(first_item) > 0:
-                        print(f"🔍 嵌套列表长度: {len(first_item)}")
-                        if len(first_item) > 0:
-                            print(f"🔍 嵌套项类型: {type(first_item[0])}")
-        except Exception as e:
-            print(f"🔍 调试信息获取失败: {e}")
-    
-    def _check_image_quality(self, image_path):
-        """检查图像质量"""
-        try:
-            if not os.path.exists(image_path):
-                print("🔍 图像文件不存在")
-                return
-            
-            with PILImage.open(image_path) as img:
-                width, height = img.size
-                total_pixels = width * height
-                
-                print(f"🔍 图像质量检查:")
-                print(f"   尺寸: {width}x{height} ({total_pixels:,} 像素)")
-                print(f"   格式: {img.format}")
-                print(f"   模式: {img.mode}")
-                
-                # 质量评估
-                if total_pixels < 50000:
-                    print("   ⚠️ 图像分辨率较低，可能影响识别效果")
-                elif total_pixels > 4000000:
-                    print("   ℹ️ 图像分辨率很高，处理速度可能较慢")
-                else:
-                    print("   ✅ 图像分辨率适中")
-                
+            tracing.debug("🔍 调试信息: result类型=%s", type(result))
+            if result and isinstance(result, list):
+                first_item = result[0]
+                tracing.debug("🔍 result长度: %d, 第一项类型: %s", len(result), type(first_item))
+                if isinstance(first_item, dict):
+                    tracing.debug("🔍 字典键: %s", list(first_item.keys()))
+                elif hasattr(first_item, '__dict__'):
+                    tracing.debug("🔍 对象属性: %s", list(vars(first_item).keys()))
+                elif isinstance(first_item, list) and len(first_item) > 0:
+                    tracing.debug("🔍 嵌套列表长度: %d, 嵌套项类型: %s", len(first_item), type(first_item[0]))
         except Exception as e:
-            print(f"🔍 图像质量检查失败: {e}")
+            tracing.debug("🔍 调试信息获取失败: %s", e)
     
-    def process_single_image(self, image_path):
-        """处理单个图像文件"""
-        print(f"📄 处理图像: {os.path.basename(image_path)}")
+    def _check_image_quality(self, image):
+        """检查图像质量（基于内存中的图像数组）"""
+        height, width = image.shape[:2]
+        total_pixels = width * height
         
-        # 提取文字
-        extracted_texts = self.extract_text_from_image(image_path)
+        tracing.debug("🔍 图像质量检查: 尺寸=%dx%d (%s 像素), 类型=%s", width, height, f"{total_pixels:,}", image.dtype)
         
-        # 整理结果
+        # 质量评估
+        if total_pixels < 50000:
+            tracing.debug("   ⚠️ 图像分辨率较低，可能影响识别效果")
+        elif total_pixels > 4000000:
+            tracing.debug("   ℹ️ 图像分辨率很高，处理速度可能较慢")
+        else:
+            tracing.debug("   ✅ 图像分辨率适中")
+    
+    def _build_rows(self, extracted_texts, file_name, page_number=None):
+        """将识别文本整理为 file_name/line_number/extracted_text/confidence 行
+
+        多页文档的行额外带有 page_number 列（从1开始）。
+        """
         results = []
         for i, item in enumerate(extracted_texts):
-            results.append({
-                'file_name': os.path.basename(image_path),
+            row = {'file_name': file_name}
+            if page_number is not None:
+                row['page_number'] = page_number
+            row.update({
                 'line_number': i + 1,
                 'extracted_text': item['text'],
                 'confidence': round(item['confidence'], 4)
             })
+            results.append(row)
         
         return results
     
-    def save_results_to_csv(self, results, output_path):
-        """保存结果到CSV文件"""
-        if not results:
-            # 如果没有结果，创建空的DataFrame
-            df = pd.DataFrame(columns=['file_name', 'line_number', 'extracted_text', 'confidence'])
+    def process_single_image(self, image_path, submodels=None):
+        """处理单个图像文件（PDF/TIFF按页处理后返回全部行）"""
+        if is_multipage_document(image_path):
+            return [row for rows in self.process_document(image_path, submodels=submodels) for row in rows]
+        
+        tracing.info("📄 处理图像: %s", os.path.basename(image_path))
+        
+        # 提取文字
+        extracted_texts = self.extract_text_from_image(image_path, submodels)
+        
+        # 整理结果
+        return self._build_rows(extracted_texts, os.path.basename(image_path))
+    
+    def process_single_array(self, image, file_name="uploaded_image", submodels=None):
+        """处理内存中的单个图像数组"""
+        tracing.info("📄 处理内存图像: %s", file_name)
+        
+        extracted_texts = self.extract_text_from_array(image, submodels)
+        return self._build_rows(extracted_texts, file_name)
+
+    def _iter_document_inputs(self, path, dpi=None):
+        """逐页栅格化并预处理文档，生成 (页码, BGR数组)"""
+        for page_number, image in iter_document_pages(path, dpi=dpi or self.document_dpi):
+            yield page_number, self._preprocess_array(image)
+    
+    def process_document(self, path, dpi=None, prefetch_pages=2, submodels=None):
+        """流式处理多页文档（PDF/TIFF），逐页生成结果行列表
+
+        后台线程提前栅格化后续页面（最多 prefetch_pages 页），与当前页的识别重叠进行；
+        整个文档不会一次性解码到内存中。
+        """
+        if self.ocr is None:
+            tracing.error("❌ OCR引擎未初始化")
+            return
+        
+        file_name = os.path.basename(path)
+        tracing.info("📚 处理文档: %s", file_name)
+        
+        pages = prefetch(self._iter_document_inputs(path, dpi), depth=prefetch_pages)
+        try:
+            for page_number, ocr_input in pages:
+                try:
+                    extracted_texts = self._extract_preprocessed(ocr_input, submodels)
+                except Exception as e:
+                    tracing.error("❌ 第 %d 页处理失败: %s", page_number, e)
+                    metrics.ERRORS.inc()
+                    extracted_texts = []
+                metrics.record_page(extracted_texts)
+                tracing.debug("📄 %s 第 %d 页: %d 行", file_name, page_number, len(extracted_texts))
+                yield self._build_rows(extracted_texts, file_name, page_number)
+        except Exception as e:
+            tracing.error("❌ 文档读取失败: %s (%s)", file_name, e)
+        finally:
+            pages.close()
+    
+    def _prepare_batch_item(self, item, index):
+        """将批处理输入（路径或数组）转换为 (文件名, BGR数组)"""
+        if isinstance(item, np.ndarray):
+            return f"image_{index + 1:05d}", self._preprocess_array(self._normalize_array(item))
+
+        return os.path.basename(item), self._preprocess_array(self._load_image(item))
+
+    def _iter_batch_inputs(self, items):
+        """逐项准备批处理输入，生成 (文件名, 页码, BGR数组)；文档按页展开"""
+        for index, item in enumerate(items):
+            if not isinstance(item, np.ndarray) and is_multipage_document(item):
+                try:
+                    for page_number, ocr_input in self._iter_document_inputs(item):
+                        yield os.path.basename(item), page_number, ocr_input
+                except Exception as e:
+                    tracing.warning("⚠️ 文档读取中断 #%d: %s", index + 1, e)
+                continue
+            
+            try:
+                name, ocr_input = self._prepare_batch_item(item, index)
+            except Exception as e:
+                tracing.warning("⚠️ 跳过无法读取的图像 #%d: %s", index + 1, e)
+                continue
+            yield name, None, ocr_input
+    
+    def _extract_batch_item(self, ocr_input, submodels=None):
+        """批量推理失败后单独处理一张已预处理的图像"""
+        try:
+            return self._extract_preprocessed(ocr_input, submodels)
+        except Exception as e:
+            tracing.error("❌ 图像处理失败: %s", e)
+            metrics.ERRORS.inc()
+            return []
+
+    def process_batch(self, paths_or_arrays, batch_size=8, submodels=None):
+        """批量处理多张图像，每批次仅调用一次predict
+
+        输入可以是图像路径和numpy数组(RGB)的混合列表，返回与
+        process_single_image 相同结构的行列表（按输入顺序）。
+        PDF/TIFF路径按页展开，每页作为一张图像参与批处理。
+        """
+        results = []
+        for rows in self.iter_batch(paths_or_arrays, batch_size, submodels):
+            results.extend(rows)
+        log_batch_summary(results)
+        return results
+
+    def iter_batch(self, paths_or_arrays, batch_size=8, submodels=None):
+        """流式批量处理，按输入顺序逐张（逐页）生成结果行列表
+
+        图像解码和预处理在后台线程中提前进行，与当前批次的推理重叠；
+        输入可以是生成器，不需要预先全部加载。
+        """
+        for name, page_number, extracted_texts, _ in self._iter_batch_results(paths_or_arrays, batch_size, submodels):
+            yield self._build_rows(extracted_texts, name, page_number)
+
+    def process_batch_to_sink(self, paths_or_arrays, sink, batch_size=8, submodels=None):
+        """批量处理并把每页结果（含外接矩形和耗时）直接写入结果输出，返回写入的页数
+
+        sink 为 ocr_result_sink 中的结果输出对象，结果不在内存中累积。
+        """
+        pages = 0
+        results = self._iter_batch_results(paths_or_arrays, batch_size, submodels)
+        for name, page_number, extracted_texts, elapsed_ms in results:
+            with tracing.span("sink_write"):
+                sink.write_page(name, page_number, extracted_texts, elapsed_ms)
+            pages += 1
+        return pages
+
+    def _iter_batch_results(self, paths_or_arrays, batch_size, submodels=None):
+        """批量处理核心流程，逐张（逐页）生成 (文件名, 页码, 识别结果, 耗时ms)
+
+        耗时为所在批次的识别耗时按图像数均摊。
+        """
+        if self.ocr is None:
+            tracing.error("❌ OCR引擎未初始化")
+            return
+
+        batch_size = max(1, int(batch_size))
+        flags = self._resolve_submodels(submodels)
+        tracing.info("📚 批量处理图像，批大小: %d", batch_size)
+
+        inputs = prefetch(self._iter_batch_inputs(paths_or_arrays), depth=batch_size)
+        done = 0
+        try:
+            while True:
+                chunk = list(islice(inputs, batch_size))
+                if not chunk:
+                    break
+                chunk_start = time.perf_counter()
+
+                page_texts, pending = [], []
+                for name, page_number, ocr_input in chunk:
+                    if ocr_input is None:
+                        # 预处理判定为不可识别，不参与推理
+                        page_texts.append([])
+                        continue
+                    
+                    # 命中缓存的图像不再参与本批推理；大幅面图像单独分块识别
+                    cache_key, cached = self._cache_lookup(ocr_input, flags)
+                    if cached is None and self._needs_tiling(ocr_input):
+                        cached = self._extract_batch_item(ocr_input, submodels)
+                    page_texts.append(cached)
+                    if cached is None:
+                        pending.append((len(page_texts) - 1, cache_key, ocr_input))
+
+                if pending:
+                    batch_inputs = [ocr_input for _, _, ocr_input in pending]
+                    try:
+                        # 'auto' 模式下逐页探测方向，按推理参数分组后批量推理
+                        oriented = [self._orient(ocr_input, flags) for ocr_input in batch_inputs]
+                        pending_texts = self._infer_oriented(oriented)
+                        for (_, cache_key, _), extracted_texts in zip(pending, pending_texts):
+                            if cache_key is not None:
+                                self.result_cache.put(cache_key, extracted_texts)
+                    except Exception as e:
+                        # 整批推理失败时逐张处理，保证其余图像仍有结果
+                        tracing.warning("⚠️ 批量predict失败: %s，改为逐张处理", e)
+                        metrics.FALLBACKS.inc(reason='batch_per_item')
+                        pending_texts = [self._extract_batch_item(ocr_input, submodels) for ocr_input in batch_inputs]
+
+                    for (position, _, _), extracted_texts in zip(pending, pending_texts):
+                        page_texts[position] = extracted_texts
+
+                elapsed_ms = (time.perf_counter() - chunk_start) * 1000 / len(chunk)
+                for (name, page_number, _), extracted_texts in zip(chunk, page_texts):
+                    metrics.record_page(extracted_texts)
+                    yield name, page_number, extracted_texts, elapsed_ms
+
+                done += len(chunk)
+                tracing.info("✅ 已完成 %d 张图像", done)
+        finally:
+            inputs.close()
+
+    def _recognize_crops(self, crops):
+        """只做文字识别（不做检测），返回每个裁剪区域的 (文本, 置信度)"""
+        valid = [i for i, crop in enumerate(crops) if crop.size and min(crop.shape[:2]) >= 4]
+        recognized = [('', 0.0)] * len(crops)
+        if not valid:
+            return recognized
+        
+        with tracing.span("inference"), self._ocr_lock:
+            if self.infer_method == 'predict':
+                if self._text_recognizer is None:
+                    from paddleocr import TextRecognition
+                    
+                    rec_kwargs = {}
+                    if 'text_recognition_model_name' in self.engine_config:
+                        rec_kwargs['model_name'] = self.engine_config['text_recognition_model_name']
+                    if 'cpu_threads' in self.engine_config:
+                        rec_kwargs['cpu_threads'] = self.engine_config['cpu_threads']
+                    self._text_recognizer = TextRecognition(**rec_kwargs)
+                    tracing.info("🔤 已加载表单识别模型")
+                results = self._text_recognizer.predict(input=[crops[i] for i in valid], batch_size=len(valid))
+                for i, res in zip(valid, results):
+                    recognized[i] = (res['rec_text'], float(res['rec_score']))
+            else:
+                # v2.x: det=False 时直接返回 [[(文本, 置信度)]]
+                for i in valid:
+                    lines = self._infer(crops[i], det=False, cls=False)[0]
+                    if lines:
+                        recognized[i] = (lines[0][0], float(lines[0][1]))
+        return recognized
+    
+    def extract_form(self, image, template=None):
+        """按表单模板只识别字段区域，返回 {字段名: {text, raw_text, confidence, box}}
+
+        image 为RGB（或灰度）数组；跳过整页文字检测，识别量只与字段行数有关。
+        """
+        template = get_template(template) if template else self.template
+        if template is None:
+            raise ValueError("未指定表单模板")
+        
+        with tracing.span("preprocess"):
+            bgr = self._to_engine_layout(self._normalize_array(image))
+        
+        cache_key = None
+        if self.result_cache is not None:
+            with tracing.span("cache_lookup"):
+                cache_key = self.result_cache.make_key(bgr, f"{self._config_fingerprint}|{template.fingerprint()}")
+                cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached[0]
+        
+        crops, boxes = template.crops(bgr)
+        tracing.debug("📋 模板 %s: %d 个字段, %d 个识别区域", template.name, len(template.fields), len(crops))
+        recognized = self._recognize_crops(crops)
+        with tracing.span("parse"):
+            fields = template.assemble(recognized, boxes)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, [fields])
+        return fields
+    
+    def process_form(self, item, template=None, file_name=None):
+        """处理一张模板表单（路径或RGB数组），返回 {file_name, template, fields}"""
+        template = get_template(template) if template else self.template
+        if isinstance(item, np.ndarray):
+            file_name = file_name or "uploaded_image"
+            image = item
         else:
-            df = pd.DataFrame(results)
+            file_name = file_name or os.path.basename(item)
+            image = self._load_image(item)
         
-        df.to_csv(output_path, index=False, encoding='utf-8-sig')
-        print(f"💾 结果已保存到: {output_path}")
-        return df
+        tracing.info("📋 处理表单: %s", file_name)
+        fields = self.extract_form(image, template)
+        return {'file_name': file_name, 'template': template.name, 'fields': fields}
+    
+    def save_results_to_csv(self, results, output_path, append=False):
+        """保存结果到CSV文件"""
+        return save_results_to_csv(results, output_path, append=append)
+
+
+def pil_to_array(img):
+    """PIL图像转为numpy数组；RGB/RGBA/灰度模式直接转换，避免 convert('RGB') 的额外复制"""
+    if getattr(img, 'mode', None) not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGB')
+    return np.asarray(img)
+
+
+def save_results_to_csv(results, output_path, append=False):
+    """保存结果到CSV文件（供处理器和工作池等不同后端共用），返回写入的行数
+
+    两种模式都按 ocr_result_sink.RESULT_COLUMNS 的列写出（缺失的列留空），
+    append=True 时追加写入已有文件（只在新文件开头写BOM和表头），已有文件的表头不一致时抛出 ValueError；
+    大批量结果建议直接使用 ocr_result_sink 按页流式写入。
+    """
+    with tracing.span("csv_write"), CSVResultSink(output_path, append=append) as sink:
+        sink.write_rows(results)
+    if append:
+        tracing.info("💾 已追加 %d 行到: %s", sink.rows_written, output_path)
+    else:
+        tracing.info("💾 结果已保存到: %s", output_path)
+    return sink.rows_written
+
+
+def _new_request_id():
+    """生成请求ID（时间戳 + 随机后缀），用于隔离并发请求的结果文件"""
+    return f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
 
+def _cleanup_stale_results(results_dir=UPLOAD_RESULTS_DIR, max_age=UPLOAD_RESULTS_MAX_AGE):
+    """清理超过保留时间的上传结果文件"""
+    if not os.path.isdir(results_dir):
+        return
+    
+    cutoff = time.time() - max_age
+    for entry in os.scandir(results_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            # 其他请求可能已删除该文件
+            pass
+
+
+def process_uploaded_image(image, processor=None, debug=False):
+    """处理上传的图像 - Gradio接口函数
 
-def process_uploaded_image(image, processor=None):
-    """处理上传的图像 - Gradio接口函数"""
+    debug=True 时为本次请求开启追踪，并将分级调试信息和阶段耗时附加到结果文本中。
+    """
     if image is None:
         return "请上传图像文件", None
     
     try:
-        print("🔍 开始处理上传的图像...")
-        
-        # 确保assets目录存在
-        os.makedirs('assets/sample_docs', exist_ok=True)
-        
-        # 创建临时文件名
-        temp_filename = "temp_uploaded_image.png"
-        temp_path = os.path.join('assets/sample_docs', temp_filename)
-        
-        # 处理不同类型的输入图像
-        processed_successfully = False
+        request_id = _new_request_id()
+        tracing.info("🔍 开始处理上传的图像... (请求ID: %s)", request_id)
         
+        # 处理不同类型的输入图像，统一为内存中的RGB数组（不写临时文件）
         try:
             if isinstance(image, np.ndarray):
                 # Gradio上传的numpy数组格式
-                print("📥 处理numpy数组格式图像...")
+                tracing.debug("📥 处理numpy数组格式图像...")
                 
-                # 确保数组是正确的形状和数据类型
+                # 确保数组是正确的形状
                 if len(image.shape) != 3:
                     return "❌ 不支持的图像维度，请上传标准图像文件", None
                 
-                # 数据类型转换
-                if image.dtype != np.uint8:
-                    if image.max() <= 1.0:
-                        # 浮点数格式 (0-1)
-                        image = (image * 255).astype(np.uint8)
-                    else:
-                        # 其他格式
-                        image = image.astype(np.uint8)
-                
-                # 转换为PIL图像
-                if image.shape[2] == 3:
-                    # RGB格式
-                    pil_image = PILImage.fromarray(image, mode='RGB')
-                elif image.shape[2] == 4:
-                    # RGBA格式，转换为RGB
-                    pil_image = PILImage.fromarray(image, mode='RGBA').convert('RGB')
-                else:
+                if image.shape[2] not in (3, 4):
                     return f"❌ 不支持的颜色通道数: {image.shape[2]}", None
                 
-                print(f"✅ 成功转换图像，尺寸: {pil_image.size}")
-                processed_successfully = True
+                image_array = image
                 
             elif isinstance(image, str):
                 # 文件路径
-                print(f"📥 处理文件路径: {image}")
+                tracing.debug("📥 处理文件路径: %s", image)
                 if not os.path.exists(image):
                     return "❌ 文件路径不存在", None
-                pil_image = PILImage.open(image).convert('RGB')
-                processed_successfully = True
-                
-            elif isinstance(image, PILImage.Image):
-                # PIL图像对象
-                print("📥 处理PIL图像对象...")
-                pil_image = image.convert('RGB')
-                processed_successfully = True
+                with PILImage.open(image) as img:
+                    image_array = pil_to_array(img)
                 
-            elif hasattr(image, 'save'):
-                # 可能是PIL图像或类似对象
-                print("📥 处理可保存图像对象...")
-                pil_image = image.convert('RGB')
-                processed_successfully = True
+            elif isinstance(image, PILImage.Image) or hasattr(image, 'convert'):
+                # PIL图像对象或类似对象
+                tracing.debug("📥 处理PIL图像对象...")
+                image_array = pil_to_array(image)
                 
             else:
                 return f"❌ 无法处理的图像类型: {type(image)}", None
             
-            if not processed_successfully:
-                return "❌ 图像处理失败", None
-            
-            # 图像质量检查和优化
-            width, height = pil_image.size
-            print(f"📊 图像尺寸: {width}x{height}")
+            # 图像质量检查
+            height, width = image_array.shape[:2]
+            tracing.debug("📊 图像尺寸: %dx%d", width, height)
             
             # 如果图像太小，可能影响识别效果
             if width < 100 or height < 50:
                 return "❌ 图像尺寸过小，可能影响识别效果。请上传分辨率更高的图像。", None
             
-            # 如果图像过大，进行适当缩放
-            max_dimension = 2048
-            if max(width, height) > max_dimension:
-                print("🔄 图像过大，进行缩放...")
-                ratio = max_dimension / max(width, height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                pil_image = pil_image.resize((new_width, new_height), PILImage.Resampling.LANCZOS)
-                print(f"✅ 缩放后尺寸: {pil_image.size}")
-            
-            # 保存处理后的图像
-            try:
-                pil_image.save(temp_path, format='PNG', quality=95, optimize=True)
-                print(f"💾 图像已保存到: {temp_path}")
-            except Exception as save_error:
-                print(f"⚠️ PNG保存失败: {save_error}，尝试JPEG格式")
-                temp_path = temp_path.replace('.png', '.jpg')
-                pil_image.save(temp_path, format='JPEG', quality=95)
-                print(f"💾 图像已保存到: {temp_path}")
-            
-            # 验证保存的文件
-            if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
-                return "❌ 图像保存失败，请重试", None
-            
-            print(f"✅ 文件验证成功，大小: {os.path.getsize(temp_path)} 字节")
-            
         except Exception as img_error:
-            print(f"❌ 图像处理错误: {img_error}")
+            tracing.error("❌ 图像处理错误: %s", img_error)
             return f"❌ 图像处理失败: {str(img_error)}", None
         
         # 检查OCR处理器是否可用
@@ -484,100 +957,69 @@ def process_uploaded_image(image, processor=None):
             return "❌ OCR处理器未初始化，请重新运行初始化代码", None
         
         # 使用OCR处理图像
-        debug_info = ["🔍 开始OCR识别..."]
         try:
-            # 捕获OCR处理过程中的调试信息
-            import io
-            from contextlib import redirect_stdout
-            
-            # 创建字符串缓冲区捕获print输出
-            debug_buffer = io.StringIO()
-            
-            with redirect_stdout(debug_buffer):
-                results = active_processor.process_single_image(temp_path)
+            # 按请求收集调试信息（不再替换全局stdout，并发请求互不干扰）
+            request_trace = None
+            if debug:
+                with tracing.capture_trace(request_id) as request_trace:
+                    results = active_processor.process_single_array(image_array, f"upload_{request_id}")
+            else:
+                results = active_processor.process_single_array(image_array, f"upload_{request_id}")
             
-            # 获取调试信息
-            debug_output = debug_buffer.getvalue()
-            if debug_output:
-                debug_info.append("\n📊 OCR处理过程调试信息:")
-                debug_info.append(debug_output)
+            if request_trace is not None:
+                debug_info = "\n📊 OCR处理过程调试信息:\n" + request_trace.render()
+            else:
+                debug_info = "💡 勾选“显示调试信息”可查看OCR处理过程"
             
             if not results:
                 # 详细的失败分析，包含调试信息
-                analysis_result = "😞 未检测到任何文字内容\n\n"
-                analysis_result += "\n".join(debug_info) + "\n\n"
-                analysis_result += "🔍 可能的原因分析:\n"
-                analysis_result += "1. 图像中没有清晰的文字\n"
-                analysis_result += "2. 文字过小、模糊或倾斜角度过大\n"
-                analysis_result += "3. 图像背景复杂，干扰了文字识别\n"
-                analysis_result += "4. 图像对比度不足\n"
-                analysis_result += "5. PaddleOCR版本兼容性问题\n\n"
-                analysis_result += "💡 改进建议:\n"
-                analysis_result += "• 确保图像清晰，文字大小适中\n"
-                analysis_result += "• 调整图像亮度和对比度\n"
-                analysis_result += "• 尽量保持文档平整，减少倾斜\n"
-                analysis_result += "• 避免复杂背景，使用纯色背景\n"
-                analysis_result += "• 尝试不同的拍摄角度和光线条件\n"
-                analysis_result += f"\n📊 图像信息: 尺寸={pil_image.size}, 文件大小={os.path.getsize(temp_path)}字节"
+                analysis_result = "\n".join((
+                    "😞 未检测到任何文字内容\n",
+                    debug_info + "\n",
+                    "🔍 可能的原因分析:",
+                    "1. 图像中没有清晰的文字",
+                    "2. 文字过小、模糊或倾斜角度过大",
+                    "3. 图像背景复杂，干扰了文字识别",
+                    "4. 图像对比度不足",
+                    "5. PaddleOCR版本兼容性问题\n",
+                    "💡 改进建议:",
+                    "• 确保图像清晰，文字大小适中",
+                    "• 调整图像亮度和对比度",
+                    "• 尽量保持文档平整，减少倾斜",
+                    "• 避免复杂背景，使用纯色背景",
+                    "• 尝试不同的拍摄角度和光线条件\n",
+                    f"📊 图像信息: 尺寸={width}x{height}, 通道={image_array.shape[2] if image_array.ndim == 3 else 1}",
+                ))
                 
                 return analysis_result, None
             
-            # 生成结果文本
-            result_text = "📊 OCR识别结果:\n" + "="*50 + "\n\n"
-            
-            high_confidence_count = 0
-            medium_confidence_count = 0
-            low_confidence_count = 0
-            
-            for i, result in enumerate(results, 1):
-                confidence = result['confidence']
-                
-                # 分类置信度
-                if confidence > 0.8:
-                    confidence_indicator = "🟢"
-                    high_confidence_count += 1
-                elif confidence > 0.6:
-                    confidence_indicator = "🟡"
-                    medium_confidence_count += 1
-                else:
-                    confidence_indicator = "🔴"
-                    low_confidence_count += 1
-                
-                result_text += f"{i:2d}. {confidence_indicator} {result['extracted_text']}\n"
-                result_text += f"     (置信度: {confidence:.3f})\n\n"
+            # 保存CSV文件（按请求ID区分，避免并发请求互相覆盖）
+            os.makedirs(UPLOAD_RESULTS_DIR, exist_ok=True)
+            _cleanup_stale_results()
+            csv_path = os.path.join(UPLOAD_RESULTS_DIR, f"ocr_results_{request_id}.csv")
+            save_results_to_csv(results, csv_path)
             
-            # 保存CSV文件
-            os.makedirs('assets/results', exist_ok=True)
-            csv_path = "assets/results/ocr_results_uploaded.csv"
-            active_processor.save_results_to_csv(results, csv_path)
+            # 置信度统计一次算出，报告文本一次拼接
+            with tracing.span("report"):
+                stats = ConfidenceStats.from_rows(results)
+                sections = [
+                    "📊 OCR识别结果:\n" + "=" * 50 + "\n",
+                    render_result_lines(results),
+                    stats.render(),
+                    f"\n💾 CSV结果文件: {csv_path}\n📄 可下载CSV文件查看详细数据",
+                    f"\n{stats.grade}",
+                ]
+                if request_trace is not None:
+                    sections.append("\n" + debug_info)
+                result_text = "\n".join(sections)
             
-            # 添加统计信息
-            avg_confidence = sum(r['confidence'] for r in results) / len(results)
-            result_text += f"\n📈 识别统计:\n"
-            result_text += f"• 总计识别文字行数: {len(results)}\n"
-            result_text += f"• 平均置信度: {avg_confidence:.3f}\n"
-            result_text += f"• 高置信度(>0.8): {high_confidence_count}行\n"
-            result_text += f"• 中等置信度(0.6-0.8): {medium_confidence_count}行\n"
-            result_text += f"• 低置信度(<0.6): {low_confidence_count}行\n"
-            result_text += f"\n💾 CSV结果文件: {csv_path}\n"
-            result_text += f"📄 可下载CSV文件查看详细数据"
-            
-            # 添加质量评估
-            if avg_confidence > 0.8:
-                result_text += "\n\n🌟 识别质量: 优秀"
-            elif avg_confidence > 0.6:
-                result_text += "\n\n👍 识别质量: 良好"
-            else:
-                result_text += "\n\n⚠️ 识别质量: 一般，建议改进图像质量"
-            
-            print(f"✅ OCR识别完成，共识别{len(results)}行文字，平均置信度:{avg_confidence:.3f}")
+            tracing.info("✅ OCR识别完成，共识别%d行文字，平均置信度:%.3f", stats.count, stats.mean)
             return result_text, csv_path
             
         except Exception as ocr_error:
             import traceback
             error_trace = traceback.format_exc()
-            print(f"❌ OCR识别错误: {ocr_error}")
-            print(f"详细错误: {error_trace}")
+            tracing.error("❌ OCR识别错误: %s\n详细错误: %s", ocr_error, error_trace)
             
             error_message = f"❌ OCR识别失败: {str(ocr_error)}\n\n"
             error_message += "🔧 可能的解决方案:\n"
@@ -594,8 +1036,7 @@ def process_uploaded_image(image, processor=None):
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"❌ 处理过程中发生未预期错误: {e}")
-        print(f"详细错误: {error_trace}")
+        tracing.error("❌ 处理过程中发生未预期错误: %s\n详细错误: %s", e, error_trace)
         
         error_message = f"❌ 处理失败: {str(e)}\n\n"
         error_message += "🔧 通用解决方案:\n"
@@ -608,17 +1049,54 @@ def process_uploaded_image(image, processor=None):
         return error_message, None
 
 
-def create_gradio_interface():
-    """创建Gradio界面"""
+def create_gradio_interface(service=None, registry=None, languages=None):
+    """创建Gradio界面
+
+    Args:
+        service: 可选的 AsyncOCRService；提供时请求经有界队列排队处理，
+                 过载时立即返回繁忙提示而不是占用HTTP线程等待
+        registry: 可选的 ModelRegistry；提供多个 languages 时界面增加识别语言选项，
+                  各语言引擎在首次选用时加载
+        languages: 可选的识别语言列表（第一项为默认语言）
+    """
+    # 仅在创建界面时导入Gradio，OCR工作进程等场景无需加载
+    import gradio as gr
+    
+    languages = list(languages or [])
+    if service is None:
+        def handle_upload(image, show_debug, lang=None):
+            if registry is None:
+                return process_uploaded_image(image, debug=show_debug)
+            with registry.acquire(lang) as processor:
+                return process_uploaded_image(image, processor=processor, debug=show_debug)
+    else:
+        async def handle_upload(image, show_debug, lang=None):
+            if image is None:
+                return "请上传图像文件", None
+            try:
+                return await service.submit(image, show_debug, lang)
+            except OCRServiceOverloaded:
+                service_stats = service.metrics()
+                tracing.warning("⏳ 请求被拒绝: 队列已满 (%d/%d)",
+                                service_stats['queue_depth'], service_stats['queue_capacity'])
+                return "⏳ 服务繁忙，当前排队请求已满，请稍后重试", None
+            except OCRServiceTimeout:
+                return f"⏱️ 处理超时（超过{service.timeout:.0f}秒），请稍后重试或上传更小的图像", None
     
     interface = gr.Interface(
-        fn=process_uploaded_image,
+        fn=handle_upload,
         inputs=[
             gr.Image(
                 label="📤 上传医疗文档图像", 
                 type="numpy",  # 使用numpy格式便于处理
                 sources=["upload", "clipboard"],  # 支持上传和剪贴板
-            )
+            ),
+            gr.Checkbox(
+                label="🔍 显示调试信息",
+                value=False
+            ),
+            *([gr.Dropdown(choices=languages, value=languages[0], label="🌐 识别语言")]
+              if len(languages) > 1 else []),
         ],
         outputs=[
             gr.Textbox(
@@ -672,21 +1150,135 @@ def create_gradio_interface():
     return interface
 
 
-def main():
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="医疗OCR Gradio演示")
+    parser.add_argument('--host', default="0.0.0.0", help="服务监听地址")
+    parser.add_argument('--port', type=int, default=7860, help="服务端口")
+    parser.add_argument('--model-dir', default=None,
+                        help="本地模型缓存目录（默认读取环境变量 MEDICAL_OCR_MODEL_DIR）")
+    parser.add_argument('--no-warmup', action='store_true', help="跳过启动时的模型预热")
+    parser.add_argument('--no-browser', action='store_true', help="启动后不自动打开浏览器")
+    parser.add_argument('--cache-dir', default=None, help="识别结果缓存目录（不设置则不启用缓存）")
+    parser.add_argument('--cache-size-mb', type=int, default=256, help="结果缓存磁盘容量上限(MB)")
+    parser.add_argument('--queue-workers', type=int, default=0,
+                        help="排队服务模式的OCR工作者数量（0表示不启用排队，直接同步处理）")
+    parser.add_argument('--queue-size', type=int, default=16, help="排队服务的队列容量")
+    parser.add_argument('--request-timeout', type=float, default=120.0, help="单个请求的超时时间(秒)")
+    parser.add_argument('--ocr-processes', type=int, default=0,
+                        help="排队服务使用的OCR工作进程数（0表示使用进程内的单个引擎）")
+    parser.add_argument('--tile-size', type=int, default=None,
+                        help="大图分块识别的分块边长（不设置则把大图缩小到2048px）")
+    parser.add_argument('--tile-overlap', type=int, default=160, help="相邻分块的重叠像素")
+    parser.add_argument('--tile-workers', type=int, default=0,
+                        help="分块并行识别的工作进程数（需配合 --tile-size；0表示在本进程中逐块识别）")
+    parser.add_argument('--preprocess', default="none",
+                        help="自适应预处理阶段（逗号分隔，如 reject_blank,contrast,deskew,rescale；默认不启用）")
+    parser.add_argument('--textline-orientation', choices=['auto', 'on', 'off'], default='auto',
+                        help="逐行文字方向分类（auto: 页面级方向探测后按需启用）")
+    parser.add_argument('--doc-orientation', choices=['default', 'on', 'off'], default='default',
+                        help="文档方向分类子模型")
+    parser.add_argument('--doc-unwarping', choices=['default', 'on', 'off'], default='default',
+                        help="文档弯曲矫正子模型")
+    parser.add_argument('--profile', choices=list(MODEL_PROFILES), default='accurate',
+                        help="模型配置档（fast: mobile模型 + 较低检测分辨率，适合纯CPU部署）")
+    parser.add_argument('--langs', default='ch',
+                        help="可选的识别语言（逗号分隔，第一项为默认语言并常驻，其余在首次选用时加载）")
+    parser.add_argument('--model-memory-mb', type=float, default=None,
+                        help="OCR引擎总内存预算(MB)，超出时卸载最久未用的语言引擎")
+    parser.add_argument('--model-idle-timeout', type=float, default=None,
+                        help="语言引擎空闲超过该秒数后卸载")
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help="Prometheus指标端点端口（0表示不启用）")
+    parser.add_argument('--metrics-host', default="127.0.0.1", help="指标端点监听地址（默认只允许本机抓取）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """主函数"""
     global ocr_processor
     
+    args = parse_args(argv)
+    
+    # 处理过程信息通过 medical_ocr 日志记录器输出到控制台
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("🌐 启动医疗OCR Gradio演示...")
     print("📋 版本: v1.3.17 - 彻底修复Colab中文字体显示和Gradio界面识别问题")
     
     try:
-        # 初始化OCR处理器
+        # 初始化OCR处理器（预热完成后才创建界面，首个请求不再承担模型编译耗时）
         print("🔧 正在初始化OCR处理器...")
-        ocr_processor = MedicalOCRProcessor()
+        preprocessing = None if args.preprocess.lower() == 'none' else args.preprocess
+        switch = {'auto': 'auto', 'default': None, 'on': True, 'off': False}
+        submodels = {
+            'use_textline_orientation': switch[args.textline_orientation],
+            'use_doc_orientation_classify': switch[args.doc_orientation],
+            'use_doc_unwarping': switch[args.doc_unwarping],
+        }
+        result_cache = None
+        if args.cache_dir:
+            result_cache = OCRResultCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+            print(f"♻️ 结果缓存: {args.cache_dir} ({result_cache.stats()['entries']} 条已缓存)")
+        # 各语言引擎由注册表按需加载并共享，默认语言的引擎常驻
+        languages = [lang.strip() for lang in args.langs.split(',') if lang.strip()] or ['ch']
+        registry = ModelRegistry(default_lang=languages[0], memory_budget_mb=args.model_memory_mb,
+                                 idle_timeout=args.model_idle_timeout, model_dir=args.model_dir,
+                                 warmup=not args.no_warmup, result_cache=result_cache,
+                                 tile_size=args.tile_size, tile_overlap=args.tile_overlap,
+                                 preprocessing=preprocessing, profile=args.profile, **submodels)
+        ocr_processor = registry.pin()
         print("✅ OCR处理器初始化成功!")
+        pool_backend = args.queue_workers > 0 and args.ocr_processes > 0
+        if args.tile_workers > 0 and args.tile_size and not pool_backend:
+            # 大幅面页面的各分块分发到独立的工作进程并行识别（工作进程只加载默认语言的引擎）
+            from ocr_worker_pool import OCRWorkerPool
+            tile_pool = OCRWorkerPool(num_workers=args.tile_workers, lang=languages[0], model_dir=args.model_dir,
+                                      warmup=not args.no_warmup, profile=args.profile, **submodels).start()
+            ocr_processor.tile_runner = tile_pool.run_tiles
+        elif args.tile_workers > 0:
+            print("⚠️ --tile-workers 需要 --tile-size，且在多进程排队模式下页面已由工作进程并行处理，忽略该选项")
+        if len(languages) > 1 and pool_backend:
+            print("⚠️ 多进程模式下工作进程只加载默认语言的引擎，语言选项不可用")
+            languages = languages[:1]
+        if len(languages) > 1:
+            print(f"🌐 可选识别语言: {', '.join(languages)}（非默认语言在首次选用时加载）")
+        
+        # 排队服务模式：有界队列 + 固定OCR工作者
+        service = None
+        if args.queue_workers > 0:
+            backend = ocr_processor
+            if args.ocr_processes > 0:
+                from ocr_worker_pool import OCRWorkerPool
+                backend = OCRWorkerPool(num_workers=args.ocr_processes, lang=languages[0],
+                                        model_dir=args.model_dir, warmup=not args.no_warmup, tile_size=args.tile_size,
+                                        tile_overlap=args.tile_overlap, preprocessing=preprocessing,
+                                        profile=args.profile, **submodels).start()
+            
+            def handle_request(image, show_debug, lang=None):
+                if backend is not ocr_processor:
+                    # 工作进程只加载默认语言的引擎
+                    return process_uploaded_image(image, processor=backend, debug=show_debug)
+                with registry.acquire(lang) as processor:
+                    return process_uploaded_image(image, processor=processor, debug=show_debug)
+            
+            service = AsyncOCRService(handle_request, num_workers=args.queue_workers,
+                                      max_queue=args.queue_size, timeout=args.request_timeout)
+        
+        # 指标端点与Gradio服务并行运行，独立于界面线程
+        if args.metrics_port:
+            metrics.watch_model_registry(registry)
+            if service is not None:
+                metrics.watch_service(service)
+            metrics.start_metrics_server(args.metrics_port, host=args.metrics_host)
         
         # 创建界面
-        interface = create_gradio_interface()
+        interface = create_gradio_interface(service, registry=registry, languages=languages)
+        if service is not None:
+            # 放开Gradio自身的并发限制，由OCR队列负责背压
+            interface.queue(default_concurrency_limit=args.queue_size + args.queue_workers)
         
         print("✅ Gradio界面创建成功!")
         print("🚀 启动本地Web服务...")
@@ -695,12 +1287,12 @@ def main():
         
         # 启动界面
         interface.launch(
-            server_name="0.0.0.0",  # 允许外部访问
-            server_port=7860,       # 指定端口
+            server_name=args.host,  # 默认允许外部访问
+            server_port=args.port,  # 指定端口
             share=False,            # 本地运行不需要公网分享
             debug=False,            # 关闭调试模式
             show_error=True,        # 显示错误信息
-            inbrowser=True,         # 自动打开浏览器
+            inbrowser=not args.no_browser,  # 自动打开浏览器
             max_threads=4           # 限制线程数
         )
         
@@ -708,7 +1300,7 @@ def main():
         print(f"❌ 启动失败: {e}")
         print("💡 请检查：")
         print("1. PaddleOCR是否正确安装")
-        print("2. 端口7860是否被占用")
+        print(f"2. 端口{args.port}是否被占用")
         print("3. Python环境是否正确")
         import traceback
         print(f"详细错误: {traceback.format_exc()}")
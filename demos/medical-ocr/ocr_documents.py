@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+多页文档（PDF / 多页TIFF）流式读取
+页面通过生成器逐页栅格化，配合 prefetch() 在后台线程中提前解码下一页，
+使第 N+1 页的栅格化与第 N 页的识别重叠进行；任意时刻内存中只保留少量页面。
+
+PDF 栅格化依赖可选的 PyMuPDF（pip install pymupdf），TIFF 使用 Pillow 逐帧读取。
+"""
+
+import os
+import queue
+import threading
+import contextvars
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL import ImageSequence
+
+# 按多页文档处理的扩展名
+PDF_EXTENSIONS = ('.pdf',)
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+# prefetch 队列中标记生成器结束
+_DONE = object()
+
+
+def is_multipage_document(path):
+    """判断路径是否为按页处理的文档（PDF或TIFF）"""
+    return isinstance(path, (str, os.PathLike)) and \
+        os.fspath(path).lower().endswith(PDF_EXTENSIONS + TIFF_EXTENSIONS)
+
+
+def _open_pdf(path):
+    try:
+        import fitz  # PyMuPDF
+    except ImportError as e:
+        raise RuntimeError("读取PDF需要安装PyMuPDF: pip install pymupdf") from e
+    return fitz.open(path)
+
+
+def _iter_pdf_pages(path, dpi):
+    """逐页栅格化PDF为RGB数组"""
+    with _open_pdf(path) as document:
+        for index, page in enumerate(document):
+            pixmap = page.get_pixmap(dpi=dpi, alpha=False)
+            image = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, pixmap.n)
+            if pixmap.n == 1:
+                image = np.repeat(image, 3, axis=2)
+            elif pixmap.n != 3:
+                image = image[:, :, :3]
+            yield index + 1, image
+
+
+def _iter_tiff_pages(path):
+    """逐帧解码多页TIFF为RGB数组（灰度帧保持单通道，由处理器统一转换）"""
+    with PILImage.open(path) as img:
+        for index, frame in enumerate(ImageSequence.Iterator(img)):
+            if frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+            yield index + 1, np.asarray(frame)
+
+
+def iter_document_pages(path, dpi=200):
+    """按页生成 (页码, RGB或灰度数组)，页码从1开始；页面在迭代时才解码"""
+    if os.fspath(path).lower().endswith(PDF_EXTENSIONS):
+        return _iter_pdf_pages(path, dpi)
+    return _iter_tiff_pages(path)
+
+
+def prefetch(iterable, depth=2):
+    """在后台线程中提前迭代，最多缓存 depth 项
+
+    生产者异常会在消费端原样抛出；消费端提前结束（关闭生成器）时后台线程随之停止。
+    后台线程继承调用方的上下文，请求追踪记录的解码耗时仍归属当前请求。
+    """
+    buffer = queue.Queue(maxsize=max(1, int(depth)))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        put((_DONE, None))
+
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(produce,), name="ocr-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+医疗OCR运行指标
+进程内的计数器、直方图和仪表，按 Prometheus 文本格式（0.0.4）导出：
+- ocr_stage_duration_seconds: 各处理阶段耗时直方图，启动指标端点后由追踪 span 自动记录
+  （decode / preprocess / orientation_probe / inference / parse / csv_write 等）；
+  未启动时 span 不计时，与关闭追踪时的开销相同
+- ocr_images_total / ocr_lines_total / ocr_empty_results_total / ocr_rejected_images_total / ocr_errors_total
+- ocr_fallbacks_total{reason}: 批量推理降级、适配器切换、方向不确定等降级路径
+- ocr_model_memory_bytes / process_resident_memory_bytes: 模型与进程内存仪表
+
+start_metrics_server() 在后台守护线程中提供 /metrics 端点，默认只监听本机。
+多进程工作池模式下各工作进程的识别计数不汇总到主进程。
+
+用法示例:
+    import ocr_metrics
+    ocr_metrics.start_metrics_server(9464)
+    # curl http://127.0.0.1:9464/metrics
+"""
+
+import json
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ocr_tracing as tracing
+
+# 阶段耗时直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类：按标签值元组保存各序列的数据"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in series]
+
+
+class Counter(_Metric):
+    """只增计数器"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            # 无标签计数器从0开始导出，便于计算速率
+            self._series[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可设置的仪表；也可绑定回调，在导出时取值"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks = []
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def set_function(self, callback):
+        """绑定回调 callback() -> {标签值元组: 值}，导出时调用"""
+        self._callbacks.append(callback)
+
+    def _render_samples(self):
+        with self._lock:
+            series = dict(self._series)
+        for callback in self._callbacks:
+            try:
+                series.update(callback())
+            except Exception as e:
+                tracing.warning("⚠️ 指标 %s 取值失败: %s", self.name, e)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(series.items())]
+
+
+class Histogram(_Metric):
+    """累积桶直方图"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # 各桶计数（最后一个为 +Inf 桶）、总和、样本数
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表：同名指标只创建一次"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """导出为 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram('ocr_stage_duration_seconds', "各处理阶段耗时（秒）", ('stage',))
+IMAGES = REGISTRY.counter('ocr_images_total', "已识别的图像（页）数")
+LINES = REGISTRY.counter('ocr_lines_total', "识别出的文字行数")
+EMPTY_RESULTS = REGISTRY.counter('ocr_empty_results_total', "没有识别出任何文字的图像（页）数")
+REJECTED_IMAGES = REGISTRY.counter('ocr_rejected_images_total', "预处理判定为不可识别、跳过推理的图像数")
+ERRORS = REGISTRY.counter('ocr_errors_total', "识别失败的图像（页）数")
+FALLBACKS = REGISTRY.counter('ocr_fallbacks_total', "降级处理次数", ('reason',))
+CACHE_LOOKUPS = REGISTRY.counter('ocr_cache_lookups_total', "结果缓存查询次数", ('result',))
+MODEL_MEMORY = REGISTRY.gauge('ocr_model_memory_bytes', "已加载OCR引擎的估算内存（字节）", ('lang', 'variant'))
+MODELS_LOADED = REGISTRY.gauge('ocr_models_loaded', "已加载的OCR引擎数")
+PROCESS_MEMORY = REGISTRY.gauge('process_resident_memory_bytes', "进程常驻内存（字节）")
+
+
+def record_page(extracted_texts):
+    """记录一张图像（页）的识别结果"""
+    IMAGES.inc()
+    if extracted_texts:
+        LINES.inc(len(extracted_texts))
+    else:
+        EMPTY_RESULTS.inc()
+
+
+def _observe_span(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+
+def enable_stage_timing():
+    """开始把追踪 span 的耗时记入阶段直方图（可重复调用）"""
+    tracing.add_span_observer(_observe_span)
+
+
+def _process_memory():
+    from ocr_model_registry import current_rss_bytes
+    rss = current_rss_bytes()
+    return {(): rss} if rss is not None else {}
+
+
+PROCESS_MEMORY.set_function(_process_memory)
+
+
+def watch_model_registry(registry):
+    """把 ModelRegistry 中各引擎的估算内存导出为仪表"""
+    def model_memory():
+        return {(engine['lang'], json.dumps(engine['variant'], sort_keys=True)): engine['memory_bytes']
+                for engine in registry.stats()['engines']}
+
+    def models_loaded():
+        return {(): len(registry.stats()['engines'])}
+
+    MODEL_MEMORY.set_function(model_memory)
+    MODELS_LOADED.set_function(models_loaded)
+
+
+def watch_service(service, registry=REGISTRY):
+    """把 AsyncOCRService 的队列指标导出为仪表"""
+    names = ('queue_depth', 'in_flight', 'submitted', 'completed', 'failed', 'rejected', 'timeouts')
+    for name in names:
+        gauge = registry.gauge(f'ocr_service_{name}', f"排队服务指标: {name}")
+        gauge.set_function(lambda name=name: {(): service.metrics()[name]})
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取请求频繁，不输出访问日志
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1', registry=REGISTRY):
+    """在后台守护线程中启动 /metrics 端点并开启阶段计时，返回 HTTP 服务器对象（shutdown() 停止）"""
+    enable_stage_timing()
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="ocr-metrics", daemon=True)
+    thread.start()
+    print(f"📈 指标端点: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+OCR模型生命周期管理
+按语言（及模型变体参数）在首次使用时加载 MedicalOCRProcessor，之后所有请求共享同一实例：
+- 同一配置并发首次请求时只加载一次，其他请求等待加载完成
+- 正在使用的引擎不会被卸载（acquire 期间持有引用计数）
+- 超过内存预算时按最近最少使用顺序卸载空闲引擎；空闲超过 idle_timeout 的引擎定期卸载
+
+内存占用按加载前后进程常驻内存（RSS）之差估算，首个引擎同时包含推理库本身的占用。
+
+用法示例:
+    registry = ModelRegistry(memory_budget_mb=4096, idle_timeout=600, warmup=True)
+    with registry.acquire('en') as processor:
+        rows = processor.process_single_array(image, "upload")
+"""
+
+import os
+import gc
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+import ocr_tracing as tracing
+
+
+def current_rss_bytes():
+    """当前进程常驻内存（字节），无法获取时返回None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _default_factory(lang, **kwargs):
+    # 延迟导入，避免与 gradio_demo 循环导入
+    from gradio_demo import MedicalOCRProcessor
+    return MedicalOCRProcessor(lang=lang, **kwargs)
+
+
+class _Entry:
+    """注册表中的一个引擎"""
+
+    __slots__ = ('key', 'processor', 'memory_bytes', 'last_used', 'in_use', 'loaded', 'error')
+
+    def __init__(self, key):
+        self.key = key
+        self.processor = None
+        self.memory_bytes = 0
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.loaded = threading.Event()
+        self.error = None
+
+
+class ModelRegistry:
+    """按语言/模型变体懒加载、跨请求共享的OCR引擎注册表
+
+    Args:
+        default_lang: 未指定语言时使用的语言
+        memory_budget_mb: 所有引擎的内存预算（MB），超出时卸载最久未用的空闲引擎；None表示不限制
+        idle_timeout: 引擎空闲超过该秒数后卸载；None表示不按空闲时间卸载
+        factory: 创建处理器的函数 factory(lang, **kwargs)，默认创建 MedicalOCRProcessor
+        **common_kwargs: 所有引擎共用的处理器参数（如 model_dir、warmup、preprocessing）
+    """
+
+    def __init__(self, default_lang='ch', memory_budget_mb=None, idle_timeout=None, factory=None,
+                 **common_kwargs):
+        self.default_lang = default_lang
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self.idle_timeout = idle_timeout
+        self.factory = factory or _default_factory
+        self.common_kwargs = common_kwargs
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.counters = {'loads': 0, 'hits': 0, 'evictions': 0}
+
+        self._stop = threading.Event()
+        self._reaper = None
+        if idle_timeout:
+            self._reaper = threading.Thread(target=self._reap_loop, name="ocr-model-reaper", daemon=True)
+            self._reaper.start()
+
+    @staticmethod
+    def make_key(lang, **overrides):
+        """引擎配置键：语言 + 排序后的变体参数"""
+        return lang, json.dumps(overrides, sort_keys=True, default=str)
+
+    @contextmanager
+    def acquire(self, lang=None, **overrides):
+        """取得（必要时加载）引擎，在 with 块内保证不会被卸载"""
+        entry = self._checkout(lang or self.default_lang, overrides)
+        try:
+            yield entry.processor
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def pin(self, lang=None, **overrides):
+        """取得引擎并使其常驻（不参与卸载），用于需要长期持有的默认引擎"""
+        return self._checkout(lang or self.default_lang, overrides).processor
+
+    def _checkout(self, lang, overrides):
+        key = self.make_key(lang, **overrides)
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry(key)
+            else:
+                self.counters['hits'] += 1
+            entry.in_use += 1
+
+        if owner:
+            self._load(entry, lang, overrides)
+        else:
+            entry.loaded.wait()
+
+        if entry.error is not None:
+            with self._lock:
+                entry.in_use -= 1
+            raise entry.error
+        return entry
+
+    def _load(self, entry, lang, overrides):
+        """在调用线程中加载引擎（不持有注册表锁，其他配置的请求不受影响）"""
+        tracing.info("📦 加载OCR引擎: lang=%s %s", lang, overrides or "")
+        start_time = time.perf_counter()
+        rss_before = current_rss_bytes()
+        try:
+            entry.processor = self.factory(lang, **{**self.common_kwargs, **overrides})
+        except Exception as e:
+            entry.error = e
+            with self._lock:
+                self._entries.pop(entry.key, None)
+            entry.loaded.set()
+            return
+
+        rss_after = current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            entry.memory_bytes = max(0, rss_after - rss_before)
+        with self._lock:
+            self.counters['loads'] += 1
+            entry.last_used = time.monotonic()
+        entry.loaded.set()
+        tracing.info("✅ OCR引擎已加载: lang=%s (%.1fs, ≈%.0fMB)", lang,
+                     time.perf_counter() - start_time, entry.memory_bytes / 1024 / 1024)
+        self._enforce_budget(keep=entry)
+
+    def _evict(self, entries, reason):
+        """从注册表移除引擎（调用方持有锁），返回被移除的处理器
+
+        条目不再引用处理器，返回的列表是处理器的唯一引用，交给 _release 释放。
+        """
+        processors = []
+        for entry in entries:
+            del self._entries[entry.key]
+            self.counters['evictions'] += 1
+            processors.append(entry.processor)
+            entry.processor = None
+            tracing.info("🗑️ 卸载OCR引擎 (%s): lang=%s", reason, entry.key[0])
+        return processors
+
+    def _release(self, processors):
+        # 在锁外释放引擎，推理库析构可能较慢；清空唯一引用后再回收，引擎内的循环引用才能被释放
+        if processors:
+            processors.clear()
+            gc.collect()
+
+    def _enforce_budget(self, keep=None):
+        """超出内存预算时按最近最少使用顺序卸载空闲引擎"""
+        if self.memory_budget is None:
+            return
+        with self._lock:
+            total = sum(entry.memory_bytes for entry in self._entries.values())
+            victims = []
+            idle = sorted(
+                (entry for entry in self._entries.values()
+                 if entry is not keep and not entry.in_use and entry.loaded.is_set()),
+                key=lambda entry: entry.last_used,
+            )
+            for entry in idle:
+                if total <= self.memory_budget:
+                    break
+                victims.append(entry)
+                total -= entry.memory_bytes
+            processors = self._evict(victims, "超出内存预算")
+            del victims, idle
+        if total > self.memory_budget:
+            tracing.warning("⚠️ OCR引擎内存 ≈%.0fMB 超出预算 %.0fMB（其余引擎正在使用）",
+                            total / 1024 / 1024, self.memory_budget / 1024 / 1024)
+        self._release(processors)
+
+    def evict_idle(self, idle_timeout=None):
+        """卸载空闲超过 idle_timeout 秒的引擎，返回卸载数量"""
+        idle_timeout = self.idle_timeout if idle_timeout is None else idle_timeout
+        if idle_timeout is None:
+            return 0
+        deadline = time.monotonic() - idle_timeout
+        with self._lock:
+            victims = [entry for entry in self._entries.values()
+                       if not entry.in_use and entry.loaded.is_set() and entry.last_used < deadline]
+            processors = self._evict(victims, "空闲超时")
+            del victims
+        count = len(processors)
+        self._release(processors)
+        return count
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 4)
+        while not self._stop.wait(interval):
+            self.evict_idle()
+
+    def stats(self):
+        """已加载引擎及计数器"""
+        now = time.monotonic()
+        with self._lock:
+            engines = [
+                {'lang': entry.key[0], 'variant': json.loads(entry.key[1]),
+                 'memory_bytes': entry.memory_bytes,
+                 'memory_mb': round(entry.memory_bytes / 1024 / 1024, 1),
+                 'idle_seconds': round(now - entry.last_used, 1), 'in_use': entry.in_use}
+                for entry in self._entries.values() if entry.loaded.is_set()
+            ]
+            return {'engines': engines, **self.counters}
+
+    def close(self):
+        """停止空闲回收线程并卸载全部空闲引擎"""
+        self._stop.set()
+        with self._lock:
+            processors = self._evict(
+                [entry for entry in self._entries.values() if not entry.in_use and entry.loaded.is_set()],
+                "关闭",
+            )
+        self._release(processors)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
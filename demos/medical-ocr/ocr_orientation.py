@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+页面级方向探测
+PaddleOCR 的文本行方向分类器对每一行文字都做一次分类。扫描件通常整页方向一致，
+用文档方向分类模型（PP-LCNet_x1_0_doc_ori）对整页缩略图分类一次即可：
+- 整页为 0/90/180/270 度时把页面旋转到正向，逐行分类器和文档方向分类都可以关闭
+- 分类置信度不足时返回"不确定"，由调用方对该页保留逐行方向分类
+
+文档方向分类模块仅在 PaddleOCR 3.x 中提供，不可用时探测器自动停用。
+"""
+
+import threading
+
+import numpy as np
+
+import ocr_tracing as tracing
+
+# 子模型开关（与 PaddleOCR 3.x 的初始化/推理参数同名）
+SUBMODEL_OPTIONS = ('use_textline_orientation', 'use_doc_orientation_classify', 'use_doc_unwarping')
+
+
+class PageOrientationProbe:
+    """整页方向探测器
+
+    Args:
+        model_name: 文档方向分类模型名称
+        min_score: 低于该置信度时视为方向不确定
+        sample_side: 送入分类模型的缩略图最长边（模型输入为224，无需全分辨率）
+    """
+
+    def __init__(self, model_name="PP-LCNet_x1_0_doc_ori", min_score=0.7, sample_side=512):
+        self.model_name = model_name
+        self.min_score = min_score
+        self.sample_side = sample_side
+        self.model = None
+        self._lock = threading.Lock()
+
+        try:
+            from paddleocr import DocImgOrientationClassification
+            self.model = DocImgOrientationClassification(model_name=model_name)
+        except Exception as e:
+            tracing.warning("⚠️ 页面方向探测不可用，将保留逐行方向分类: %s", e)
+
+    @property
+    def available(self):
+        return self.model is not None
+
+    def detect(self, image):
+        """返回 (角度, 置信度)，角度为 0/90/180/270"""
+        step = max(1, -(-max(image.shape[:2]) // self.sample_side))
+        sample = np.ascontiguousarray(image[::step, ::step])
+        with tracing.span("orientation_probe"), self._lock:
+            result = self.model.predict(sample, batch_size=1)[0]
+        res = result if 'label_names' in result else result.json['res']
+        return int(res['label_names'][0]), float(res['scores'][0])
+
+    def upright(self, image):
+        """把页面旋转到正向，返回 (图像, 角度, 方向是否可信)
+
+        与 PaddleOCR 文档预处理一致，旋转后识别结果的坐标位于旋转后的页面上。
+        """
+        angle, score = self.detect(image)
+        if score < self.min_score:
+            tracing.debug("🧭 页面方向不确定 (%d°, %.2f)，保留逐行方向分类", angle, score)
+            return image, angle, False
+        if angle:
+            tracing.debug("🧭 页面方向 %d° (%.2f)，旋转为正向", angle, score)
+            image = np.ascontiguousarray(np.rot90(image, k=angle // 90))
+        return image, angle, True
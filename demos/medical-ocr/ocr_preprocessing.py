@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+医疗OCR自适应预处理流水线
+对BGR uint8图像按配置依次执行预处理阶段，每个阶段先在降采样灰度图上测量，
+只有测量结果表明需要时才修改图像（例如倾斜角很小时不旋转）：
+- reject_blank: 空白/纯色图像直接判定为不可识别，跳过整次推理
+- contrast: 低对比度图像按分位数拉伸（查找表，一次复制）
+- deskew: 投影轮廓法估计倾斜角（所有候选角度一次向量化计算）并旋转纠正
+- rescale: 按估计的文字行高缩放到检测模型的适宜范围
+- binarize: Otsu二值化（默认不启用）
+
+每个阶段在请求追踪中记录为 preprocess.<阶段名> 耗时。
+"""
+
+import numpy as np
+from PIL import Image as PILImage
+
+import ocr_tracing as tracing
+
+# 阶段注册表: 名称 -> 处理函数(image, **options) -> image 或 None（不可识别）
+PREPROCESS_STAGES = {}
+
+# 未指定阶段时使用的阶段（按执行顺序）；命令行工具默认不启用预处理，需用 --preprocess 开启
+DEFAULT_STAGES = ('reject_blank', 'contrast', 'deskew', 'rescale')
+
+# 测量使用的降采样灰度图最长边
+_SAMPLE_SIDE = 1024
+
+
+def register_stage(name):
+    """注册预处理阶段的装饰器"""
+    def decorator(func):
+        PREPROCESS_STAGES[name] = func
+        return func
+    return decorator
+
+
+def gray_sample(image, max_side=_SAMPLE_SIDE):
+    """按步长抽样得到降采样灰度图 (float32)，返回 (灰度图, 步长)"""
+    step = max(1, -(-max(image.shape[:2]) // max_side))
+    sample = image[::step, ::step]
+    # BGR 加权求灰度
+    gray = np.dot(sample, np.array([0.114, 0.587, 0.299], dtype=np.float32))
+    return gray, step
+
+
+def otsu_threshold(gray):
+    """Otsu阈值（基于256级直方图的向量化实现）"""
+    hist = np.bincount(np.clip(gray, 0, 255).astype(np.uint8).ravel(), minlength=256).astype(np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    return int(np.argmax(weight_bg * weight_fg * (mean_bg - mean_fg) ** 2))
+
+
+def ink_mask(gray):
+    """文字像素掩码：取Otsu阈值两侧中占比较小的一类（兼容白底黑字和黑底白字）"""
+    threshold = otsu_threshold(gray)
+    dark = gray <= threshold
+    return dark if dark.mean() <= 0.5 else ~dark
+
+
+def _resize(image, factor):
+    height, width = image.shape[:2]
+    size = (max(1, int(round(width * factor))), max(1, int(round(height * factor))))
+    return np.asarray(PILImage.fromarray(image).resize(size, PILImage.Resampling.LANCZOS))
+
+
+@register_stage('reject_blank')
+def reject_blank(image, min_separation=12.0, **_):
+    """空白、纯色或过曝图像：前景与背景灰度差过小时判定为不可识别"""
+    gray, _ = gray_sample(image, 512)
+    threshold = otsu_threshold(gray)
+    dark = gray <= threshold
+    if dark.all() or not dark.any():
+        tracing.warning("⚠️ 图像为纯色，跳过识别")
+        return None
+    separation = float(gray[~dark].mean() - gray[dark].mean())
+    if separation < min_separation:
+        tracing.warning("⚠️ 图像中未发现可辨认的文字区域(灰度差 %.1f)，跳过识别", separation)
+        return None
+    return image
+
+
+@register_stage('contrast')
+def normalize_contrast(image, min_range=160.0, **_):
+    """低对比度图像按 0.5%/99.5% 分位数线性拉伸到 0-255"""
+    gray, _ = gray_sample(image)
+    low, high = np.percentile(gray, (0.5, 99.5))
+    if high - low >= min_range or high - low < 8:
+        return image
+
+    lut = np.clip((np.arange(256, dtype=np.float32) - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+    tracing.debug("🔆 对比度拉伸: %.0f-%.0f -> 0-255", low, high)
+    return np.take(lut, image)
+
+
+def estimate_skew(image, max_angle=10.0, step=0.25, max_points=20000):
+    """投影轮廓法估计倾斜角（度，逆时针为正）
+
+    把文字像素沿各候选角度投影到纵轴，文字行对齐时投影直方图最"尖锐"（平方和最大）。
+    所有候选角度的投影一次性计算，并用单次 bincount 得到全部直方图。
+    """
+    gray, _ = gray_sample(image, 800)
+    ys, xs = np.nonzero(ink_mask(gray))
+    if ys.size < 200:
+        return 0.0
+    if ys.size > max_points:
+        stride = -(-ys.size // max_points)
+        ys, xs = ys[::stride], xs[::stride]
+
+    angles = np.deg2rad(np.arange(-max_angle, max_angle + step / 2, step))
+    projected = ys[None, :] * np.cos(angles)[:, None] + xs[None, :] * np.sin(angles)[:, None]
+    bins = np.round(projected - projected.min(axis=1, keepdims=True)).astype(np.int64)
+    width = int(bins.max()) + 1
+    offsets = (np.arange(len(angles)) * width)[:, None]
+    profiles = np.bincount((bins + offsets).ravel(), minlength=len(angles) * width).reshape(len(angles), width)
+    scores = np.square(profiles, dtype=np.float64).sum(axis=1)
+    return float(np.rad2deg(angles[int(np.argmax(scores))]))
+
+
+@register_stage('deskew')
+def deskew(image, max_angle=10.0, min_angle=0.3, **_):
+    """估计倾斜角，超过 min_angle 时旋转纠正（空白处以背景色填充）"""
+    angle = estimate_skew(image, max_angle=max_angle)
+    if abs(angle) < min_angle:
+        return image
+
+    gray, _ = gray_sample(image, 256)
+    background = int(np.median(gray))
+    tracing.debug("📐 纠正倾斜: %.2f°", angle)
+    rotated = PILImage.fromarray(image).rotate(
+        -angle, resample=PILImage.Resampling.BICUBIC, expand=True, fillcolor=(background,) * 3
+    )
+    return np.asarray(rotated)
+
+
+def estimate_text_height(image):
+    """估计文字行高（像素）：统计横向投影中连续含文字行的长度中位数"""
+    gray, step = gray_sample(image)
+    mask = ink_mask(gray)
+    rows = mask.sum(axis=1) > max(2, 0.01 * mask.shape[1])
+    edges = np.diff(np.concatenate(([0], rows.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    heights = (ends - starts) * step
+    heights = heights[heights >= 2 * step]
+    if not heights.size:
+        return None
+    return float(np.median(heights))
+
+
+@register_stage('rescale')
+def rescale_to_text_height(image, target_height=32.0, min_height=16.0, max_height=96.0,
+                           max_side=None, **_):
+    """文字行高过小时放大、过大时缩小，使其接近 target_height"""
+    text_height = estimate_text_height(image)
+    if text_height is None or min_height <= text_height <= max_height:
+        return image
+
+    factor = float(np.clip(target_height / text_height, 0.25, 3.0))
+    if max_side:
+        factor = min(factor, max_side / max(image.shape[:2]))
+    if abs(factor - 1.0) < 0.1:
+        return image
+    tracing.debug("🔍 按文字行高缩放: 行高≈%.0fpx, 缩放 x%.2f", text_height, factor)
+    return _resize(image, factor)
+
+
+@register_stage('binarize')
+def binarize(image, **_):
+    """Otsu二值化：在降采样灰度图上求Otsu阈值，全尺寸图像以绿色通道近似亮度，
+    不高于阈值的像素置为黑色(0)、其余置为白色(255)，避免生成全尺寸浮点灰度图"""
+    gray, _ = gray_sample(image)
+    threshold = otsu_threshold(gray)
+    lut = np.where(np.arange(256) <= threshold, 0, 255).astype(np.uint8)
+    output = np.empty_like(image)
+    np.copyto(output, np.take(lut, image[:, :, 1])[:, :, None])
+    return output
+
+
+class PreprocessingPipeline:
+    """按顺序执行的预处理阶段
+
+    Args:
+        stages: 阶段名列表或逗号分隔字符串，默认 DEFAULT_STAGES
+        **options: 传给各阶段的参数（如 max_side、target_height、max_angle）
+    """
+
+    def __init__(self, stages=DEFAULT_STAGES, **options):
+        if isinstance(stages, str):
+            stages = [name.strip() for name in stages.split(',') if name.strip()]
+        unknown = [name for name in stages if name not in PREPROCESS_STAGES]
+        if unknown:
+            raise ValueError(f"未知的预处理阶段: {unknown}（可选: {', '.join(PREPROCESS_STAGES)}）")
+        self.stages = tuple(stages)
+        self.options = options
+
+    def run(self, image):
+        """执行全部阶段；图像被判定为不可识别时返回None"""
+        for name in self.stages:
+            with tracing.span(f"preprocess.{name}"):
+                image = PREPROCESS_STAGES[name](image, **self.options)
+            if image is None:
+                return None
+        return image
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def __repr__(self):
+        return f"PreprocessingPipeline({', '.join(self.stages)})"
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+OCR模型配置档（速度/精度取舍）
+- accurate: PaddleOCR默认模型（3.x 为 PP-OCRv5 server 检测/识别模型），精度优先
+- fast: 面向纯CPU部署，使用 mobile 检测/识别模型并限制检测输入的最长边
+
+配置档只提供 PaddleOCR 初始化参数的默认值，显式传入的引擎参数优先。
+两个配置档在混合语言测试集上的精度差异可用
+dev-tools/legacy-tests/test_mixed_ocr_final.py --profiles accurate,fast 测量。
+"""
+
+# PP-OCRv5 mobile 识别模型覆盖的语言，其他语言沿用PaddleOCR按 lang 选择的识别模型
+_PP_OCRV5_LANGS = ('ch', 'chinese_cht', 'en', 'japan')
+
+# 配置档 -> PaddleOCR主版本 -> 初始化参数
+MODEL_PROFILES = {
+    'accurate': {'3': {}, '2': {}},
+    'fast': {
+        '3': {
+            'text_detection_model_name': 'PP-OCRv5_mobile_det',
+            'text_recognition_model_name': 'PP-OCRv5_mobile_rec',
+            'textline_orientation_model_name': 'PP-LCNet_x0_25_textline_ori',
+            # 默认按最短边不小于64放大；改为最长边不超过960，大图检测耗时随之下降
+            'text_det_limit_type': 'max',
+            'text_det_limit_side_len': 960,
+            'text_recognition_batch_size': 16,
+        },
+        '2': {
+            # 2.x 默认即为 mobile 模型，只降低检测分辨率并增大识别批量
+            'det_limit_type': 'max',
+            'det_limit_side_len': 736,
+            'rec_batch_num': 16,
+        },
+    },
+}
+
+
+def profile_kwargs(profile, paddleocr_version=None, lang='ch'):
+    """返回配置档对应的 PaddleOCR 初始化参数"""
+    if profile not in MODEL_PROFILES:
+        raise ValueError(f"未知的模型配置档: {profile}（可选: {', '.join(MODEL_PROFILES)}）")
+    major = '2' if str(paddleocr_version or '3').startswith('2.') else '3'
+    kwargs = dict(MODEL_PROFILES[profile][major])
+    if major == '3' and lang not in _PP_OCRV5_LANGS:
+        kwargs.pop('text_recognition_model_name', None)
+    return kwargs
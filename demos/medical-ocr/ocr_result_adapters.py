@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+PaddleOCR结果格式适配器
+不同版本的PaddleOCR返回格式不同：
+- v3.x: OCRResult 对象（字典子类），含 rec_texts / rec_scores / rec_boxes / rec_polys
+- v2.x: 每页为 [[多边形, (文本, 置信度)], ...] 列表
+- 部分封装返回 [{'text': ..., 'confidence': ...}, ...] 字典列表
+
+引擎初始化时按已安装版本选定一次适配器，之后每页结果直接调用对应的提取函数，
+不再逐页做 hasattr/isinstance 探测。格式不符时抛出 OCRResultFormatError，
+而不是静默返回空列表。
+"""
+
+import numpy as np
+
+# 适配器注册表: 名称 -> 提取函数(page) -> OCRPage
+RESULT_ADAPTERS = {}
+
+
+class OCRResultFormatError(ValueError):
+    """OCR结果与所选适配器的格式不一致"""
+
+
+class OCRPage:
+    """单页识别结果（列式存储）
+
+    Attributes:
+        texts: 去除首尾空白后的文本列表（已过滤空文本）
+        scores: 置信度数组 float64, 形状 (n,)
+        boxes: 外接矩形数组 int32, 形状 (n, 4)，顺序 x0, y0, x1, y1
+        polygons: 文本行多边形列表，每项为 (k, 2) 点集（未提供时为None）
+    """
+
+    __slots__ = ('texts', 'scores', 'boxes', 'polygons')
+
+    def __init__(self, texts, scores, boxes, polygons):
+        self.texts = texts
+        self.scores = scores
+        self.boxes = boxes
+        self.polygons = polygons
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.empty(0, dtype=np.float64), np.empty((0, 4), dtype=np.int32), [])
+
+    def to_items(self):
+        """转换为处理器使用的行字典列表: text / confidence / box / polygon"""
+        return [
+            {'text': text, 'confidence': float(score), 'box': box, 'polygon': polygon}
+            for text, score, box, polygon in zip(
+                self.texts, self.scores.tolist(), self.boxes.tolist(), self.polygons
+            )
+        ]
+
+
+def register_adapter(name):
+    """注册结果适配器的装饰器"""
+    def decorator(func):
+        RESULT_ADAPTERS[name] = func
+        return func
+    return decorator
+
+
+def _boxes_from_polygons(polygons):
+    """由多边形批量计算外接矩形"""
+    if not polygons:
+        return np.empty((0, 4), dtype=np.int32)
+    try:
+        points = np.asarray(polygons, dtype=np.float32)
+    except ValueError:
+        points = None
+    if points is not None and points.ndim == 3:
+        return np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1).astype(np.int32)
+    # 多边形顶点数不一致时逐个计算（新版 numpy 对不规则嵌套列表直接抛出 ValueError）
+    return np.array(
+        [np.concatenate([np.min(p, axis=0), np.max(p, axis=0)]) for p in polygons], dtype=np.int32
+    )
+
+
+def _build_page(texts, scores, boxes, polygons):
+    """去除首尾空白并过滤空文本，对齐各列"""
+    stripped = [text.strip() if text else '' for text in texts]
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if len(stripped) != len(scores):
+        raise OCRResultFormatError(f"文本数量({len(stripped)})与置信度数量({len(scores)})不一致")
+
+    if boxes is None:
+        boxes = _boxes_from_polygons(polygons) if polygons is not None else None
+    if boxes is None or len(boxes) != len(stripped):
+        boxes = np.zeros((len(stripped), 4), dtype=np.int32)
+    else:
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+    if polygons is None or len(polygons) != len(stripped):
+        polygons = [None] * len(stripped)
+
+    keep = np.fromiter((bool(text) for text in stripped), dtype=bool, count=len(stripped))
+    if keep.all():
+        return OCRPage(stripped, scores, boxes, list(polygons))
+
+    indices = np.flatnonzero(keep).tolist()
+    return OCRPage(
+        [stripped[i] for i in indices],
+        scores[indices],
+        boxes[indices],
+        [polygons[i] for i in indices],
+    )
+
+
+@register_adapter('ocr_result')
+def extract_ocr_result(page):
+    """PaddleOCR v3.x OCRResult（字典子类）"""
+    if page is None:
+        return OCRPage.empty()
+    try:
+        # 直接按字典访问，避免 .json 属性把数组序列化为列表的额外开销
+        res = page if isinstance(page, dict) and 'rec_texts' in page else page.json['res']
+        return _build_page(res['rec_texts'], res['rec_scores'], res.get('rec_boxes'), res.get('rec_polys'))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise OCRResultFormatError(f"OCRResult格式不符: {e}") from e
+
+
+@register_adapter('dict_list')
+def extract_dict_list(page):
+    """[{'text': ..., 'confidence': ..., 'box'?: ...}, ...] 字典列表"""
+    if not page:
+        return OCRPage.empty()
+    try:
+        texts = [line.get('text', '') for line in page]
+        scores = [line.get('confidence', 0.0) for line in page]
+        boxes = [line['box'] for line in page] if 'box' in page[0] else None
+    except (KeyError, TypeError, AttributeError) as e:
+        raise OCRResultFormatError(f"字典列表格式不符: {e}") from e
+    return _build_page(texts, scores, boxes, None)
+
+
+@register_adapter('legacy')
+def extract_legacy(page):
+    """PaddleOCR v2.x: [[多边形, (文本, 置信度)], ...]"""
+    if not page:
+        return OCRPage.empty()
+    try:
+        polygons = [line[0] for line in page]
+        texts = [line[1][0] for line in page]
+        scores = [line[1][1] for line in page]
+    except (IndexError, KeyError, TypeError) as e:
+        raise OCRResultFormatError(f"传统列表格式不符: {e}") from e
+    return _build_page(texts, scores, None, polygons)
+
+
+def detect_adapter(version):
+    """根据PaddleOCR版本号选择适配器名称，无法判断时返回None"""
+    try:
+        major = int(str(version).split('.')[0])
+    except (TypeError, ValueError):
+        return None
+    return 'ocr_result' if major >= 3 else 'legacy'
+
+
+def detect_adapter_from_page(page):
+    """根据一页实际结果探测适配器名称（仅在版本无法判断或格式不符时使用）"""
+    if page is None:
+        return None
+    if hasattr(page, 'json') or (isinstance(page, dict) and 'rec_texts' in page):
+        return 'ocr_result'
+    if isinstance(page, list) and page:
+        if isinstance(page[0], dict):
+            return 'dict_list'
+        return 'legacy'
+    return None
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+医疗OCR识别结果缓存
+以预处理后像素 + 引擎配置的内容哈希为键，在磁盘上持久化识别结果：
+- 内存LRU层：热点结果直接返回，无需读盘
+- 磁盘层：按总字节数上限做LRU淘汰（以文件修改时间记录最近使用）
+- 命中/未命中/淘汰计数，便于评估缓存效果
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _json_default(value):
+    """序列化识别结果中的numpy数组和数值"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"无法序列化的类型: {type(value)}")
+
+
+class OCRResultCache:
+    """内容寻址的OCR结果缓存
+
+    Args:
+        cache_dir: 磁盘缓存目录
+        max_bytes: 磁盘缓存总大小上限（字节）
+        memory_entries: 内存LRU层最多保留的条目数
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024, memory_entries=1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.memory_entries = int(memory_entries)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> 结果列表
+        self._index = OrderedDict()   # key -> 文件字节数（按最近使用排序）
+        self._total_bytes = 0
+        self.counters = {'hits': 0, 'memory_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """扫描磁盘缓存，按修改时间重建LRU索引"""
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+        self._evict()
+
+    @staticmethod
+    def make_key(image, config_fingerprint=''):
+        """计算图像像素与配置的内容哈希"""
+        image = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{image.shape}|{image.dtype}|{config_fingerprint}".encode('utf-8'))
+        digest.update(memoryview(image).cast('B'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """查询缓存，未命中返回None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._index.move_to_end(key)
+                self.counters['hits'] += 1
+                self.counters['memory_hits'] += 1
+                return list(self._memory[key])
+
+            if key not in self._index:
+                self.counters['misses'] += 1
+                return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+            os.utime(path)  # 标记最近使用，重启后仍能恢复LRU顺序
+        except (OSError, ValueError):
+            with self._lock:
+                self._drop(key)
+                self.counters['misses'] += 1
+            return None
+
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            self._remember(key, items)
+            self.counters['hits'] += 1
+        return list(items)
+
+    def put(self, key, items):
+        """写入缓存（原子替换），超出容量时淘汰最久未使用的条目"""
+        payload = json.dumps(items, ensure_ascii=False, default=_json_default).encode('utf-8')
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(payload)
+            self._total_bytes += len(payload)
+            self._remember(key, json.loads(payload))
+            self.counters['writes'] += 1
+            self._evict()
+
+    def _remember(self, key, items):
+        """放入内存LRU层"""
+        self._memory[key] = items
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _drop(self, key):
+        self._total_bytes -= self._index.pop(key, 0)
+        self._memory.pop(key, None)
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到总大小不超过上限"""
+        while self._index and self._total_bytes > self.max_bytes:
+            key = next(iter(self._index))
+            self._drop(key)
+            self.counters['evictions'] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """返回命中统计和容量信息"""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+            }
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            for key in list(self._index):
+                self._drop(key)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+医疗OCR结果流式输出
+批量识别结果按页追加写入，不在内存中累积全部行，也不逐张重写整个文件：
+- CSVResultSink: 追加写入 utf-8-sig CSV，仅在文件开头写一次BOM和表头
+- ParquetResultSink: 按行组写入Parquet，file_name 列字典编码
+- ArrowIPCResultSink: 写入Arrow IPC流，适合下游零拷贝读取
+
+Parquet/Arrow 输出依赖可选的 pyarrow（pip install pyarrow）。
+
+用法示例:
+    with open_result_sink('results.parquet') as sink:
+        processor.process_batch_to_sink(image_paths, sink)
+"""
+
+import os
+import csv
+
+# 输出列：识别文本、置信度、外接矩形和每页识别耗时
+RESULT_COLUMNS = (
+    'file_name', 'page_number', 'line_number', 'extracted_text', 'confidence',
+    'x0', 'y0', 'x1', 'y1', 'elapsed_ms',
+)
+
+_BOX_COLUMNS = ('x0', 'y0', 'x1', 'y1')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise RuntimeError("Parquet/Arrow输出需要安装pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+class ResultSink:
+    """结果输出基类：子类实现 _write_columns 和 close"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write_page(self, file_name, page_number, items, elapsed_ms=None):
+        """写入一页识别结果（text/confidence/box 字典列表）"""
+        columns = {name: [] for name in RESULT_COLUMNS}
+        for line_number, item in enumerate(items, 1):
+            box = item.get('box') or (None, None, None, None)
+            columns['line_number'].append(line_number)
+            columns['extracted_text'].append(item['text'])
+            columns['confidence'].append(round(item['confidence'], 4))
+            for name, value in zip(_BOX_COLUMNS, box):
+                columns[name].append(value)
+
+        count = len(items)
+        columns['file_name'] = [file_name] * count
+        columns['page_number'] = [page_number] * count
+        columns['elapsed_ms'] = [None if elapsed_ms is None else round(elapsed_ms, 2)] * count
+        self._write_columns(columns, count)
+
+    def write_rows(self, rows):
+        """写入 process_batch 等返回的行字典列表（缺失的列留空）"""
+        columns = {name: [row.get(name) for row in rows] for name in RESULT_COLUMNS}
+        self._write_columns(columns, len(rows))
+
+    def _write_columns(self, columns, count):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CSVResultSink(ResultSink):
+    """追加写入CSV；新文件写入BOM和表头，已有文件校验表头后续写
+
+    已有文件的表头与 RESULT_COLUMNS 不一致时抛出 ValueError，避免写出列数混杂、无法读取的文件。
+    """
+
+    def __init__(self, path, append=True):
+        super().__init__(path)
+        is_new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader(f), [])
+            if tuple(header) != RESULT_COLUMNS:
+                raise ValueError(f"无法追加到 {path}: 表头 {header} 与结果列 {list(RESULT_COLUMNS)} 不一致")
+        # utf-8-sig 只在文件开头写BOM，续写时用 utf-8 避免在文件中间插入BOM
+        self._file = open(path, 'w' if is_new else 'a', newline='', encoding='utf-8-sig' if is_new else 'utf-8')
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(RESULT_COLUMNS)
+
+    def _write_columns(self, columns, count):
+        if not count:
+            return
+        self._writer.writerows(zip(*(columns[name] for name in RESULT_COLUMNS)))
+        self._file.flush()
+        self.rows_written += count
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class _ArrowResultSink(ResultSink):
+    """按行组缓冲列数据，攒满后写出一个记录批次"""
+
+    def __init__(self, path, row_group_size=65536):
+        super().__init__(path)
+        pa = self._pa = _require_pyarrow()
+        self.row_group_size = int(row_group_size)
+        self.schema = pa.schema([
+            ('file_name', pa.dictionary(pa.int32(), pa.string())),
+            ('page_number', pa.int32()),
+            ('line_number', pa.int32()),
+            ('extracted_text', pa.string()),
+            ('confidence', pa.float64()),
+            ('x0', pa.int32()),
+            ('y0', pa.int32()),
+            ('x1', pa.int32()),
+            ('y1', pa.int32()),
+            ('elapsed_ms', pa.float64()),
+        ])
+        self._buffer = {name: [] for name in RESULT_COLUMNS}
+        self._buffered = 0
+        self._writer = None
+
+    def _write_columns(self, columns, count):
+        if not count:
+            return
+        for name in RESULT_COLUMNS:
+            self._buffer[name].extend(columns[name])
+        self._buffered += count
+        if self._buffered >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        pa = self._pa
+        arrays = [
+            pa.array(self._buffer[field.name], type=field.type.value_type).dictionary_encode()
+            if pa.types.is_dictionary(field.type)
+            else pa.array(self._buffer[field.name], type=field.type)
+            for field in self.schema
+        ]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self._writer is None:
+            self._writer = self._open_writer()
+        self._writer.write_batch(batch)
+        self.rows_written += self._buffered
+        self._buffer = {name: [] for name in RESULT_COLUMNS}
+        self._buffered = 0
+
+    def _open_writer(self):
+        raise NotImplementedError
+
+    def close(self):
+        self._flush()
+        if self._writer is None:
+            # 没有任何结果时也输出一个只有表结构的文件
+            self._writer = self._open_writer()
+        self._writer.close()
+
+
+class ParquetResultSink(_ArrowResultSink):
+    """Parquet输出，每 row_group_size 行写一个行组"""
+
+    def _open_writer(self):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, self.schema, compression='zstd')
+
+
+class ArrowIPCResultSink(_ArrowResultSink):
+    """Arrow IPC流输出（各批次的 file_name 字典以增量形式写出）"""
+
+    def _open_writer(self):
+        options = self._pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        return self._pa.ipc.new_stream(self.path, self.schema, options=options)
+
+
+SINK_FORMATS = {
+    'csv': CSVResultSink,
+    'parquet': ParquetResultSink,
+    'arrow': ArrowIPCResultSink,
+}
+
+_EXTENSION_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.arrows': 'arrow',
+}
+
+
+def open_result_sink(path, format=None, **kwargs):
+    """按格式（或文件扩展名）创建结果输出"""
+    if format is None:
+        format = _EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+    if format not in SINK_FORMATS:
+        raise ValueError(f"不支持的输出格式: {format}（可选: {', '.join(SINK_FORMATS)}）")
+    return SINK_FORMATS[format](path, **kwargs)
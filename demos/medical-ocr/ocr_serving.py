@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+医疗OCR异步排队服务
+请求先进入有界的 asyncio 队列，由固定数量的OCR工作者依次取出处理：
+- 队列已满时立即拒绝（背压），不让请求堆积在HTTP线程上
+- 每个请求有独立超时；仍在排队的超时请求会被工作者跳过
+- 提供队列深度、在途数量、拒绝/超时/失败计数和等待/处理耗时等指标
+
+工作者在线程池中执行阻塞的OCR处理函数，事件循环本身只负责调度。
+"""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ocr_tracing as tracing
+
+
+class OCRServiceOverloaded(RuntimeError):
+    """队列已满，请求被拒绝"""
+
+
+class OCRServiceTimeout(TimeoutError):
+    """请求在规定时间内未完成"""
+
+
+class AsyncOCRService:
+    """有界队列 + 固定工作者的OCR服务
+
+    Args:
+        handler: 阻塞的处理函数，在工作线程中以 handler(*args) 调用
+        num_workers: OCR工作者数量
+        max_queue: 队列容量（不含正在处理的请求）
+        timeout: 单个请求的超时时间（秒，含排队时间）
+    """
+
+    def __init__(self, handler, num_workers=2, max_queue=16, timeout=120.0):
+        self.handler = handler
+        self.num_workers = int(num_workers)
+        self.max_queue = int(max_queue)
+        self.timeout = timeout
+
+        self._queue = None
+        self._workers = []
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="ocr-worker")
+        self._start_lock = threading.Lock()
+        self._in_flight = 0
+        self.counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'wait_seconds': 0.0,
+            'service_seconds': 0.0,
+        }
+
+    def _ensure_started(self):
+        """在当前事件循环中创建队列和工作者（首次提交时调用）"""
+        if self._queue is not None:
+            return
+        with self._start_lock:
+            if self._queue is not None:
+                return
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.num_workers)]
+            tracing.info("🚦 OCR排队服务已启动: %d 个工作者, 队列容量 %d", self.num_workers, self.max_queue)
+
+    async def submit(self, *args):
+        """提交请求并等待结果；队列已满抛出 OCRServiceOverloaded，超时抛出 OCRServiceTimeout"""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        try:
+            self._queue.put_nowait((future, args, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise OCRServiceOverloaded(f"OCR队列已满 ({self.max_queue})")
+        self.counters['submitted'] += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # 仍在排队的请求会被工作者跳过；已在处理的请求结果将被丢弃
+            future.cancel()
+            self.counters['timeouts'] += 1
+            raise OCRServiceTimeout(f"OCR处理超时 ({self.timeout}s)")
+
+    async def _worker(self):
+        """从队列中取出请求并在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        while True:
+            future, args, enqueued_at = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+
+                started_at = time.perf_counter()
+                self.counters['wait_seconds'] += started_at - enqueued_at
+                self._in_flight += 1
+                try:
+                    result = await loop.run_in_executor(self._executor, self.handler, *args)
+                except Exception as e:
+                    self.counters['failed'] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.counters['completed'] += 1
+                    if not future.done():
+                        future.set_result(result)
+                finally:
+                    self._in_flight -= 1
+                    self.counters['service_seconds'] += time.perf_counter() - started_at
+            finally:
+                self._queue.task_done()
+
+    def metrics(self):
+        """返回当前队列指标"""
+        processed = self.counters['completed'] + self.counters['failed']
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_capacity': self.max_queue,
+            'in_flight': self._in_flight,
+            'workers': self.num_workers,
+            **self.counters,
+            'avg_wait_seconds': self.counters['wait_seconds'] / processed if processed else 0.0,
+            'avg_service_seconds': self.counters['service_seconds'] / processed if processed else 0.0,
+        }
+
+    async def stop(self):
+        """停止工作者并关闭线程池"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+医疗OCR置信度统计与质量分级
+基于NumPy置信度数组一次性计算直方图、分位数和分档计数，
+单张图像和整批结果（按文件分组）共用同一套统计，报告文本由统计结果一次渲染。
+"""
+
+import numpy as np
+
+import ocr_tracing as tracing
+
+# 置信度分档阈值：高 (>0.8) / 中 (0.6-0.8) / 低 (<=0.6)
+HIGH_CONFIDENCE = 0.8
+MEDIUM_CONFIDENCE = 0.6
+
+# 默认输出的分位数
+PERCENTILES = (10, 50, 90)
+
+# 分档标识（与 confidence_levels 返回的档位下标对应：0=低, 1=中, 2=高）
+LEVEL_INDICATORS = np.array(["🔴", "🟡", "🟢"])
+
+
+def confidence_levels(scores):
+    """返回每个置信度所在档位：0=低, 1=中, 2=高"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return (scores > MEDIUM_CONFIDENCE).astype(np.int8) + (scores > HIGH_CONFIDENCE)
+
+
+def quality_grade(mean_confidence):
+    """根据平均置信度给出识别质量评级文本"""
+    if mean_confidence > HIGH_CONFIDENCE:
+        return "🌟 识别质量: 优秀"
+    if mean_confidence > MEDIUM_CONFIDENCE:
+        return "👍 识别质量: 良好"
+    return "⚠️ 识别质量: 一般，建议改进图像质量"
+
+
+class ConfidenceStats:
+    """一组置信度的汇总统计
+
+    Attributes:
+        count: 文本行数
+        mean / minimum / maximum: 平均、最小、最大置信度
+        percentiles: {分位数: 值}
+        high / medium / low: 各档行数
+        histogram: (计数数组, 区间边界数组)，区间为 [0, 1] 等分
+    """
+
+    def __init__(self, scores, bins=10, percentiles=PERCENTILES):
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        self.count = int(scores.size)
+
+        level_counts = np.bincount(confidence_levels(scores), minlength=3)
+        self.low, self.medium, self.high = (int(n) for n in level_counts)
+        self.histogram = np.histogram(scores, bins=bins, range=(0.0, 1.0))
+
+        if self.count:
+            self.mean = float(scores.mean())
+            self.minimum = float(scores.min())
+            self.maximum = float(scores.max())
+            self.percentiles = dict(zip(percentiles, np.percentile(scores, percentiles).tolist()))
+        else:
+            self.mean = self.minimum = self.maximum = 0.0
+            self.percentiles = {p: 0.0 for p in percentiles}
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        """由结果行（含 confidence 列）计算统计"""
+        return cls(np.fromiter((row['confidence'] for row in rows), dtype=np.float64, count=len(rows)), **kwargs)
+
+    @property
+    def grade(self):
+        return quality_grade(self.mean)
+
+    def to_dict(self):
+        """转换为可序列化的字典"""
+        counts, edges = self.histogram
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.minimum,
+            'max': self.maximum,
+            'percentiles': {f"p{p}": value for p, value in self.percentiles.items()},
+            'high': self.high,
+            'medium': self.medium,
+            'low': self.low,
+            'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+        }
+
+    def render(self):
+        """渲染统计摘要文本"""
+        percentiles = " / ".join(f"P{p}={value:.3f}" for p, value in self.percentiles.items())
+        return "\n".join((
+            "📈 识别统计:",
+            f"• 总计识别文字行数: {self.count}",
+            f"• 平均置信度: {self.mean:.3f}",
+            f"• 置信度分位数: {percentiles}",
+            f"• 高置信度(>{HIGH_CONFIDENCE}): {self.high}行",
+            f"• 中等置信度({MEDIUM_CONFIDENCE}-{HIGH_CONFIDENCE}): {self.medium}行",
+            f"• 低置信度(<={MEDIUM_CONFIDENCE}): {self.low}行",
+        ))
+
+
+def render_result_lines(rows):
+    """渲染逐行识别结果（带置信度分档标识）"""
+    scores = np.fromiter((row['confidence'] for row in rows), dtype=np.float64, count=len(rows))
+    indicators = LEVEL_INDICATORS[confidence_levels(scores)]
+    return "".join(
+        f"{i:2d}. {indicator} {row['extracted_text']}\n     (置信度: {score:.3f})\n\n"
+        for i, (row, indicator, score) in enumerate(zip(rows, indicators, scores.tolist()), 1)
+    )
+
+
+def summarize_batch(rows, bins=10):
+    """批量结果统计：返回 (整体统计, {文件名: 每文件统计字典})"""
+    scores = np.fromiter((row['confidence'] for row in rows), dtype=np.float64, count=len(rows))
+    return summarize_scores(scores, [row['file_name'] for row in rows], bins=bins)
+
+
+def summarize_scores(scores, file_names, bins=10):
+    """按文件分组的置信度统计（scores 与 file_names 逐行对应），返回值同 summarize_batch
+
+    每文件的行数、平均置信度和分档计数通过分组 bincount 一次算出，不逐文件切片。
+    """
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    overall = ConfidenceStats(scores, bins=bins)
+    if not scores.size:
+        return overall, {}
+
+    names, groups = np.unique(np.asarray(file_names, dtype=object).astype(str), return_inverse=True)
+    groups = groups.reshape(-1)
+    counts = np.bincount(groups, minlength=len(names))
+    sums = np.bincount(groups, weights=scores, minlength=len(names))
+    # 组合下标: 文件 * 3 + 档位
+    level_counts = np.bincount(groups * 3 + confidence_levels(scores), minlength=len(names) * 3).reshape(-1, 3)
+
+    per_file = {
+        name: {
+            'count': int(count),
+            'mean': float(total / count),
+            'low': int(levels[0]),
+            'medium': int(levels[1]),
+            'high': int(levels[2]),
+        }
+        for name, count, total, levels in zip(names.tolist(), counts, sums, level_counts)
+    }
+    return overall, per_file
+
+
+def log_batch_summary(rows):
+    """把批量结果的整体统计（info）和每文件统计（debug）写入日志，返回 summarize_batch 的结果"""
+    overall, per_file = summarize_batch(rows)
+    tracing.info("📈 批量统计: %d 个文件, %d 行, 平均置信度 %.3f", len(per_file), overall.count, overall.mean)
+    if tracing.is_enabled(tracing.DEBUG):
+        for name, stats in per_file.items():
+            tracing.debug("📈 %s: %d 行, 平均置信度 %.3f, 低置信度 %d 行",
+                          name, stats['count'], stats['mean'], stats['low'])
+    return overall, per_file
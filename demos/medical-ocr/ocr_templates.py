@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+固定版式表单的区域识别（ROI）
+版式固定的文档（如 create_chinese_medical_doc.py 生成的诊断报告）中，各字段位置已知：
+跳过整页文字检测，只把声明的字段区域裁剪出来送入识别模型，输出按字段名组织的结果。
+
+字段坐标以模板设计尺寸为准，按实际图像尺寸等比缩放；多行字段按行均分后逐行识别。
+模板假设页面已基本对齐（倾斜或偏移较大时应先做纠斜预处理）。
+"""
+
+import re
+import json
+
+import numpy as np
+
+# 模板注册表: 名称 -> FormTemplate
+FORM_TEMPLATES = {}
+
+# 字段标签后的冒号（全角/半角）及空白
+_LABEL_SEPARATOR = re.compile(r'^\s*[:：]?\s*')
+
+
+class FieldROI:
+    """表单字段区域
+
+    Args:
+        name: 字段名（输出键）
+        box: 模板坐标系中的区域 (x0, y0, x1, y1)
+        label: 字段标签文字（如 "患者姓名"），识别结果中的标签前缀会被去除
+        lines: 区域内的文字行数，多行字段按行均分后逐行识别
+    """
+
+    __slots__ = ('name', 'box', 'label', 'lines')
+
+    def __init__(self, name, box, label=None, lines=1):
+        self.name = name
+        self.box = tuple(box)
+        self.label = label
+        self.lines = int(lines)
+
+    def to_dict(self):
+        return {'name': self.name, 'box': list(self.box), 'label': self.label, 'lines': self.lines}
+
+
+def strip_label(text, label):
+    """去除识别文本开头的字段标签和冒号"""
+    text = text.strip()
+    if label and text.startswith(label):
+        text = _LABEL_SEPARATOR.sub('', text[len(label):], count=1)
+    return text
+
+
+class FormTemplate:
+    """固定版式表单模板
+
+    Args:
+        name: 模板名称
+        size: 模板设计尺寸 (宽, 高)
+        fields: FieldROI 列表
+        padding: 裁剪时在区域四周额外保留的像素（模板坐标系）
+    """
+
+    def __init__(self, name, size, fields, padding=4):
+        self.name = name
+        self.size = tuple(size)
+        self.fields = list(fields)
+        self.padding = padding
+
+        # 预先展开为逐行区域，裁剪时只需一次向量化缩放
+        line_boxes, owners = [], []
+        for index, field in enumerate(self.fields):
+            x0, y0, x1, y1 = field.box
+            edges = np.linspace(y0, y1, field.lines + 1)
+            for top, bottom in zip(edges[:-1], edges[1:]):
+                line_boxes.append((x0, top, x1, bottom))
+                owners.append(index)
+        self._line_boxes = np.asarray(line_boxes, dtype=np.float64).reshape(-1, 4)
+        self._owners = np.asarray(owners, dtype=np.int64)
+
+    def line_boxes(self, width, height):
+        """按实际图像尺寸缩放后的逐行裁剪区域 (n, 4) int32"""
+        scale = np.array([width / self.size[0], height / self.size[1]] * 2)
+        padding = np.array([-1, -1, 1, 1]) * self.padding
+        boxes = np.rint((self._line_boxes + padding) * scale).astype(np.int32)
+        np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+        return boxes
+
+    def crops(self, image):
+        """裁剪出全部逐行区域，返回 (裁剪图像列表, 区域数组)"""
+        height, width = image.shape[:2]
+        boxes = self.line_boxes(width, height)
+        crops = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes.tolist()]
+        return crops, boxes
+
+    def assemble(self, recognized, boxes):
+        """把逐行识别结果 [(文本, 置信度), ...] 组装为按字段名组织的结果"""
+        fields = {}
+        for index, field in enumerate(self.fields):
+            rows = np.flatnonzero(self._owners == index).tolist()
+            texts = [recognized[i][0].strip() for i in rows if recognized[i][0].strip()]
+            scores = [recognized[i][1] for i in rows if recognized[i][0].strip()]
+            raw_text = "\n".join(texts)
+            if texts and field.lines == 1:
+                text = strip_label(texts[0], field.label)
+            else:
+                # 多行字段：首行为标签行时去掉标签
+                text = "\n".join(t for t in (strip_label(t, field.label) for t in texts) if t)
+            field_boxes = boxes[rows]
+            fields[field.name] = {
+                'text': text,
+                'raw_text': raw_text,
+                'confidence': round(float(min(scores)), 4) if scores else 0.0,
+                'box': [int(field_boxes[:, 0].min()), int(field_boxes[:, 1].min()),
+                        int(field_boxes[:, 2].max()), int(field_boxes[:, 3].max())],
+            }
+        return fields
+
+    def fingerprint(self):
+        """用于结果缓存键的模板描述"""
+        return json.dumps({'name': self.name, 'size': self.size, 'padding': self.padding,
+                           'fields': [field.to_dict() for field in self.fields]}, sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data):
+        fields = [FieldROI(**field) for field in data['fields']]
+        return cls(data['name'], data['size'], fields, padding=data.get('padding', 4))
+
+    @classmethod
+    def load(cls, path):
+        """从JSON文件加载模板: {"name", "size": [宽, 高], "fields": [{"name", "box", "label", "lines"}]}"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def register_template(template):
+    """注册模板，返回模板本身"""
+    FORM_TEMPLATES[template.name] = template
+    return template
+
+
+def get_template(template):
+    """按名称、JSON路径或 FormTemplate 实例获取模板"""
+    if isinstance(template, FormTemplate):
+        return template
+    if template in FORM_TEMPLATES:
+        return FORM_TEMPLATES[template]
+    if isinstance(template, str) and template.endswith('.json'):
+        return FormTemplate.load(template)
+    raise ValueError(f"未知的表单模板: {template}（已注册: {', '.join(FORM_TEMPLATES)}）")
+
+
+def _report_rows(first, last=None):
+    """create_chinese_medical_doc.py 版式中第 first..last 行文字的区域（正文左边距60，标题后各行间距42px，
+    区域已含上下留白，相邻行互不重叠）"""
+    last = first if last is None else last
+    return (56, 80 + 42 * first - 4, 960, 80 + 42 * last + 38)
+
+
+# create_chinese_medical_doc.py 生成的中文医疗诊断报告（1000x900，字号28）
+register_template(FormTemplate('chinese_medical_report', (1000, 900), [
+    FieldROI('hospital', _report_rows(1), label='医院名称'),
+    FieldROI('department', _report_rows(2), label='科室'),
+    FieldROI('patient_name', _report_rows(3), label='患者姓名'),
+    FieldROI('gender_age', _report_rows(4), label='性别'),
+    FieldROI('id_number', _report_rows(5), label='身份证号'),
+    FieldROI('visit_date', _report_rows(6), label='就诊日期'),
+    FieldROI('physician', _report_rows(7), label='主治医师'),
+    FieldROI('diagnosis', _report_rows(9, 11), lines=3),
+    FieldROI('prescriptions', _report_rows(13, 15), lines=3),
+    FieldROI('follow_up', _report_rows(16), label='复查时间'),
+], padding=0))
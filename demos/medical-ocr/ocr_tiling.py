@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+大幅面扫描件分块识别
+将超大页面切成带重叠的分块分别检测识别，再把各分块的文本行合并回整页坐标：
+1. 每个分块只保留中心点落在其"核心区域"内的文本行（核心区域互不重叠，覆盖整页）
+2. 跨越接缝的文本行会在相邻分块中各被截出一段，按几何重叠去重或拼接文本
+   （只处理来自不同分块、且都落在两分块重叠带内的文本行对，分块内部相邻的词不受影响）
+3. 按阅读顺序（行、列）排序输出
+
+相比把整页缩小到2048px，分块保留了小字号（如剂量）的原始分辨率。
+"""
+
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from ocr_result_adapters import OCRPage
+
+
+class Tile:
+    """一个分块: 在整页中的位置 (x0, y0, x1, y1)、核心区域 core 及对应的图像数据"""
+
+    __slots__ = ('x0', 'y0', 'x1', 'y1', 'core', 'image')
+
+    def __init__(self, x0, y0, x1, y1, core, image):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.core = core
+        self.image = image
+
+
+def _tile_spans(length, tile_size, overlap):
+    """计算一个方向上的分块区间及核心区间
+
+    分块起点均匀分布（相邻重叠不小于 overlap，首尾分块与页面边缘对齐），
+    核心区间以相邻分块重叠区的中线为界，彼此不重叠且覆盖整个方向。
+    """
+    if length <= tile_size:
+        return [(0, length, 0, length)]
+    count = -(-(length - overlap) // (tile_size - overlap))
+    starts = np.linspace(0, length - tile_size, count).round().astype(int).tolist()
+    ends = [start + tile_size for start in starts]
+    # 相邻分块的分界线：重叠区中线
+    cuts = [0] + [(starts[i + 1] + ends[i]) / 2 for i in range(count - 1)] + [length]
+    return [(starts[i], ends[i], cuts[i], cuts[i + 1]) for i in range(count)]
+
+
+def split_tiles(image, tile_size=1280, overlap=160):
+    """把图像切成带重叠的分块（分块为连续内存，可直接送入引擎）"""
+    if overlap >= tile_size:
+        raise ValueError(f"分块重叠({overlap})必须小于分块尺寸({tile_size})")
+
+    height, width = image.shape[:2]
+    tiles = []
+    for y0, y1, core_top, core_bottom in _tile_spans(height, tile_size, overlap):
+        for x0, x1, core_left, core_right in _tile_spans(width, tile_size, overlap):
+            core = (core_left, core_top, core_right, core_bottom)
+            tiles.append(Tile(x0, y0, x1, y1, core, np.ascontiguousarray(image[y0:y1, x0:x1])))
+    return tiles
+
+
+def _merge_text(left, right):
+    """拼接被接缝截断的两段文本，去掉两段之间重复的部分"""
+    match = SequenceMatcher(None, left, right, autojunk=False).find_longest_match(
+        0, len(left), 0, len(right)
+    )
+    # 仅当重复部分位于左段末尾、右段开头时才认为是接缝重叠
+    if match.size and match.a + match.size == len(left) and match.b == 0:
+        return left + right[match.size:]
+    return left + right
+
+
+def merge_tile_pages(tiles, pages):
+    """把各分块的识别结果合并为整页 OCRPage"""
+    texts, scores, boxes, polygons, origins = [], [], [], [], []
+
+    for index, (tile, page) in enumerate(zip(tiles, pages)):
+        if not len(page):
+            continue
+        page_boxes = page.boxes + np.array([tile.x0, tile.y0, tile.x0, tile.y0], dtype=np.int32)
+        cx = (page_boxes[:, 0] + page_boxes[:, 2]) / 2
+        cy = (page_boxes[:, 1] + page_boxes[:, 3]) / 2
+        left, top, right, bottom = tile.core
+        keep = np.flatnonzero((cx >= left) & (cx < right) & (cy >= top) & (cy < bottom))
+        for i in keep.tolist():
+            texts.append(page.texts[i])
+            scores.append(page.scores[i])
+            boxes.append(page_boxes[i])
+            origins.append(index)
+            polygon = page.polygons[i]
+            polygons.append(
+                None if polygon is None else (np.asarray(polygon) + [tile.x0, tile.y0]).tolist()
+            )
+
+    if not texts:
+        return OCRPage.empty()
+
+    boxes = np.asarray(boxes, dtype=np.int32)
+    scores = np.asarray(scores, dtype=np.float64)
+    tile_rects = np.array([(tile.x0, tile.y0, tile.x1, tile.y1) for tile in tiles], dtype=np.int64)
+    alive = _dedupe_seams(texts, scores, boxes, polygons, np.asarray(origins), tile_rects)
+
+    # 阅读顺序：按行（以行高一半为容差）再按列
+    line_height = np.median(boxes[:, 3] - boxes[:, 1]) or 1
+    order = sorted(alive, key=lambda i: (int(boxes[i, 1] // max(line_height / 2, 1)), boxes[i, 0]))
+    return OCRPage(
+        [texts[i] for i in order],
+        scores[order],
+        boxes[order],
+        [polygons[i] for i in order],
+    )
+
+
+def _dedupe_seams(texts, scores, boxes, polygons, origins, tile_rects):
+    """处理接缝附近的重复/截断文本行，返回保留的下标列表（会原地更新被拼接的行）
+
+    origins 为每行所属分块的下标，tile_rects 为各分块在整页中的 (x0, y0, x1, y1)。
+    """
+    x0, y0, x1, y1 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    widths = x1 - x0
+    heights = np.maximum(y1 - y0, 1)
+
+    # 两两计算水平/垂直重叠：同一行（垂直重叠过半）且水平相交的才需要处理
+    overlap_x = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+    overlap_y = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+    same_row = overlap_y > 0.5 * np.minimum(heights[:, None], heights[None, :])
+    touching = same_row & (overlap_x > 0)
+
+    # 只考虑来自不同分块、且两个框都与这两个分块的重叠带相交的行对
+    rects = tile_rects[origins]
+    band_x0 = np.maximum(rects[:, None, 0], rects[None, :, 0])
+    band_y0 = np.maximum(rects[:, None, 1], rects[None, :, 1])
+    band_x1 = np.minimum(rects[:, None, 2], rects[None, :, 2])
+    band_y1 = np.minimum(rects[:, None, 3], rects[None, :, 3])
+
+    def in_band(bx0, by0, bx1, by1):
+        return ((np.minimum(bx1, band_x1) > np.maximum(bx0, band_x0))
+                & (np.minimum(by1, band_y1) > np.maximum(by0, band_y0)))
+
+    in_seam = (in_band(x0[:, None], y0[:, None], x1[:, None], y1[:, None])
+               & in_band(x0[None, :], y0[None, :], x1[None, :], y1[None, :]))
+    touching &= (origins[:, None] != origins[None, :]) & in_seam
+    np.fill_diagonal(touching, False)
+    # 较窄的框在水平方向几乎被另一框包含（容差为半个行高）
+    tolerance = np.maximum(heights[:, None], heights[None, :]) / 2
+    nested = overlap_x >= np.minimum(widths[:, None], widths[None, :]) - tolerance
+
+    alive = set(range(len(texts)))
+    for i, j in zip(*np.nonzero(np.triu(touching))):
+        i, j = int(i), int(j)
+        if i not in alive or j not in alive:
+            continue
+        if nested[i, j]:
+            # 同一行被两个分块重复识别：保留更宽的框（截断更少）
+            alive.discard(j if widths[i] >= widths[j] else i)
+            continue
+        # 一行被接缝截成两段：按水平位置拼接文本并合并外框
+        left, right = (i, j) if x0[i] <= x0[j] else (j, i)
+        texts[left] = _merge_text(texts[left], texts[right])
+        scores[left] = min(scores[left], scores[right])
+        boxes[left] = [min(x0[left], x0[right]), min(y0[left], y0[right]),
+                       max(x1[left], x1[right]), max(y1[left], y1[right])]
+        polygons[left] = None
+        alive.discard(right)
+
+    return sorted(alive)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+医疗OCR结构化追踪
+按请求收集分级调试信息和阶段耗时（span），替代通过 redirect_stdout 捕获 print 输出。
+
+- 追踪上下文保存在 contextvars 中，并发请求之间互不干扰，也不会替换全局stdout
+- 未开启追踪且日志级别未启用时，trace() 只做一次上下文查询和一次级别判断，
+  消息使用 %-格式延迟拼接，不产生字符串格式化开销
+- 未被请求捕获的消息转发到 logging 的 "medical_ocr" 记录器
+"""
+
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+logger = logging.getLogger("medical_ocr")
+
+_current_trace = contextvars.ContextVar("medical_ocr_trace", default=None)
+
+# 阶段耗时观察者（如 ocr_metrics 的直方图），与请求追踪相互独立
+_span_observers = []
+
+
+class RequestTrace:
+    """单个请求的追踪记录：分级事件 + 阶段耗时"""
+
+    def __init__(self, request_id=None, level=DEBUG):
+        self.request_id = request_id
+        self.level = level
+        self.events = []  # (相对时间秒, 级别, 消息)
+        self.spans = []   # (阶段名, 耗时秒)
+        self._start = time.perf_counter()
+
+    def add_event(self, level, message):
+        self.events.append((time.perf_counter() - self._start, level, message))
+
+    def stage_durations(self):
+        """按阶段名汇总耗时（秒）"""
+        totals = {}
+        for name, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def render(self):
+        """渲染为调试面板文本"""
+        lines = [f"🧭 请求追踪: {self.request_id or '-'}"]
+        lines.extend(
+            f"[{elapsed * 1000:8.1f}ms] {logging.getLevelName(level):<7} {message}"
+            for elapsed, level, message in self.events
+        )
+        durations = self.stage_durations()
+        if durations:
+            lines.append("⏱️ 阶段耗时:")
+            lines.extend(f"   {name}: {seconds * 1000:.1f}ms" for name, seconds in durations.items())
+        return "\n".join(lines)
+
+
+def is_enabled(level=DEBUG):
+    """判断某级别的消息是否会被记录（用于保护代价较高的参数计算）"""
+    request_trace = _current_trace.get()
+    if request_trace is not None and level >= request_trace.level:
+        return True
+    return logger.isEnabledFor(level)
+
+
+def trace(level, message, *args):
+    """记录一条追踪消息，message 使用 %-格式，仅在需要时才拼接"""
+    request_trace = _current_trace.get()
+    captured = request_trace is not None and level >= request_trace.level
+    logged = logger.isEnabledFor(level)
+    if not captured and not logged:
+        return
+
+    if args:
+        message = message % args
+    if captured:
+        request_trace.add_event(level, message)
+    if logged:
+        logger.log(level, message)
+
+
+def debug(message, *args):
+    trace(DEBUG, message, *args)
+
+
+def info(message, *args):
+    trace(INFO, message, *args)
+
+
+def warning(message, *args):
+    trace(WARNING, message, *args)
+
+
+def error(message, *args):
+    trace(ERROR, message, *args)
+
+
+def add_span_observer(observer):
+    """注册阶段耗时观察者 observer(阶段名, 秒)，例如指标直方图；注册后未开启追踪的请求同样计时
+
+    同一观察者只注册一次。
+    """
+    if observer not in _span_observers:
+        _span_observers.append(observer)
+
+
+def remove_span_observer(observer):
+    """注销阶段耗时观察者；没有观察者且未开启追踪时 span 恢复为零开销"""
+    if observer in _span_observers:
+        _span_observers.remove(observer)
+
+
+@contextmanager
+def span(name):
+    """记录一个处理阶段的耗时；当前请求未开启追踪且没有观察者时不计时"""
+    request_trace = _current_trace.get()
+    if request_trace is None and not _span_observers:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        if request_trace is not None:
+            request_trace.spans.append((name, duration))
+        for observer in _span_observers:
+            observer(name, duration)
+
+
+@contextmanager
+def capture_trace(request_id=None, level=DEBUG):
+    """在当前上下文中开启请求级追踪，返回 RequestTrace"""
+    request_trace = RequestTrace(request_id, level)
+    token = _current_trace.set(request_trace)
+    try:
+        yield request_trace
+    finally:
+        _current_trace.reset(token)
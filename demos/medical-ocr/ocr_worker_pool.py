@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+医疗OCR多进程工作池
+每个工作进程只加载一次独立的PaddleOCR引擎，并绑定到一组CPU核心，
+图像按顺序分发到各进程，结果按输入顺序流式返回。
+
+用法示例:
+    from ocr_worker_pool import OCRWorkerPool
+
+    with OCRWorkerPool(num_workers=8, threads_per_worker=4) as pool:
+        for rows in pool.imap(image_paths):
+            ...
+"""
+
+import os
+import time
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ocr_statistics import log_batch_summary
+
+# 各工作进程内的OCR处理器（由初始化函数创建，整个进程生命周期内复用）
+_worker_processor = None
+
+# 限制推理库内部线程数的环境变量，必须在导入Paddle之前设置
+_THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+
+def _available_cores():
+    """返回当前进程可用的CPU核心列表"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _init_worker(counter, cores, threads_per_worker, processor_kwargs):
+    """工作进程初始化：分配核心、限制线程数并加载OCR引擎"""
+    global _worker_processor
+
+    with counter.get_lock():
+        worker_index = counter.value
+        counter.value += 1
+
+    # 按工作进程序号切分核心，核心不足时循环复用
+    start = (worker_index * threads_per_worker) % len(cores)
+    worker_cores = {cores[(start + i) % len(cores)] for i in range(threads_per_worker)}
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, worker_cores)
+        except OSError as e:
+            print(f"⚠️ 工作进程 #{worker_index} 绑定核心失败: {e}")
+
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads_per_worker)
+
+    from gradio_demo import MedicalOCRProcessor
+
+    print(f"🔧 工作进程 #{worker_index} (PID {os.getpid()}) 加载OCR引擎，核心: {sorted(worker_cores)}")
+    _worker_processor = MedicalOCRProcessor(cpu_threads=threads_per_worker, **processor_kwargs)
+
+
+def _worker_ready():
+    """确认工作进程已完成引擎加载"""
+    return os.getpid()
+
+
+def _worker_process(item, file_name, submodels=None):
+    """在工作进程中处理单张图像（路径或RGB数组），返回结果行"""
+    if isinstance(item, np.ndarray):
+        return _worker_processor.process_single_array(item, file_name, submodels)
+    return _worker_processor.process_single_image(item, submodels)
+
+
+def _worker_extract(item, submodels=None):
+    """在工作进程中识别单张图像（路径或RGB数组），返回 (text/confidence/box 字典列表, 耗时ms)
+
+    识别失败时异常经 Future 传回主进程，批量任务据此把该页记为失败而不是空结果。
+    """
+    start_time = time.perf_counter()
+    if isinstance(item, np.ndarray):
+        items = _worker_processor.extract_text_from_array(item, submodels, raise_errors=True)
+    else:
+        items = _worker_processor.extract_text_from_image(item, submodels, raise_errors=True)
+    return items, (time.perf_counter() - start_time) * 1000
+
+
+def _worker_infer_tile(tile, call_kwargs=None):
+    """在工作进程中识别单个BGR分块，返回 OCRPage"""
+    return _worker_processor._infer_pages([tile], call_kwargs)[0]
+
+
+class OCRWorkerPool:
+    """多进程OCR工作池
+
+    Args:
+        num_workers: 工作进程数，默认按 CPU核心数 / threads_per_worker 计算
+        threads_per_worker: 每个进程的推理线程数（同时决定绑定的核心数）
+        max_pending: 流式处理时允许同时在途的最大任务数，默认 2 * num_workers
+        **processor_kwargs: 传给 MedicalOCRProcessor 的其他参数
+    """
+
+    def __init__(self, num_workers=None, threads_per_worker=None, max_pending=None, **processor_kwargs):
+        cores = _available_cores()
+
+        if num_workers is None:
+            threads_per_worker = threads_per_worker or min(4, len(cores))
+            num_workers = max(1, len(cores) // threads_per_worker)
+        elif threads_per_worker is None:
+            threads_per_worker = max(1, len(cores) // num_workers)
+
+        self.num_workers = int(num_workers)
+        self.threads_per_worker = int(threads_per_worker)
+        self.max_pending = max_pending or 2 * self.num_workers
+
+        # 使用spawn避免fork已初始化的推理线程状态
+        context = mp.get_context('spawn')
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(context.Value('i', 0), cores, self.threads_per_worker, processor_kwargs),
+        )
+        print(f"🏭 OCR工作池: {self.num_workers} 个进程 x {self.threads_per_worker} 线程")
+
+    def start(self):
+        """预先启动所有工作进程并等待引擎加载完成"""
+        futures = [self._executor.submit(_worker_ready) for _ in range(self.num_workers)]
+        pids = {future.result() for future in futures}
+        print(f"✅ OCR工作池就绪，已启动 {len(pids)} 个工作进程")
+        return self
+
+    def submit(self, item, file_name=None, submodels=None):
+        """提交单张图像，返回 concurrent.futures.Future（结果为行列表）"""
+        if file_name is None and not isinstance(item, np.ndarray):
+            file_name = os.path.basename(item)
+        return self._executor.submit(_worker_process, item, file_name or "uploaded_image", submodels)
+
+    def submit_extract(self, item, submodels=None):
+        """提交单张图像，Future 结果为 (识别行字典列表, 耗时ms)，行中保留外接矩形"""
+        return self._executor.submit(_worker_extract, item, submodels)
+
+    def process_single_array(self, image, file_name="uploaded_image", submodels=None):
+        """同步处理单张图像，接口与 MedicalOCRProcessor.process_single_array 一致"""
+        return self.submit(image, file_name, submodels).result()
+
+    def run_tiles(self, tiles, call_kwargs=None):
+        """把大图的各个分块分发到工作进程并行识别，按分块顺序返回 OCRPage 列表
+
+        可作为 MedicalOCRProcessor 的 tile_runner 使用。
+        """
+        futures = [self._executor.submit(_worker_infer_tile, tile, call_kwargs) for tile in tiles]
+        return [future.result() for future in futures]
+
+    def imap(self, items):
+        """按输入顺序流式返回每张图像的结果行列表，在途任务数不超过 max_pending"""
+        pending = deque()
+        for index, item in enumerate(items):
+            file_name = f"image_{index + 1:05d}" if isinstance(item, np.ndarray) else None
+            pending.append(self.submit(item, file_name))
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    def process_batch(self, items):
+        """处理全部图像并返回扁平的结果行列表（与 MedicalOCRProcessor.process_batch 一致）"""
+        results = []
+        for rows in self.imap(items):
+            results.extend(rows)
+        log_batch_summary(results)
+        return results
+
+    def close(self):
+        """关闭工作池"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
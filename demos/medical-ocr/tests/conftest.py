@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入 medical-ocr 目录下的模块（与 gradio_demo.py 的导入方式一致）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,73 @@
+"""batch_ocr 失败页处理的回归测试：识别失败的页面不能被当作空结果记入检查点"""
+
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from batch_ocr import BatchProgress, CheckpointWriter, ProgressJournal, _extract_timed, run_batch
+
+
+class _FailingProcessor:
+    """对指定文件抛出异常的假处理器；只有 raise_errors=True 时才向上抛出"""
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    def extract_text_from_image(self, path, raise_errors=False):
+        if path in self.failing:
+            if raise_errors:
+                raise RuntimeError("推理失败")
+            return []
+        return [{'text': "Dose 5mg", 'confidence': 0.9, 'box': [0, 0, 10, 10]}]
+
+    def extract_text_from_array(self, image, raise_errors=False):
+        return self.extract_text_from_image(None, raise_errors)
+
+
+def _submit_with(processor):
+    def submit(item):
+        future = Future()
+        try:
+            future.set_result(_extract_timed(processor, item))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return submit
+
+
+def test_failed_page_is_not_journaled(tmp_path):
+    good, bad = tmp_path / "good.png", tmp_path / "bad.png"
+    inputs = [(str(good), "good.png"), (str(bad), "bad.png")]
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    journal = ProgressJournal(str(output_dir))
+    writer = CheckpointWriter(str(output_dir), journal, checkpoint_pages=10)
+    progress = BatchProgress(report_interval=1e9)
+
+    run_batch(inputs, _submit_with(_FailingProcessor({str(bad)})), writer, journal, progress)
+
+    assert progress.pages == 1
+    assert [entry['file'] for entry in progress.failed] == ["bad.png"]
+    assert (str(good), None) in journal.done_pages
+    assert (str(bad), None) not in journal.done_pages
+    assert str(bad) not in journal.completed_files
+
+    # 重新运行时只重试失败的文件
+    retried = []
+
+    def submit(item):
+        retried.append(item)
+        return _submit_with(_FailingProcessor(set()))(item)
+
+    journal = ProgressJournal(str(output_dir))
+    progress = BatchProgress(report_interval=1e9)
+    run_batch(inputs, submit, CheckpointWriter(str(output_dir), journal), journal, progress)
+    assert retried == [str(bad)]
+    assert not progress.failed
+
+
+def test_extract_timed_raises_instead_of_returning_empty():
+    processor = _FailingProcessor({None})
+    with pytest.raises(RuntimeError):
+        _extract_timed(processor, np.zeros((4, 4, 3), dtype=np.uint8))
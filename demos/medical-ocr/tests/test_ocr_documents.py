@@ -0,0 +1,65 @@
+"""ocr_documents.prefetch 的行为测试：异常传递到消费端、提前结束时停止后台线程"""
+
+import contextvars
+import itertools
+import threading
+
+import pytest
+
+from ocr_documents import prefetch
+
+
+def _prefetch_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "ocr-prefetch"]
+
+
+def test_yields_items_in_order():
+    assert list(prefetch(range(10), depth=3)) == list(range(10))
+    assert list(prefetch([], depth=1)) == []
+    assert not _prefetch_threads()
+
+
+def test_producer_exception_reaches_consumer():
+    def pages():
+        yield "page-1"
+        yield "page-2"
+        raise OSError("第3页解码失败")
+
+    received = []
+    with pytest.raises(OSError, match="第3页"):
+        for page in prefetch(pages()):
+            received.append(page)
+    assert received == ["page-1", "page-2"]
+    assert not _prefetch_threads()
+
+
+def test_closing_early_stops_producer_thread():
+    produced = itertools.count()
+    pages = prefetch((next(produced) for _ in itertools.repeat(None)), depth=2)
+
+    assert [next(pages), next(pages)] == [0, 1]
+    assert _prefetch_threads()
+
+    pages.close()
+    # close() 等待后台线程退出；生产者至多多取缓冲区容量加一项（阻塞在 put 中的那项）
+    assert not _prefetch_threads()
+    assert next(produced) <= 2 + 2 + 1
+
+
+def test_consumer_break_stops_producer_thread():
+    for page in prefetch(itertools.count(), depth=1):
+        if page == 3:
+            break
+    # CPython 中跳出循环后生成器立即被回收并关闭
+    assert not _prefetch_threads()
+
+
+def test_producer_runs_in_caller_context():
+    request = contextvars.ContextVar('request', default=None)
+    request.set("req-42")
+
+    def pages():
+        for _ in range(2):
+            yield request.get()
+
+    assert list(prefetch(pages())) == ["req-42", "req-42"]
@@ -0,0 +1,50 @@
+"""ocr_metrics 的行为测试：只有启动指标端点后 span 才计时"""
+
+import urllib.request
+
+import pytest
+
+import ocr_metrics as metrics
+import ocr_tracing as tracing
+
+
+class _NoClock:
+    """替换 ocr_tracing 中的 time 模块：一旦计时即失败"""
+
+    @staticmethod
+    def perf_counter():
+        raise AssertionError("未开启追踪和指标时 span 不应计时")
+
+
+@pytest.fixture
+def stage_timing():
+    yield
+    tracing.remove_span_observer(metrics._observe_span)
+
+
+def test_import_does_not_register_span_observer(monkeypatch):
+    assert metrics._observe_span not in tracing._span_observers
+    monkeypatch.setattr(tracing, 'time', _NoClock)
+    with tracing.span("inference"):
+        pass
+
+
+def test_metrics_server_enables_stage_histogram(stage_timing):
+    server = metrics.start_metrics_server(0)
+    try:
+        before = metrics.STAGE_SECONDS._series.get(('unit_test_stage',), [None, 0.0, 0])[2]
+        with tracing.span("unit_test_stage"):
+            pass
+        assert metrics.STAGE_SECONDS._series[('unit_test_stage',)][2] == before + 1
+
+        # 重复启用不会重复计数
+        metrics.enable_stage_timing()
+        assert tracing._span_observers.count(metrics._observe_span) == 1
+
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode('utf-8')
+        assert 'ocr_stage_duration_seconds_count{stage="unit_test_stage"}' in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,66 @@
+"""ocr_model_registry 的行为测试：卸载引擎后处理器对象确实被释放"""
+
+import gc
+import weakref
+
+import pytest
+
+from ocr_model_registry import ModelRegistry
+
+
+class _FakeProcessor:
+    """带循环引用的假处理器（真实推理引擎内部普遍存在循环引用，只能靠 gc 回收）"""
+
+    def __init__(self, lang, **kwargs):
+        self.lang = lang
+        self.kwargs = kwargs
+        self.cycle = self
+
+
+@pytest.fixture
+def no_automatic_gc():
+    # 关闭自动回收，只有 _release 中的 gc.collect() 能回收循环引用
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def test_idle_eviction_releases_processor(no_automatic_gc):
+    registry = ModelRegistry(factory=_FakeProcessor)
+    with registry.acquire('en') as processor:
+        ref = weakref.ref(processor)
+    del processor
+
+    assert registry.evict_idle(idle_timeout=-1) == 1
+    assert ref() is None
+    assert registry.stats()['engines'] == []
+
+
+def test_budget_eviction_releases_least_recently_used(no_automatic_gc):
+    registry = ModelRegistry(memory_budget_mb=1, factory=_FakeProcessor)
+    with registry.acquire('en') as processor:
+        ref = weakref.ref(processor)
+    del processor
+    registry._entries[registry.make_key('en')].memory_bytes = 2 * 1024 * 1024
+
+    with registry.acquire('fr') as processor:
+        assert processor.lang == 'fr'
+    del processor
+
+    assert ref() is None
+    assert [engine['lang'] for engine in registry.stats()['engines']] == ['fr']
+    assert registry.counters['evictions'] == 1
+
+
+def test_engines_in_use_are_not_evicted(no_automatic_gc):
+    registry = ModelRegistry(factory=_FakeProcessor)
+    pinned = registry.pin('ch')
+    ref = weakref.ref(pinned)
+    del pinned
+
+    registry.close()
+    assert ref() is not None
+    assert registry.counters['evictions'] == 0
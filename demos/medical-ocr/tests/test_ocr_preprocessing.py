@@ -0,0 +1,101 @@
+"""ocr_preprocessing 的行为测试：用合成的"文字块"页面验证各预处理阶段"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from ocr_preprocessing import (
+    PreprocessingPipeline,
+    binarize,
+    deskew,
+    estimate_skew,
+    estimate_text_height,
+    normalize_contrast,
+    reject_blank,
+    rescale_to_text_height,
+)
+
+
+def _text_page(width=1200, height=1600, line_height=20, ink=0, paper=255, seed=0):
+    """白底上按行排列的深色矩形"词"，行高 line_height-6 像素"""
+    rng = np.random.default_rng(seed)
+    page = Image.new('RGB', (width, height), (paper,) * 3)
+    draw = ImageDraw.Draw(page)
+    for y in range(100, height - 100, line_height * 2):
+        x = 100
+        while x < width - 150:
+            word = int(rng.integers(20, 90))
+            draw.rectangle([x, y, x + word, y + line_height - 6], fill=(ink,) * 3)
+            x += word + 15
+    return page
+
+
+def _rotated(page, angle):
+    return np.asarray(page.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=(255, 255, 255)))
+
+
+@pytest.mark.parametrize("image", [
+    np.full((400, 300, 3), 255, dtype=np.uint8),
+    np.zeros((400, 300, 3), dtype=np.uint8),
+    # 只有轻微噪声的灰色页面：前景与背景灰度差很小
+    (128 + np.random.default_rng(1).integers(-3, 4, (400, 300, 1))).repeat(3, axis=2).astype(np.uint8),
+])
+def test_blank_pages_are_rejected(image):
+    assert reject_blank(image) is None
+    assert PreprocessingPipeline("reject_blank,contrast").run(image) is None
+
+
+def test_text_page_is_kept():
+    image = np.asarray(_text_page())
+    assert reject_blank(image) is image
+
+
+@pytest.mark.parametrize("angle", [3.0, -2.5, 6.0])
+def test_known_skew_is_recovered(angle):
+    image = _rotated(_text_page(), angle)
+    assert estimate_skew(image) == pytest.approx(angle, abs=0.3)
+    assert abs(estimate_skew(deskew(image))) <= 0.3
+
+
+def test_small_skew_is_left_alone():
+    image = np.asarray(_text_page())
+    assert deskew(image) is image
+
+
+def test_rescale_enlarges_small_text_within_max_side():
+    image = np.asarray(_text_page(line_height=8))
+    assert estimate_text_height(image) < 16
+
+    enlarged = rescale_to_text_height(image)
+    assert enlarged.shape[0] > image.shape[0]
+
+    bounded = rescale_to_text_height(image, max_side=2400)
+    assert max(bounded.shape[:2]) <= 2400
+    assert bounded.shape[0] > image.shape[0]
+
+
+def test_rescale_keeps_normal_text():
+    image = np.asarray(_text_page(line_height=40))
+    assert rescale_to_text_height(image) is image
+
+
+def test_binarize_outputs_two_levels():
+    image = np.asarray(_text_page(ink=90, paper=200))
+    noisy = np.clip(image.astype(np.int16) + np.random.default_rng(2).integers(-20, 21, image.shape), 0, 255)
+    output = binarize(noisy.astype(np.uint8))
+    assert output.shape == image.shape
+    assert set(np.unique(output).tolist()) == {0, 255}
+
+
+def test_contrast_stretches_faded_scan():
+    image = np.asarray(_text_page(ink=110, paper=170))
+    stretched = normalize_contrast(image)
+    assert stretched.min() <= 5 and stretched.max() >= 250
+
+
+def test_pipeline_parses_and_validates_stages():
+    pipeline = PreprocessingPipeline(" contrast , deskew ")
+    assert pipeline.stages == ('contrast', 'deskew')
+    assert not PreprocessingPipeline([])
+    with pytest.raises(ValueError):
+        PreprocessingPipeline("contrast,sharpen")
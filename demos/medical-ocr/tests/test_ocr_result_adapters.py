@@ -0,0 +1,119 @@
+"""ocr_result_adapters 的行为测试：三种结果格式的探测与提取，保留外接框和多边形"""
+
+import numpy as np
+import pytest
+
+from ocr_result_adapters import (
+    RESULT_ADAPTERS,
+    OCRResultFormatError,
+    detect_adapter,
+    detect_adapter_from_page,
+)
+
+POLYGONS = [
+    [[10, 20], [110, 22], [109, 50], [9, 48]],
+    [[12, 60], [90, 60], [90, 88], [12, 88]],
+    [[15, 100], [60, 100], [60, 120], [15, 120]],
+]
+
+
+class _OCRResult(dict):
+    """模拟 PaddleOCR v3.x 的 OCRResult（字典子类，另有 .json 属性）"""
+
+    @property
+    def json(self):
+        return {'res': dict(self)}
+
+
+class _JsonOnlyResult:
+    """只能通过 .json['res'] 访问的结果对象"""
+
+    def __init__(self, res):
+        self.json = {'res': res}
+
+
+def _v3_payload():
+    return {
+        'rec_texts': [" 患者姓名：张三 ", "", "阿莫西林 0.5g"],
+        'rec_scores': np.array([0.98, 0.3, 0.87]),
+        'rec_polys': [np.array(polygon, dtype=np.int16) for polygon in POLYGONS],
+        'rec_boxes': np.array([[9, 20, 110, 50], [12, 60, 90, 88], [15, 100, 60, 120]], dtype=np.int16),
+    }
+
+
+def test_detect_adapter_by_version():
+    assert detect_adapter("3.1.0") == 'ocr_result'
+    assert detect_adapter("2.10.0") == 'legacy'
+    assert detect_adapter(None) is None
+    assert detect_adapter("dev") is None
+    assert set(RESULT_ADAPTERS) == {'ocr_result', 'dict_list', 'legacy'}
+
+
+def test_v3_ocr_result_keeps_boxes_and_polygons():
+    page = _OCRResult(_v3_payload())
+    assert detect_adapter_from_page(page) == 'ocr_result'
+
+    items = RESULT_ADAPTERS['ocr_result'](page).to_items()
+    # 空文本行被过滤，其余各列保持对齐
+    assert [item['text'] for item in items] == ["患者姓名：张三", "阿莫西林 0.5g"]
+    assert [item['confidence'] for item in items] == [0.98, 0.87]
+    assert [item['box'] for item in items] == [[9, 20, 110, 50], [15, 100, 60, 120]]
+    assert [item['polygon'].tolist() for item in items] == [POLYGONS[0], POLYGONS[2]]
+
+
+def test_v3_result_read_through_json_attribute():
+    payload = _v3_payload()
+    del payload['rec_boxes']
+    page = _JsonOnlyResult(payload)
+    assert detect_adapter_from_page(page) == 'ocr_result'
+
+    result = RESULT_ADAPTERS['ocr_result'](page)
+    # 未提供 rec_boxes 时由多边形计算外接矩形
+    assert result.boxes.tolist() == [[9, 20, 110, 50], [15, 100, 60, 120]]
+
+
+def test_dict_list_keeps_boxes():
+    page = [
+        {'text': "Dose: 10mg", 'confidence': 0.91, 'box': [1, 2, 30, 12]},
+        {'text': "  ", 'confidence': 0.2, 'box': [0, 0, 0, 0]},
+        {'text': "ID: 110101", 'confidence': 0.77, 'box': [1, 20, 40, 30]},
+    ]
+    assert detect_adapter_from_page(page) == 'dict_list'
+
+    items = RESULT_ADAPTERS['dict_list'](page).to_items()
+    assert items == [
+        {'text': "Dose: 10mg", 'confidence': 0.91, 'box': [1, 2, 30, 12], 'polygon': None},
+        {'text': "ID: 110101", 'confidence': 0.77, 'box': [1, 20, 40, 30], 'polygon': None},
+    ]
+
+
+def test_legacy_nested_list_keeps_polygons():
+    page = [
+        [POLYGONS[0], ("诊断：高血压", 0.95)],
+        [POLYGONS[1], ("每日2次", 0.66)],
+        [[[1, 1], [5, 1], [3, 9]], ("x", 0.5)],  # 顶点数不同的多边形
+    ]
+    assert detect_adapter_from_page(page) == 'legacy'
+
+    items = RESULT_ADAPTERS['legacy'](page).to_items()
+    assert [item['text'] for item in items] == ["诊断：高血压", "每日2次", "x"]
+    assert [item['box'] for item in items] == [[9, 20, 110, 50], [12, 60, 90, 88], [1, 1, 5, 9]]
+    assert [item['polygon'] for item in items] == [POLYGONS[0], POLYGONS[1], [[1, 1], [5, 1], [3, 9]]]
+
+
+@pytest.mark.parametrize("name", sorted(RESULT_ADAPTERS))
+def test_empty_pages(name):
+    assert len(RESULT_ADAPTERS[name](None if name == 'ocr_result' else [])) == 0
+    assert detect_adapter_from_page(None) is None
+    assert detect_adapter_from_page([]) is None
+
+
+@pytest.mark.parametrize("name, page", [
+    ('ocr_result', {'rec_texts': ["a"]}),
+    ('ocr_result', {'rec_texts': ["a", "b"], 'rec_scores': [0.9]}),
+    ('legacy', [{'text': "a", 'confidence': 0.9}]),
+    ('dict_list', [[POLYGONS[0], ("a", 0.9)]]),
+])
+def test_mismatched_format_raises(name, page):
+    with pytest.raises(OCRResultFormatError):
+        RESULT_ADAPTERS[name](page)
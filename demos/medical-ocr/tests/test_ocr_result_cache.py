@@ -0,0 +1,76 @@
+"""ocr_result_cache 的行为测试：BLAKE2b 内容键和内存/磁盘两级 LRU 淘汰"""
+
+import json
+import os
+
+import numpy as np
+
+from ocr_result_cache import OCRResultCache
+
+ITEMS = [{'text': "Dose: 5mg", 'confidence': 0.9, 'box': np.array([1, 2, 3, 4])}]
+
+
+def _entry_bytes(items=ITEMS):
+    return len(json.dumps(items, ensure_ascii=False, default=lambda v: v.tolist()).encode('utf-8'))
+
+
+def test_make_key_depends_on_pixels_shape_dtype_and_config():
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    key = OCRResultCache.make_key(image, "v1")
+
+    assert key == OCRResultCache.make_key(image.copy(), "v1")
+    assert len(key) == 40  # blake2b digest_size=20
+    # 非连续视图按像素内容计算，与连续副本一致
+    assert OCRResultCache.make_key(image[:, ::2], "v1") == OCRResultCache.make_key(image[:, ::2].copy(), "v1")
+
+    changed = image.copy()
+    changed[0, 0, 0] = 1
+    others = {
+        OCRResultCache.make_key(changed, "v1"),
+        OCRResultCache.make_key(image, "v2"),
+        OCRResultCache.make_key(image.reshape(16, 4, 3), "v1"),
+        OCRResultCache.make_key(image.astype(np.uint16), "v1"),
+    }
+    assert key not in others and len(others) == 4
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = OCRResultCache(str(tmp_path))
+    assert cache.get("ab" * 20) is None
+    cache.put("ab" * 20, ITEMS)
+
+    assert cache.get("ab" * 20) == [{'text': "Dose: 5mg", 'confidence': 0.9, 'box': [1, 2, 3, 4]}]
+    stats = cache.stats()
+    assert (stats['hits'], stats['memory_hits'], stats['misses'], stats['writes']) == (1, 1, 1, 1)
+
+    # 重新打开后从磁盘读取
+    reopened = OCRResultCache(str(tmp_path))
+    assert reopened.get("ab" * 20)[0]['box'] == [1, 2, 3, 4]
+    assert reopened.stats()['memory_hits'] == 0
+
+
+def test_disk_lru_evicts_least_recently_used(tmp_path):
+    cache = OCRResultCache(str(tmp_path), max_bytes=2 * _entry_bytes())
+    keys = ["%02x" % i * 20 for i in range(3)]
+    cache.put(keys[0], ITEMS)
+    cache.put(keys[1], ITEMS)
+    cache.get(keys[0])  # keys[1] 成为最久未使用
+    cache.put(keys[2], ITEMS)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert not os.path.exists(cache._path(keys[1]))
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+
+def test_memory_layer_is_bounded(tmp_path):
+    cache = OCRResultCache(str(tmp_path), memory_entries=2)
+    keys = ["%02x" % i * 20 for i in range(3)]
+    for key in keys:
+        cache.put(key, ITEMS)
+
+    assert list(cache._memory) == keys[1:]
+    # 被挤出内存层的条目仍可从磁盘读取
+    assert cache.get(keys[0]) is not None
+    assert cache.stats()['memory_hits'] == 0
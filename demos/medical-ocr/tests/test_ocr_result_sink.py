@@ -0,0 +1,87 @@
+"""ocr_result_sink 的行为测试：CSV 追加、Parquet 行组和 Arrow IPC 字典增量"""
+
+import csv
+
+import pytest
+
+from ocr_result_sink import RESULT_COLUMNS, CSVResultSink, open_result_sink
+
+ITEMS = [
+    {'text': "阿莫西林 0.5g", 'confidence': 0.98765, 'box': [10, 20, 110, 40]},
+    {'text': "Dose: 5mg", 'confidence': 0.9, 'box': [10, 50, 90, 70]},
+]
+
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+
+def test_csv_append_writes_header_and_bom_once(tmp_path):
+    path = tmp_path / "results.csv"
+    with CSVResultSink(str(path)) as sink:
+        sink.write_page("a.png", None, ITEMS, elapsed_ms=12.345)
+    with CSVResultSink(str(path), append=True) as sink:
+        sink.write_rows([{'file_name': "b.png", 'line_number': 1, 'extracted_text': "x", 'confidence': 0.5}])
+
+    assert path.read_bytes().count(b'\xef\xbb\xbf') == 1
+    rows = _read_csv(path)
+    assert tuple(rows[0]) == RESULT_COLUMNS
+    assert rows[1] == ["a.png", "", "1", "阿莫西林 0.5g", "0.9877", "10", "20", "110", "40", "12.35"]
+    assert rows[3][:5] == ["b.png", "", "1", "x", "0.5"]
+    assert len(rows) == 4
+
+
+def test_csv_append_rejects_foreign_header(tmp_path):
+    path = tmp_path / "legacy.csv"
+    path.write_text("file_name,line_number,extracted_text,confidence\na.png,1,x,0.5\n", encoding='utf-8-sig')
+    with pytest.raises(ValueError):
+        CSVResultSink(str(path), append=True)
+    # 覆盖写入不受影响
+    with CSVResultSink(str(path), append=False) as sink:
+        sink.write_rows([])
+    assert tuple(_read_csv(path)[0]) == RESULT_COLUMNS
+
+
+def test_parquet_sink_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "results.parquet"
+    with open_result_sink(str(path), row_group_size=2) as sink:
+        sink.write_page("a.pdf", 1, ITEMS, elapsed_ms=5.0)
+        sink.write_page("a.pdf", 2, ITEMS[:1])
+    assert sink.rows_written == 3
+
+    parquet = pq.ParquetFile(str(path))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.column_names == list(RESULT_COLUMNS)
+    assert table.column('page_number').to_pylist() == [1, 1, 2]
+    assert table.column('file_name').to_pylist() == ["a.pdf"] * 3
+    assert table.column('elapsed_ms').to_pylist() == [5.0, 5.0, None]
+
+
+def test_arrow_ipc_sink_emits_dictionary_deltas(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / "results.arrow"
+    with open_result_sink(str(path), row_group_size=1) as sink:
+        sink.write_page("a.png", None, ITEMS[:1])
+        sink.write_page("b.png", None, ITEMS[1:])
+
+    with pa.ipc.open_stream(str(path)) as reader:
+        table = reader.read_all()
+    assert table.column('file_name').to_pylist() == ["a.png", "b.png"]
+    assert table.column('extracted_text').to_pylist() == [item['text'] for item in ITEMS]
+
+
+def test_empty_arrow_sink_still_writes_schema(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / "empty.arrow"
+    open_result_sink(str(path)).close()
+    with pa.ipc.open_stream(str(path)) as reader:
+        assert reader.schema.names == list(RESULT_COLUMNS)
+        assert reader.read_all().num_rows == 0
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_result_sink(str(tmp_path / "x.csv"), format='xlsx')
@@ -0,0 +1,115 @@
+"""ocr_serving 的行为测试：队列满时拒绝、单请求超时、跳过排队中已取消的请求"""
+
+import asyncio
+import threading
+
+import pytest
+
+from ocr_serving import AsyncOCRService, OCRServiceOverloaded, OCRServiceTimeout
+
+
+class _GatedHandler:
+    """可控延迟的假处理函数：阻塞到 release() 后才返回，记录被调用的请求"""
+
+    def __init__(self):
+        self.calls = []
+        self._gate = threading.Event()
+
+    def __call__(self, name):
+        self.calls.append(name)
+        if not self._gate.wait(timeout=10):
+            raise RuntimeError("测试未释放处理函数")
+        return f"done:{name}"
+
+    def release(self):
+        self._gate.set()
+
+
+async def _until(predicate, timeout=5.0):
+    """等待事件循环中的工作者推进到指定状态"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "等待超时"
+        await asyncio.sleep(0.005)
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        handler = _GatedHandler()
+        service = AsyncOCRService(handler, num_workers=1, max_queue=1, timeout=10)
+        try:
+            first = asyncio.ensure_future(service.submit("a"))
+            await _until(lambda: service.metrics()['in_flight'] == 1)
+            second = asyncio.ensure_future(service.submit("b"))
+            await _until(lambda: service.metrics()['queue_depth'] == 1)
+
+            with pytest.raises(OCRServiceOverloaded):
+                await service.submit("c")
+
+            handler.release()
+            assert await first == "done:a"
+            assert await second == "done:b"
+            stats = service.metrics()
+            assert (stats['submitted'], stats['completed'], stats['rejected']) == (2, 2, 1)
+            assert handler.calls == ["a", "b"]
+        finally:
+            handler.release()
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_request_times_out():
+    async def scenario():
+        handler = _GatedHandler()
+        service = AsyncOCRService(handler, num_workers=1, max_queue=4, timeout=0.05)
+        try:
+            with pytest.raises(OCRServiceTimeout):
+                await service.submit("slow")
+            assert service.metrics()['timeouts'] == 1
+        finally:
+            handler.release()
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_requests_cancelled_while_queued_are_skipped():
+    async def scenario():
+        handler = _GatedHandler()
+        service = AsyncOCRService(handler, num_workers=1, max_queue=4, timeout=0.05)
+        try:
+            running = asyncio.ensure_future(service.submit("running"))
+            await _until(lambda: service.metrics()['in_flight'] == 1)
+            # 排队中的请求超时后被取消，工作者取到时直接跳过
+            with pytest.raises(OCRServiceTimeout):
+                await service.submit("queued")
+            with pytest.raises(OCRServiceTimeout):
+                await running
+
+            handler.release()
+            await asyncio.wait_for(service._queue.join(), 5)
+            assert handler.calls == ["running"]
+            stats = service.metrics()
+            assert (stats['timeouts'], stats['completed'], stats['queue_depth']) == (2, 1, 0)
+        finally:
+            handler.release()
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_handler_errors_propagate():
+    async def scenario():
+        def handler(_):
+            raise ValueError("坏图像")
+
+        service = AsyncOCRService(handler, num_workers=1, max_queue=1, timeout=5)
+        try:
+            with pytest.raises(ValueError):
+                await service.submit("x")
+            assert service.metrics()['failed'] == 1
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
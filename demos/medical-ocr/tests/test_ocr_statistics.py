@@ -0,0 +1,37 @@
+"""ocr_statistics 的行为测试：按文件分组的批量统计"""
+
+import pytest
+
+from ocr_statistics import ConfidenceStats, summarize_batch, summarize_scores
+
+
+def test_summarize_batch_groups_by_file():
+    rows = [
+        {'file_name': "b.png", 'confidence': 0.9},
+        {'file_name': "a.png", 'confidence': 0.5},
+        {'file_name': "b.png", 'confidence': 0.7},
+        {'file_name': "a.png", 'confidence': 0.95},
+    ]
+    overall, per_file = summarize_batch(rows)
+
+    assert overall.count == 4
+    assert overall.mean == pytest.approx(0.7625)
+    assert per_file["a.png"] == {'count': 2, 'mean': pytest.approx(0.725), 'low': 1, 'medium': 0, 'high': 1}
+    assert per_file["b.png"] == {'count': 2, 'mean': pytest.approx(0.8), 'low': 0, 'medium': 1, 'high': 1}
+
+
+def test_summarize_scores_matches_rows_and_handles_empty():
+    rows = [{'file_name': f"{i % 3}.png", 'confidence': i / 10} for i in range(10)]
+    expected = summarize_batch(rows)[1]
+    assert summarize_scores([row['confidence'] for row in rows], [row['file_name'] for row in rows])[1] == expected
+
+    overall, per_file = summarize_scores([], [])
+    assert overall.count == 0 and per_file == {}
+
+
+def test_render_labels_match_boundary_counts():
+    # 恰好等于分档阈值的置信度计入较低一档，报告中的区间标注需与之一致
+    report = ConfidenceStats([0.6, 0.6, 0.8, 0.81]).render()
+    assert "• 低置信度(<=0.6): 2行" in report
+    assert "• 中等置信度(0.6-0.8): 1行" in report
+    assert "• 高置信度(>0.8): 1行" in report
@@ -0,0 +1,125 @@
+"""ocr_templates 与 extract_form 的行为测试：模板区域换算、页边裁剪、字段文本组装"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from gradio_demo import MedicalOCRProcessor
+from ocr_templates import FORM_TEMPLATES, FieldROI, FormTemplate, get_template
+
+
+def _template():
+    """设计尺寸 100x50：单行字段、贴边字段、三行字段"""
+    return FormTemplate('unit_form', (100, 50), [
+        FieldROI('name', (10, 5, 60, 15), label='姓名'),
+        FieldROI('notes', (0, 20, 100, 50), label='诊断', lines=3),
+        FieldROI('corner', (90, 0, 100, 10)),
+    ], padding=2)
+
+
+class _StubRecognizer:
+    """假的文字识别模型：按调用顺序返回预设文本，记录输入裁剪图像的形状"""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.shapes = []
+
+    def predict(self, input, batch_size):
+        self.shapes.extend(crop.shape for crop in input)
+        assert batch_size == len(input)
+        return [{'rec_text': text, 'rec_score': score} for text, score in self.outputs[:len(input)]]
+
+
+def _processor(recognizer):
+    """跳过引擎初始化，只保留 extract_form 用到的状态"""
+    processor = MedicalOCRProcessor.__new__(MedicalOCRProcessor)
+    processor.infer_method = 'predict'
+    processor.template = None
+    processor.result_cache = None
+    processor._ocr_lock = threading.Lock()
+    processor._text_recognizer = recognizer
+    return processor
+
+
+def test_line_boxes_scale_relative_boxes_and_clamp_to_page():
+    boxes = _template().line_boxes(200, 100)
+    assert boxes.dtype == np.int32
+    assert boxes.tolist() == [
+        [16, 6, 124, 34],
+        # 多行字段按行均分；超出页面的留白被裁剪到页边
+        [0, 36, 200, 64],
+        [0, 56, 200, 84],
+        [0, 76, 200, 100],
+        [176, 0, 200, 24],
+    ]
+
+
+def test_crops_follow_line_boxes():
+    image = np.arange(100 * 200 * 3, dtype=np.uint32).reshape(100, 200, 3).astype(np.uint8)
+    crops, boxes = _template().crops(image)
+    for crop, (x0, y0, x1, y1) in zip(crops, boxes.tolist()):
+        assert crop.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(crop, image[y0:y1, x0:x1])
+
+
+def test_assemble_strips_labels_and_joins_lines():
+    template = _template()
+    boxes = template.line_boxes(200, 100)
+    fields = template.assemble([
+        ("姓名：张三 ", 0.98),
+        ("诊断:", 0.91),
+        ("高血压", 0.85),
+        ("  ", 0.10),
+        ("", 0.0),
+    ], boxes)
+
+    assert fields['name'] == {'text': "张三", 'raw_text': "姓名：张三", 'confidence': 0.98, 'box': [16, 6, 124, 34]}
+    # 空行不参与文本和置信度；字段区域为各行区域的外接框
+    assert fields['notes']['text'] == "高血压"
+    assert fields['notes']['raw_text'] == "诊断:\n高血压"
+    assert fields['notes']['confidence'] == 0.85
+    assert fields['notes']['box'] == [0, 36, 200, 100]
+    assert fields['corner'] == {'text': "", 'raw_text': "", 'confidence': 0.0, 'box': [176, 0, 200, 24]}
+
+
+def test_get_template_resolves_name_instance_and_json(tmp_path):
+    template = _template()
+    assert get_template(template) is template
+    assert get_template('chinese_medical_report') is FORM_TEMPLATES['chinese_medical_report']
+
+    path = tmp_path / "form.json"
+    path.write_text(template.fingerprint(), encoding='utf-8')
+    loaded = get_template(str(path))
+    assert loaded.fingerprint() == template.fingerprint()
+    assert loaded.line_boxes(200, 100).tolist() == template.line_boxes(200, 100).tolist()
+
+    with pytest.raises(ValueError):
+        get_template('no_such_form')
+
+
+def test_extract_form_recognizes_only_template_regions():
+    recognizer = _StubRecognizer([
+        ("姓名 张三", 0.97), ("诊断：", 0.9), ("高血压", 0.8), ("糖尿病", 0.95), ("A", 0.6),
+    ])
+    fields = _processor(recognizer).extract_form(np.full((100, 200, 3), 255, dtype=np.uint8), _template())
+
+    assert recognizer.shapes == [(28, 108, 3), (28, 200, 3), (28, 200, 3), (24, 200, 3), (24, 24, 3)]
+    assert fields['name']['text'] == "张三"
+    assert fields['notes']['text'] == "高血压\n糖尿病"
+    assert fields['notes']['confidence'] == 0.8
+    assert fields['corner']['text'] == "A"
+
+
+def test_extract_form_skips_degenerate_crops():
+    # 不足4像素高的区域不送入识别模型，对应字段为空
+    template = FormTemplate('thin_form', (100, 50), [
+        FieldROI('name', (10, 5, 60, 15), label='姓名'),
+        FieldROI('rule', (0, 49, 100, 50)),
+    ], padding=0)
+    recognizer = _StubRecognizer([("姓名:李四", 0.9)])
+    fields = _processor(recognizer).extract_form(np.full((100, 200), 200, dtype=np.uint8), template)
+
+    assert recognizer.shapes == [(20, 100, 3)]
+    assert fields['name']['text'] == "李四"
+    assert fields['rule'] == {'text': "", 'raw_text': "", 'confidence': 0.0, 'box': [0, 98, 200, 100]}
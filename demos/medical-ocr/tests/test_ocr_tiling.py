@@ -0,0 +1,50 @@
+import numpy as np
+
+from ocr_result_adapters import OCRPage
+from ocr_tiling import merge_tile_pages, split_tiles
+
+
+def _page(lines):
+    """lines: [(text, (x0, y0, x1, y1))]，坐标为分块内坐标"""
+    if not lines:
+        return OCRPage.empty()
+    texts = [text for text, _ in lines]
+    boxes = np.array([box for _, box in lines], dtype=np.int32)
+    return OCRPage(texts, np.full(len(lines), 0.9), boxes, [None] * len(lines))
+
+
+def _two_tiles():
+    # 宽2000px，分块1280、重叠160：分块x区间为 [0,1280) 和 [720,2000)，核心分界在 x=1000
+    tiles = split_tiles(np.zeros((400, 2000), dtype=np.uint8), tile_size=1280, overlap=160)
+    assert [(tile.x0, tile.x1) for tile in tiles] == [(0, 1280), (720, 2000)]
+    return tiles
+
+
+def test_adjacent_words_inside_one_tile_are_not_fused():
+    tiles = _two_tiles()
+    pages = [_page([("Dose:", (100, 50, 180, 80)), ("10mg", (175, 50, 240, 80))]), _page([])]
+    merged = merge_tile_pages(tiles, pages)
+    assert merged.texts == ["Dose:", "10mg"]
+
+
+def test_adjacent_words_from_one_tile_inside_overlap_band_are_not_fused():
+    tiles = _two_tiles()
+    pages = [_page([("Dose:", (800, 50, 880, 80)), ("10mg", (875, 50, 940, 80))]), _page([])]
+    assert merge_tile_pages(tiles, pages).texts == ["Dose:", "10mg"]
+
+
+def test_line_split_by_seam_is_joined():
+    tiles = _two_tiles()
+    # 整页中 x=900..1150 的一行，左分块截到 1080，右分块从 1000 开始
+    left = _page([("Amlodipine 5mg", (900, 300, 1080, 330))])
+    right = _page([("5mg daily", (1000 - 720, 300, 1150 - 720, 330))])
+    merged = merge_tile_pages(tiles, [left, right])
+    assert merged.texts == ["Amlodipine 5mg daily"]
+    assert merged.boxes.tolist() == [[900, 300, 1150, 330]]
+
+
+def test_words_far_from_seam_in_different_tiles_stay_separate():
+    tiles = _two_tiles()
+    left = _page([("Patient", (100, 50, 300, 80))])
+    right = _page([("Name", (1500 - 720, 50, 1700 - 720, 80))])
+    assert merge_tile_pages(tiles, [left, right]).texts == ["Patient", "Name"]
@@ -0,0 +1,89 @@
+"""ocr_tracing 的行为测试：并发请求的追踪互不干扰、默认不捕获调试信息"""
+
+import asyncio
+import threading
+
+import ocr_tracing as tracing
+
+
+class _Unformattable:
+    """被格式化即失败：用于验证未启用的消息不会拼接"""
+
+    def __str__(self):
+        raise AssertionError("未启用的调试消息不应被格式化")
+
+
+def _messages(request_trace):
+    return [message for _, _, message in request_trace.events]
+
+
+def test_debug_is_off_by_default():
+    assert not tracing.is_enabled(tracing.DEBUG)
+    tracing.debug("📊 图像信息: %s", _Unformattable())
+
+    with tracing.capture_trace("req", level=tracing.INFO) as request_trace:
+        assert not tracing.is_enabled(tracing.DEBUG)
+        tracing.debug("📊 图像信息: %s", _Unformattable())
+        tracing.info("✅ 完成")
+    assert _messages(request_trace) == ["✅ 完成"]
+
+
+def test_capture_trace_collects_events_and_spans():
+    with tracing.capture_trace("req-1") as request_trace:
+        assert tracing.is_enabled(tracing.DEBUG)
+        tracing.debug("🔍 %d 行", 3)
+        with tracing.span("inference"):
+            pass
+        with tracing.span("inference"):
+            pass
+    assert _messages(request_trace) == ["🔍 3 行"]
+    assert [name for name, _ in request_trace.spans] == ["inference", "inference"]
+    assert list(request_trace.stage_durations()) == ["inference"]
+    assert "req-1" in request_trace.render()
+
+    # 离开上下文后不再捕获
+    tracing.warning("⚠️ 追踪结束后的消息")
+    assert len(request_trace.events) == 1
+
+
+def test_concurrent_threads_keep_separate_traces():
+    barrier = threading.Barrier(4)
+    traces = {}
+
+    def handle(request_id):
+        with tracing.capture_trace(request_id) as request_trace:
+            for step in range(3):
+                barrier.wait(timeout=5)
+                tracing.debug("%s 第%d步", request_id, step)
+                with tracing.span(f"stage-{request_id}"):
+                    pass
+        traces[request_id] = request_trace
+
+    threads = [threading.Thread(target=handle, args=(f"t{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for request_id, request_trace in traces.items():
+        assert _messages(request_trace) == [f"{request_id} 第{step}步" for step in range(3)]
+        assert {name for name, _ in request_trace.spans} == {f"stage-{request_id}"}
+    assert len(traces) == 4
+
+
+def test_concurrent_tasks_keep_separate_traces():
+    async def handle(request_id):
+        with tracing.capture_trace(request_id) as request_trace:
+            for step in range(3):
+                tracing.info("%s 第%d步", request_id, step)
+                with tracing.span(f"stage-{request_id}"):
+                    await asyncio.sleep(0)
+        return request_trace
+
+    async def scenario():
+        return await asyncio.gather(*(handle(f"a{i}") for i in range(4)))
+
+    for i, request_trace in enumerate(asyncio.run(scenario())):
+        assert request_trace.request_id == f"a{i}"
+        assert _messages(request_trace) == [f"a{i} 第{step}步" for step in range(3)]
+        assert {name for name, _ in request_trace.spans} == {f"stage-a{i}"}